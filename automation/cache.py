@@ -0,0 +1,119 @@
+# automation/cache.py
+# Cache en disco (SQLite, un solo fichero) para respuestas de PA-API.
+# Compartida por los tres generadores: clave = operacion + payload normalizado.
+# - TTL por operacion (SearchItems cambia poco, GetItems lleva precios).
+# - Eviccion por tamano (LRU por ultimo uso).
+# - stale-while-error: si la API falla, se sirve la ultima respuesta buena.
+
+import os, json, time, sqlite3, hashlib, threading
+from automation import metrics
+
+CACHE_PATH = ".cache/paapi.sqlite"  # PAAPI_CACHE_PATH / PAAPI_CACHE=0 en el entorno del build (BuildContext.client)
+
+DEFAULT_TTL = {
+    "SearchItems": 3 * 86400,
+    "GetItems": 12 * 3600,
+}
+FALLBACK_TTL = 86400
+MAX_BYTES = 64 * 1024 * 1024
+MAX_STALE = 30 * 86400  # no servimos respuestas de mas de 30 dias ni aunque la API falle
+
+def _norm_kw(s):
+    return " ".join(str(s).lower().split())
+
+def normalize_payload(payload, marketplace=""):
+    # PartnerTag/PartnerType no cambian la respuesta que usamos; el orden de ASINs y Resources tampoco
+    p = {k: v for k, v in payload.items() if k not in ("PartnerTag", "PartnerType")}
+    if "Keywords" in p:
+        p["Keywords"] = _norm_kw(p["Keywords"])
+    if "ItemIds" in p:
+        p["ItemIds"] = sorted(set(p["ItemIds"]))
+    if "Resources" in p:
+        p["Resources"] = sorted(set(p["Resources"]))
+    p["Marketplace"] = marketplace
+    return p
+
+def cache_key(op, payload, marketplace=""):
+    raw = json.dumps([op, normalize_payload(payload, marketplace)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class PaapiCache:
+    def __init__(self, path=CACHE_PATH, ttl=None, max_bytes=MAX_BYTES, max_stale=MAX_STALE):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, op TEXT, body TEXT, size INTEGER,"
+            " stored_at REAL, used_at REAL)"
+        )
+
+    def _get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT op, body, stored_at FROM responses WHERE key=?", (key,)).fetchone()
+            if row:
+                self._db.execute("UPDATE responses SET used_at=? WHERE key=?", (time.time(), key))
+        return row
+
+    def _put(self, key, op, value):
+        body = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, op, body, size, stored_at, used_at) VALUES (?,?,?,?,?,?)",
+                (key, op, body, len(body), now, now),
+            )
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size),0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key=?", (key,))
+            total -= size
+            self.stats["evicted"] += 1
+
+    def fetch(self, op, payload, call, marketplace="", max_age=None):
+        # max_age (s) sustituye al TTL de la operacion, p.ej. para refrescar precios
+        key = cache_key(op, payload, marketplace)
+        row = self._get(key)
+        age = time.time() - row[2] if row else None
+        ttl = self.ttl.get(op, FALLBACK_TTL) if max_age is None else max_age
+        if row and age < ttl:
+            self.stats["hits"] += 1; metrics.incr("cache.hits")
+            return json.loads(row[1])
+        self.stats["misses"] += 1; metrics.incr("cache.misses")
+        try:
+            value = call()
+        except Exception:
+            if row and age < self.max_stale:
+                self.stats["stale"] += 1; metrics.incr("cache.stale")
+                return json.loads(row[1])
+            raise
+        self._put(key, op, value)
+        return value
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def open_cache(path=CACHE_PATH):
+    # una PaapiCache (una conexion) por fichero y proceso
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = PaapiCache(path)
+        return _caches[path]
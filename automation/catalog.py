@@ -0,0 +1,105 @@
+# automation/catalog.py
+# Catalogo de respaldo (sin PA-API): rango de precio, variantes de producto y
+# etiquetas tipo/perfil por nicho. Los datos viven en fallback_catalog.json.
+# - Se carga una vez por proceso; los patrones "match" se compilan en un
+#   automata Aho-Corasick que encuentra todos los presets de una keyword en una
+#   sola pasada: el coste por keyword no crece con el numero de presets.
+# - Cada campo lo decide el primer preset del fichero que coincide y lo define;
+#   si ninguno, "default".
+# FALLBACK_CATALOG_PATH (entorno del build, BuildContext.start -> use()) apunta a
+# otro fichero (mismo formato).
+
+import os, json, threading
+from collections import deque
+from functools import lru_cache
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fallback_catalog.json")
+FIELDS = ("price", "tipo", "perfil", "variants")
+MAX_VARIANTS = 6
+
+class Matcher:
+    # Aho-Corasick sobre caracteres: patrones [(texto, id)] -> ids presentes en un texto
+    def __init__(self, patterns):
+        self.goto, self.fail, self.out = [{}], [0], [[]]
+        for text, pid in patterns:
+            s = 0
+            for ch in text:
+                nxt = self.goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[s][ch] = nxt
+                    self.goto.append({}); self.fail.append(0); self.out.append([])
+                s = nxt
+            self.out[s].append(pid)
+        queue = deque(self.goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in self.goto[s].items():
+                queue.append(t)
+                f = self.fail[s]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[t] = self.goto[f].get(ch, 0)
+                self.out[t] = self.out[t] + self.out[self.fail[t]]
+
+    def find(self, text):
+        s, hits = 0, set()
+        for ch in text:
+            while s and ch not in self.goto[s]:
+                s = self.fail[s]
+            s = self.goto[s].get(ch, 0)
+            if self.out[s]:
+                hits.update(self.out[s])
+        return hits
+
+class Catalog:
+    def __init__(self, data):
+        self.default = data["default"]
+        self.presets = data.get("presets", [])
+        self.matcher = Matcher([(p.lower(), i) for i, e in enumerate(self.presets) for p in e.get("match", [])])
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def resolve(self, kw):
+        # -> {"price": (a, b), "tipo", "perfil", "variants": [{"name", "features"}]}
+        hits = sorted(self.matcher.find(kw.lower()))
+        out = {}
+        for field in FIELDS:
+            out[field] = next((self.presets[i][field] for i in hits if field in self.presets[i]), self.default[field])
+        out["price"] = tuple(out["price"])
+        v = out["variants"]
+        fmt = lambda s, x: s.format(v=x, kw=kw, Kw=kw.title())
+        out["variants"] = [{"name": fmt(v["name"], x), "features": [fmt(f, x) for f in v["features"]]}
+                           for x in v["values"][:MAX_VARIANTS]]
+        return out
+
+_catalog = None
+_path = CATALOG_PATH
+_lock = threading.Lock()
+
+def use(path=CATALOG_PATH):
+    # fichero del catalogo de este build; si cambia se vuelve a cargar y se vacia lookup()
+    global _catalog, _path
+    with _lock:
+        if path != _path:
+            _catalog, _path = None, path
+            lookup.cache_clear()
+    return path
+
+def path():
+    return _path
+
+def get():
+    global _catalog
+    with _lock:
+        if _catalog is None:
+            _catalog = Catalog.load(_path)
+        return _catalog
+
+@lru_cache(maxsize=8192)
+def lookup(kw):
+    # cada keyword se consulta varias veces por post (tabla, intro, bloques)
+    return get().resolve(kw)
@@ -0,0 +1,17 @@
+# automation/clock.py
+# Fecha del build para todo lo que acaba en public/ (anos del pie, fechas de
+# actualizacion, lastmod del sitemap, seleccion diaria de posts).
+# SOURCE_DATE_EPOCH (convenio de builds reproducibles) la fija: mismas
+# entradas + misma fecha = mismos bytes. Sin ella, hora UTC actual.
+
+import os, time, datetime
+
+def timestamp():
+    v = os.environ.get("SOURCE_DATE_EPOCH", "")
+    return int(v) if v.strip() else time.time()
+
+def now():
+    return datetime.datetime.utcfromtimestamp(timestamp())
+
+def today():
+    return now().strftime("%Y-%m-%d")
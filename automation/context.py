@@ -0,0 +1,124 @@
+# automation/context.py
+# Contexto de build: lo que un run necesita de fuera (config, URL base,
+# credenciales, salida en public/) se carga al crear el contexto, no al
+# importar. Importar un generador no lee ficheros, no crea directorios ni
+# mira el entorno: lo pueden importar el benchmark, los workers del pool de
+# render o un test, y varios builds en el mismo proceso no se pisan.
+# Los generadores reciben el contexto como primer parametro; el estado del
+# run (manifest, indice de posts, imagenes, relacionados, pool de render)
+# tambien vive aqui.
+# Los ajustes por variable de entorno (OUTPUT_MINIFY, RENDER_WORKERS,
+# PAAPI_CACHE_PATH...) salen de ctx.env con setting(), no de os.environ al
+# importar: BuildContext(env={...}) controla el build entero.
+
+import os, json
+from urllib.parse import urlparse
+from automation import metrics, templates, catalog
+from automation.output import Output, MINIFY, PRECOMPRESS
+from automation.ratelimit import configure_rate_limit
+from automation.cache import CACHE_PATH, open_cache
+
+def clean_json(raw):
+    # JSON pegado a mano en un secret: sin ``` ni comillas tipograficas
+    s = raw.strip()
+    if s.startswith("```"):
+        s = s.lstrip("`"); nl = s.find("\n"); s = s[nl + 1:] if nl != -1 else s
+        if s.endswith("```"): s = s[:-3]
+    s = s.replace("“", "\"").replace("”", "\"").replace("‘", "\"").replace("’", "\"")
+    if s.count("\"") == 0 and "'" in s: s = s.replace("'", "\"")
+    return s
+
+def load_json_config(path, default, fill=True):
+    # config de fichero; si falta o no se puede leer, default. fill: las claves que falten salen de default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        try:
+            cfg = json.loads(raw)
+        except Exception:
+            cfg = json.loads(clean_json(raw))
+    except Exception:
+        cfg = default
+    for k, v in default.items() if fill else ():
+        cfg.setdefault(k, v)
+    return cfg
+
+def default_base_url(env):
+    # https://owner.github.io/repo/ en GitHub Actions
+    repo = env.get("GITHUB_REPOSITORY", "")
+    owner, _, name = repo.partition("/")
+    return f"https://{owner}.github.io/{name}/" if owner and name else ""
+
+class BuildContext:
+    def __init__(self, cfg, root="public", env=None, output=None):
+        self.cfg = cfg
+        self.env = os.environ if env is None else env
+        self.root = root
+        self.output = output or Output(root, self.setting("OUTPUT_MINIFY", MINIFY),
+                                       self.setting("OUTPUT_PRECOMPRESS", PRECOMPRESS))
+        self.base_url = cfg.get("base_url") or default_base_url(self.env)
+        path = urlparse(self.base_url).path or "/"
+        self.base_path = path if path.endswith("/") else path + "/"
+        # estado del run (lo rellena cada generador)
+        self.manifest = None
+        self.posts = None
+        self.schedule = None
+        self.images = None
+        self.related = None
+        self.render = None
+        self.titles = {}
+        self.config_s = None  # lo que tardo load_context(); start() lo apunta en las metricas del run
+
+    def setting(self, key, default):
+        # ajuste del entorno del build; vacio o ausente -> default, que tambien da el tipo
+        v = (self.env.get(key) or "").strip()
+        if not v:
+            return default
+        if isinstance(default, bool):
+            return v.lower() not in ("0", "false", "no")
+        return type(default)(v)
+
+    def start(self, name):
+        # Principio de un run: metricas desde cero y lo que es global al proceso (perfilado,
+        # bytecode Jinja, catalogo de respaldo, limitador de PA-API) con los ajustes de este contexto
+        metrics.start(name, self.setting("AUTONICHO_PROFILE", False),
+                      self.setting("AUTONICHO_PROFILE_DIR", metrics.PROFILE_DIR))
+        if self.config_s is not None:
+            metrics.observe("config", self.config_s); self.config_s = None
+        templates.use_cache_dir(self.setting("JINJA_CACHE_DIR", templates.JINJA_CACHE_DIR))
+        catalog.use(self.setting("FALLBACK_CATALOG_PATH", catalog.CATALOG_PATH))
+        configure_rate_limit(self.cfg, self.env)
+
+    def _cred(self, key, env_key):
+        # la config manda si trae la clave; si no, el entorno (secrets del workflow)
+        v = self.cfg[key] if key in self.cfg else self.env.get(env_key, "")
+        return (v or "").strip()
+
+    @property
+    def partner_tag(self):
+        return self._cred("amazon_partner_tag", "AMAZON_PARTNER_TAG")
+
+    @property
+    def access_key(self):
+        return self._cred("amazon_access_key", "AMAZON_ACCESS_KEY")
+
+    @property
+    def secret_key(self):
+        return self._cred("amazon_secret_key", "AMAZON_SECRET_KEY")
+
+    def has_keys(self):
+        return bool(self.access_key and self.secret_key)
+
+    def client(self):
+        from automation.paapi import get_client  # requests solo cuando hace falta
+        # PAAPI_CACHE=0 desactiva la cache en disco; PAAPI_CACHE_PATH cambia el fichero
+        cache = open_cache(self.setting("PAAPI_CACHE_PATH", CACHE_PATH)) if self.setting("PAAPI_CACHE", True) else None
+        return get_client(self.access_key, self.secret_key, self.partner_tag,
+                          self.setting("PAAPI_ENDPOINT", ""), cache)
+
+    def ensure_dirs(self, *subdirs):
+        for d in ("",) + subdirs:
+            os.makedirs(os.path.join(self.root, d), exist_ok=True)
+
+    def write(self, path, content, binary=False):
+        self.output.write(path, content, binary)
@@ -0,0 +1,91 @@
+# automation/dedupe.py
+# Deteccion de keywords casi duplicadas antes de gastar llamadas y posts.
+# 1) Normaliza: sin acentos, sin stopwords, plural -> singular, palabras ordenadas.
+#    "batería de litio 100ah camper" == "bateria litio camper 100ah".
+# 2) Las formas normalizadas distintas se comparan con MinHash (trigramas de
+#    caracteres de cada palabra) + LSH por bandas; los candidatos se confirman
+#    con Jaccard real >= THRESHOLD contra la raiz de cada grupo (union-find).
+#    Las cifras deben coincidir: "placa solar 100w" y "placa solar 200w" no son alias.
+# Cada grupo queda con una keyword canonica (la que elija prefer) y alias.
+# Con numpy (opcional) las firmas se calculan vectorizadas para todo el pool.
+
+import zlib, random
+from automation.related import tokens, optional_numpy
+
+NUM_PERM = 32
+BANDS = 8            # 8 bandas x 4 filas: candidato a partir de Jaccard ~0.6
+THRESHOLD = 0.75
+MAX_BUCKET = 200     # buckets enormes (firmas muy comunes) no generan pares
+
+_MASKS = [random.Random(f"minhash-{i}").getrandbits(32) for i in range(NUM_PERM)]
+
+def _singular(w):
+    if len(w) > 4 and w.endswith("es") and w[-3] in "rnldj":
+        return w[:-2]   # inversores -> inversor
+    if len(w) > 3 and w.endswith("s") and not w.endswith("ss") and not w[-2].isdigit():
+        return w[:-1]   # baterias -> bateria
+    return w
+
+def normalize(kw):
+    return " ".join(sorted({_singular(w) for w in tokens(kw)}))
+
+def shingles(norm):
+    out = set()
+    for w in norm.split():
+        w = f"^{w}$"
+        out.update(zlib.crc32(w[i:i + 3].encode("utf-8")) for i in range(max(1, len(w) - 2)))
+    return out
+
+def signatures(sets):
+    # MinHash con permutaciones XOR; mismo resultado con y sin numpy
+    np = optional_numpy()
+    if np is not None and sets:
+        sizes = np.array([len(s) for s in sets])
+        flat = np.fromiter((h for s in sets for h in s), dtype=np.uint32, count=int(sizes.sum()))
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        sig = np.stack([np.minimum.reduceat(flat ^ np.uint32(m), starts) for m in _MASKS], axis=1)
+        return [tuple(int(x) for x in row) for row in sig]
+    return [tuple(min(h ^ m for h in s) for m in _MASKS) for s in sets]
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def cluster(keywords, prefer=None, threshold=THRESHOLD):
+    # -> [[i_canonica, i_alias, ...]] (indices de keywords), en orden de la canonica
+    prefer = prefer or (lambda i: i)
+    by_norm = {}
+    for i, kw in enumerate(keywords):
+        by_norm.setdefault(normalize(kw), []).append(i)
+    norms = [n for n in by_norm if n]
+    sets = [shingles(n) for n in norms]
+    nums = [frozenset(w for w in n.split() if any(c.isdigit() for c in w)) for n in norms]
+    parent = list(range(len(norms)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]; x = parent[x]
+        return x
+
+    sigs = signatures(sets)
+    rows = NUM_PERM // BANDS
+    for b in range(BANDS):
+        buckets = {}
+        for j, sig in enumerate(sigs):
+            buckets.setdefault(sig[b * rows:(b + 1) * rows], []).append(j)
+        for members in buckets.values():
+            if len(members) < 2 or len(members) > MAX_BUCKET:
+                continue
+            for n, x in enumerate(members):
+                for y in members[:n]:
+                    # se compara con la raiz de cada grupo: A~B y B~C no arrastran C hasta A
+                    rx, ry = find(x), find(y)
+                    if rx != ry and nums[rx] == nums[ry] and _jaccard(sets[rx], sets[ry]) >= threshold:
+                        parent[max(rx, ry)] = min(rx, ry)
+    groups = {}
+    for j, n in enumerate(norms):
+        groups.setdefault(find(j), []).extend(by_norm[n])
+    if "" in by_norm:  # keywords sin palabras utiles: cada una la suya
+        for i in by_norm[""]:
+            groups[("", i)] = [i]
+    out = [sorted(g, key=prefer) for g in groups.values()]
+    return sorted(out, key=lambda g: prefer(g[0]))
@@ -2,48 +2,59 @@
 # - Publica home/categorías/posts con hero, cards y tabla de productos.
 # - Si PA-API responde: imágenes+precios reales. Si no: fallback con productos plausibles,
 #   rango de precios orientativo (legal) y CTAs a Amazon con tu tag (sin tabla vacía).
-# - Descarga imagen temática local (Unsplash). Si falla: placeholder local.
+# - Descarga imagen temática local (Unsplash, con cache). Si falla: placeholder SVG local.
 # - SEO técnico completo: Article/Product/FAQ/Breadcrumb schema, OG/Twitter, sitemap, robots.
-import os, re, json, time, hashlib, hmac, datetime, random
-from urllib.parse import quote, urlparse
-import requests
-from jinja2 import Template
+import os, re, json, time, random
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from automation.product import Product, iter_products
+from automation.manifest import BuildManifest, source_hash
+from automation.postindex import PostIndex, describe
+from automation import templates
+from automation.sitemap import SitemapWriter
+from automation.images import ImageCache, IMAGE_CACHE_DIR
+from automation.context import BuildContext, load_json_config, default_base_url
+from automation.render import RenderPool, RENDER_WORKERS
+from automation.related import RelatedIndex, RELATED_PATH
+from automation.dedupe import cluster
+from automation.scheduler import Scheduler
+from automation import metrics, clock, catalog, tables, sharding
 
 # --------- Config ----------
-CFG_PATH = os.environ.get("BOOTSTRAP_JSON_PATH","automation/bootstrap.json")
-REPO = os.environ.get("GITHUB_REPOSITORY","")
-OWNER = REPO.split("/")[0] if "/" in REPO else ""
-REPO_NAME = REPO.split("/")[1] if "/" in REPO else ""
-DEFAULT_BASE_URL = f"https://{OWNER}.github.io/{REPO_NAME}/" if OWNER and REPO_NAME else ""
-
-def ensure_dirs():
-    os.makedirs("public/static", exist_ok=True)
-    os.makedirs("public/assets", exist_ok=True)
-    os.makedirs("public/_logs", exist_ok=True)
-
-def write(path, content, binary=False):
-    path = os.path.join("public", path.lstrip("/"))
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
-        f.write(content)
+# Config, URL base y credenciales se cargan al crear el contexto (load_context), no al importar
+CFG_PATH = "automation/bootstrap.json"  # BOOTSTRAP_JSON_PATH la sustituye
+GENERATOR_VERSION = "2025-10-22"
+IMAGE_SOURCE = "https://source.unsplash.com"  # IMAGE_SOURCE_URL la sustituye (bench/fakeapi.py)
+
+def ensure_dirs(ctx):
+    ctx.ensure_dirs("static", "assets", "_logs")
+
+def emit(ctx, path, inputs, render, meta=None):
+    # Escribe path solo si sus entradas cambiaron desde el ultimo build. render() devuelve
+    # el contenido (str) o la pagina como datos (plantilla, contexto), que se renderiza en ctx.render;
+    # meta (titulo, descripcion...) se registra en el indice de posts
+    h=ctx.manifest.stale(path, inputs) if ctx.manifest is not None else ""
+    built=h is not None
+    if built:
+        page=render()
+        if isinstance(page, str): ctx.write(path, page)
+        elif ctx.render is not None: ctx.render.submit(path, *page)
+        else: ctx.write(path, templates.render(page[0], **page[1]))
+        if ctx.manifest is not None: ctx.manifest.done(path, h)
+    if meta is not None and ctx.posts is not None:
+        ctx.posts.upsert(path[:-len("index.html")], touched=built, **meta)
+    return built
+
 
 def slugify(s):
     s = re.sub(r"\s+"," ",s.strip().lower())
     s = re.sub(r"[^a-z0-9áéíóúñü\- ]","",s)
     return re.sub(r"-+","-",s.replace(" ","-")).strip("-")
 
-def _clean_json(raw):
-    s = raw.strip()
-    if s.startswith("```"):
-        s = s.lstrip("`"); nl = s.find("\n"); s = s[nl+1:] if nl!=-1 else s
-        if s.endswith("```"): s = s[:-3]
-    s = s.replace("“","\"").replace("”","\"").replace("‘","\"").replace("’","\"")
-    if s.count("\"")==0 and "'" in s: s=s.replace("'","\"")
-    return s
-
-def load_cfg():
+def load_cfg(path=None, env=None):
+    env = os.environ if env is None else env
     default = {
-        "site_title":"Accesorios Camper Pro","base_url":DEFAULT_BASE_URL,
+        "site_title":"Accesorios Camper Pro","base_url":default_base_url(env),
         "amazon_partner_tag":"tu-tag-21","amazon_access_key":"","amazon_secret_key":"",
         "auto_daily_new_posts":2,
         "categories":[
@@ -57,17 +68,13 @@ def load_cfg():
         "legal":{"disclosure":"Como Afiliados de Amazon, ganamos con compras que cumplen los requisitos.",
                   "privacy":"Usamos cookies y analítica.","terms":"Sin garantía; verifica con el fabricante."}
     }
-    try:
-        raw = open(CFG_PATH,"r",encoding="utf-8").read()
-        try: cfg = json.loads(raw)
-        except Exception: cfg = json.loads(_clean_json(raw))
-    except Exception: cfg = default
-    for k,v in default.items(): cfg.setdefault(k,v)
-    return cfg
+    return load_json_config(path or env.get("BOOTSTRAP_JSON_PATH", CFG_PATH), default)
 
-CFG = load_cfg()
-BASE_URL = CFG.get("base_url") or DEFAULT_BASE_URL
-BASE_PATH = (urlparse(BASE_URL).path or "/");  BASE_PATH += "" if BASE_PATH.endswith("/") else "/"
+def load_context(path=None, env=None):
+    t=time.perf_counter()
+    ctx=BuildContext(load_cfg(path, env), env=env)
+    ctx.config_s=time.perf_counter()-t  # etapa "config" del informe (ctx.start)
+    return ctx
 
 # --------- Estilos (skin revista) ----------
 STYLE = """
@@ -119,199 +126,67 @@ TAIL = """</main>
 <footer><div class="wrap"><p>{{ disclosure }}</p><p>© {{ year }} {{ site_title }} · Hecho con automatización.</p></div></footer>
 </body></html>"""
 
-INDEX_TMPL = Template("""{{ head }}
-<section class="hero">
-  <h1>{{ site_title }}</h1>
-  <p class="muted">Guías y comparativas para camper · Publicación diaria automática.</p>
-</section>
-<section class="grid">
-{% for cat in cats %}
-<a class="card" href="{{ root }}{{ cat.slug }}/">
-  <img class="img" src="https://source.unsplash.com/800x450/?camper,{{ cat.slug }}" alt="{{ cat.title }}">
-  <div class="card-body"><span class="badge">Categoría</span><h2>{{ cat.title }}</h2><p class="muted">{{ cat.desc }}</p></div>
-</a>
-{% endfor %}
-</section>
-<section><h2>Últimas publicaciones</h2>
-<ul class="posts">{% for slug, title, date in recent %}<li><a href="{{ root }}{{ slug }}/">{{ title }}</a><span class="muted"> · {{ date }}</span></li>{% endfor %}</ul>
-</section>
-{{ tail }}""")
-
-CAT_TMPL = Template("""{{ head }}
-<h1>{{ h1 }}</h1><p class="muted">{{ intro }}</p>
-<table class="table"><thead><tr><th>Producto</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>{{ rows|safe }}</tbody></table>
-{{ tail }}""")
-
-POST_TMPL = Template("""{{ head }}
-<article class="post">
-<h1>{{ h1 }}</h1><p class="muted">Actualizado {{ updated }}</p>
-{% if image %}<figure class="pimg"><img src="{{ image }}" alt="{{ h1 }}" loading="lazy"></figure>{% endif %}
-<p>{{ intro }}</p>
-<div class="kv">
-  <div><strong>Tipo recomendado:</strong> {{ tipo }}</div>
-  <div><strong>Rango de precio:</strong> {{ rango_precio }}</div>
-  <div><strong>Perfil de uso:</strong> {{ perfil }}</div>
-  <div><strong>Nuestro criterio:</strong> {{ criterio }}</div>
-</div>
-{{ table }}
-
-<section><h2>Los mejores {{ h1|lower }}</h2>
-{% for b in bloques %}<h3>{{ b.titulo }}</h3><p>{{ b.texto }}</p>{% endfor %}
-</section>
-
-<section><h2>Cómo elegir {{ h1|lower }}</h2>
-<p>{{ buyer_intro }}</p>
-<ul>{% for t in tips %}<li>{{ t }}</li>{% endfor %}</ul>
-
-<h3>Pros y contras</h3>
-<ul><li><strong>Ventajas:</strong> {{ pros }}</li><li><strong>Inconvenientes:</strong> {{ contras }}</li></ul>
-</section>
-
-<section><h2>Preguntas frecuentes</h2>
-{% for q,a in faqs %}<h3>{{ q }}</h3><p>{{ a }}</p>{% endfor %}
-</section>
-
-<nav class="muted"><p>También puede interesarte: {% for s,t in related %}<a href="{{ root }}{{ s }}/">{{ t }}</a>{% if not loop.last %} · {% endif %}{% endfor %}</p></nav>
-</article>
-{% if product_ld %}<script type="application/ld+json">{{ product_ld|safe }}</script>{% endif %}
-{% if faq_ld %}<script type="application/ld+json">{{ faq_ld|safe }}</script>{% endif %}
-{{ tail }}""")
-
-PAGE_TMPL = Template("""{{ head }}<article class="page"><h1>{{ h1 }}</h1>{{ body|safe }}</article>{{ tail }}""")
-
-def head_meta(title, desc, canonical, root, site_title):
-    return Template(BASE_HEAD).render(title_tag=title, meta_description=desc, canonical=canonical,
-                                      root=root, site_title=site_title)
-
-def tail_meta(disclosure, site_title):
-    return Template(TAIL).render(disclosure=disclosure, year=datetime.datetime.utcnow().year, site_title=site_title)
-
 # --------- Amazon PA-API (opcional) ----------
-AWS_REGION="eu-west-1"; HOST="webservices.amazon.es"; SERVICE="ProductAdvertisingAPI"
-def _sign(key,msg): return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
-def _sig_key(key,dateStamp,regionName,serviceName):
-    kDate=_sign(("AWS4"+key).encode("utf-8"),dateStamp)
-    kRegion=_sign(kDate,regionName); kService=_sign(kRegion,serviceName)
-    return _sign(kService,"aws4_request")
-
-def _pa_call(path,payload,amz_target,access_key,secret_key):
-    if not access_key or not secret_key: raise RuntimeError("PA-API keys missing")
-    now=datetime.datetime.utcnow(); amz_date=now.strftime("%Y%m%dT%H%M%SZ"); date_stamp=now.strftime("%Y%m%d")
-    body=json.dumps(payload, separators=(',',':'))
-    canonical_headers=("content-encoding:amz-1.0\ncontent-type:application/json; charset=utf-8\n"+
-                       f"host:{HOST}\n"+"x-amz-date:"+amz_date+"\n"+"x-amz-target:"+amz_target+"\n")
-    signed_headers="content-encoding;content-type;host;x-amz-date;x-amz-target"
-    payload_hash=hashlib.sha256(body.encode("utf-8")).hexdigest()
-    canonical_request=f"POST\n{path}\n\n{canonical_headers}\n{signed_headers}\n{payload_hash}"
-    algorithm="AWS4-HMAC-SHA256"; scope=f"{date_stamp}/{AWS_REGION}/{SERVICE}/aws4_request"
-    string_to_sign=f"{algorithm}\n{amz_date}\n{scope}\n{hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()}"
-    signing_key=_sig_key(secret_key,date_stamp,AWS_REGION,SERVICE)
-    signature=hmac.new(signing_key,string_to_sign.encode("utf-8"),hashlib.sha256).hexdigest()
-    headers={"content-encoding":"amz-1.0","content-type":"application/json; charset=utf-8",
-             "x-amz-date":amz_date,"x-amz-target":amz_target,
-             "Authorization":f"{algorithm} Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}",
-             "Accept":"application/json"}
-    r=requests.post(f"https://{HOST}{path}", data=body, headers=headers, timeout=30)
-    if r.status_code>=400: raise RuntimeError(f"PA-API {r.status_code}: {r.text[:180]}")
-    return r.json()
-
-def pa_search(tag, kw, access, secret, count=10):
-    payload={"Keywords":kw,"SearchIndex":"All","ItemCount":count,"PartnerTag":tag,"PartnerType":"Associates",
-             "Resources":["Images.Primary.Medium","ItemInfo.Title","ItemInfo.Features","Offers.Listings.Price","Offers.Listings.Availability"]}
-    target="com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems"
-    return _pa_call("/paapi5/searchitems", payload, target, access, secret)
+def pa_search(ctx, kw, count=10):
+    # -> [Product]; de la respuesta cruda no se guarda nada
+    return list(iter_products(ctx.client().search_items(kw, item_count=count)))
 
 # --------- Fallback de productos (sin PA-API) ----------
-PRICE_PRESETS = {
-    "nevera 12v": (120, 600),
-    "ventilador 12v": (15, 120),
-    "bateria litio": (250, 900),
-    "bateria agm": (90, 250),
-    "inversor": (80, 450),
-    "placa solar": (70, 300),
-    "regulador mppt": (30, 200),
-    "calefaccion estacionaria": (120, 1200),
-    "aislante termico": (15, 150)
-}
-
+# rangos, variantes y etiquetas por nicho: automation/fallback_catalog.json (automation/catalog.py)
 def price_range_for(kw):
-    k = kw.lower()
-    for key,(a,b) in PRICE_PRESETS.items():
-        if key in k: return f"€{a}–€{b}"
-    return "€20–€500"
+    a,b = catalog.lookup(kw)["price"]
+    return f"€{a}–€{b}"
 
 def gen_variants(kw):
-    k = kw.lower()
-    out=[]
-    if "nevera" in k:
-        caps=[25,35,45,55,65,75]
-        for c in caps:
-            out.append({
-                "name": f"Nevera 12V {c}L compresor",
-                "features":[f"Capacidad {c} L","Compresor eficiente","<55 dB","Bajo consumo (ECO)"],
-            })
-    elif "bateria" in k:
-        tipos=["LiFePO4 100Ah","AGM 100Ah","LiFePO4 200Ah","Gel 100Ah","AGM 120Ah","LiFePO4 150Ah"]
-        for t in tipos:
-            out.append({"name": f"Batería {t} para camper","features":["Ciclos altos","Protección BMS","Apta para inversor"]})
-    elif "inversor" in k:
-        pot=[600,1000,1500,2000,3000]
-        for p in pot: out.append({"name": f"Inversor onda pura {p}W","features":[f"Potencia continua {p}W","Pico x2","Protecciones térmicas"]})
-    elif "placa solar" in k:
-        for w in [100,150,200,300]:
-            out.append({"name": f"Placa solar {w}W monocristalina","features":[f"Salida {w} W","Marco aluminio","Conectores MC4"]})
-    elif "ventilador" in k:
-        for s in [12,5,9,8,7,6]:
-            out.append({"name": f"Ventilador 12V {s}''", "features":["Silencioso","Pinza + sobremesa","Ajuste 360º"]})
-    else:
-        for i in range(6):
-            out.append({"name": f"{kw.title()} – Modelo {i+1}","features":["Diseño compacto","Buena relación calidad/precio"]})
-    return out[:6]
-
-def availability_guess():
-    return random.choice(["Alta","Media","Baja"])
+    return catalog.lookup(kw)["variants"]
+
+# Columnas de las tablas (la plantilla de categoría pone su propia cabecera)
+PRODUCT_LAYOUT = tables.Layout([
+    tables.Column("Producto", tables.product_cell(bullets=4, ul_class="muted", image=True)),
+    tables.Column("Precio", tables.price_cell),
+    tables.Column("Disponibilidad", tables.avail_cell),
+    tables.Column("", tables.button_cell("Comprar")),
+], "table")
+FALLBACK_LAYOUT = PRODUCT_LAYOUT._replace(columns=[
+    tables.Column("Producto", tables.product_cell(bullets=4, ul_class="muted")),
+    *PRODUCT_LAYOUT.columns[1:3],
+    tables.Column("", tables.button_cell("Ver opciones")),
+])
+FALLBACK_NOTE = "*Rango orientativo, consulta el precio actualizado en Amazon."
+
+def availability_guess(rng):
+    return rng.choice(["Alta","Media","Baja"])
 
 def fallback_rows(kw, tag):
     rango = price_range_for(kw)
-    rows=[]
-    for v in gen_variants(kw):
-        feats = "<ul class='muted'>"+"".join([f"<li>{re.sub('<.*?>','',f)}</li>" for f in v["features"][:4]])+"</ul>"
-        link = f"https://www.amazon.es/s?k={quote(v['name'])}&tag={tag}"
-        rows.append(
-            f"<tr><td><div><strong>{v['name']}</strong>{feats}</div></td>"
-            f"<td><span class='bb-price'>{rango}*</span></td>"
-            f"<td>{availability_guess()}</td>"
-            f"<td><a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{link}'>Ver opciones</a></td></tr>"
-        )
-    rows.append("<tr><td colspan='4' class='muted'>*Rango orientativo, consulta el precio actualizado en Amazon.</td></tr>")
-    return "\n".join(rows)
+    rng = random.Random(slugify(kw))  # por slug: misma salida en cada build, secuencial o concurrente
+    return [Product("", v["name"], tuple(v["features"]), price=f"{rango}*", availability=availability_guess(rng))
+            for v in gen_variants(kw)]
 
 # --------- Utilidades de imagen ---------
-def save_image(url, dst):
-    try:
-        r = requests.get(url, timeout=20)
-        if r.status_code==200 and r.content:
-            write(dst, r.content, binary=True);  return True
-    except Exception: pass
-    return False
-
-def post_image_for(keyword, slug):
-    local = f"assets/{slug}.jpg"
-    # Unsplash temática
-    url = f"https://source.unsplash.com/1000x600/?{quote('camper van,'+keyword)}"
-    if save_image(url, local): return f"{BASE_PATH}{local}"
-    # Placeholder seguro
-    ph = f"https://placehold.co/1000x600/161616/FFFFFF?text={quote(keyword.title())}"
-    if save_image(ph, local): return f"{BASE_PATH}{local}"
-    return ""
+def post_image_url(ctx, keyword):
+    return f"{ctx.env.get('IMAGE_SOURCE_URL', IMAGE_SOURCE)}/1000x600/?{quote('camper van,'+keyword)}"
+
+def publish_image(ctx, images, entry):
+    # assets/<hash>.<ext>: imágenes idénticas comparten un único fichero
+    local=f"assets/{entry['sha'][:16]}.{entry['ext']}"
+    if not os.path.exists(os.path.join(ctx.root,local)):
+        ctx.write(local, images.read(entry), binary=True)
+    return f"{ctx.base_path}{local}"
+
+def post_image_for(ctx, keyword):
+    images = ctx.images or ImageCache(ctx.setting("IMAGE_CACHE_DIR", IMAGE_CACHE_DIR))
+    # Unsplash temática (cacheada); sin red, placeholder SVG generado en local
+    entry = images.fetch(post_image_url(ctx, keyword)) or images.placeholder(keyword.title())
+    return publish_image(ctx, images, entry)
 
 # --------- Structured data ----------
-def product_ld(name, url, img, price):
+def product_ld(name, url, p):
     data={"@context":"https://schema.org","@type":"Product","name":name}
     if url: data["url"]=url
-    if img: data["image"]=img
-    if price and isinstance(price,str) and price not in ("Consultar","-"):
-        data["offers"]={"@type":"Offer","price":re.sub(r"[^0-9,\.]","",price).replace(",","."),"priceCurrency":"EUR","availability":"https://schema.org/InStock"}
+    if p.image: data["image"]=p.image
+    if p.amount is not None:
+        data["offers"]={"@type":"Offer","price":f"{p.amount:.2f}","priceCurrency":p.currency or "EUR","availability":"https://schema.org/InStock"}
     return json.dumps(data, ensure_ascii=False)
 
 def faq_ld_from_list(faqs):
@@ -321,7 +196,7 @@ def faq_ld_from_list(faqs):
     }, ensure_ascii=False)
 
 # --------- Páginas estáticas ----------
-INDEX_TMPL = Template("""{{ head }}
+INDEX_TMPL = """{{ head|safe }}
 <section class="hero"><h1>{{ site_title }}</h1><p class="muted">Guías y comparativas para camper · Publicación diaria automática.</p></section>
 <section class="grid">{% for cat in cats %}
 <a class="card" href="{{ root }}{{ cat.slug }}/">
@@ -330,14 +205,14 @@ INDEX_TMPL = Template("""{{ head }}
 </a>{% endfor %}</section>
 <section><h2>Últimas publicaciones</h2>
 <ul class="posts">{% for slug, title, date in recent %}<li><a href="{{ root }}{{ slug }}/">{{ title }}</a><span class="muted"> · {{ date }}</span></li>{% endfor %}</ul></section>
-{{ tail }}""")
+{{ tail|safe }}"""
 
-CAT_TMPL = Template("""{{ head }}
+CAT_TMPL = """{{ head|safe }}
 <h1>{{ h1 }}</h1><p class="muted">{{ intro }}</p>
 <table class="table"><thead><tr><th>Producto</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>{{ rows|safe }}</tbody></table>
-{{ tail }}""")
+{{ tail|safe }}"""
 
-POST_TMPL = Template("""{{ head }}
+POST_TMPL = """{{ head|safe }}
 <article class="post">
 <h1>{{ h1 }}</h1><p class="muted">Actualizado {{ updated }}</p>
 {% if image %}<figure class="pimg"><img src="{{ image }}" alt="{{ h1 }}" loading="lazy"></figure>{% endif %}
@@ -348,7 +223,7 @@ POST_TMPL = Template("""{{ head }}
   <div><strong>Perfil de uso:</strong> {{ perfil }}</div>
   <div><strong>Nuestro criterio:</strong> {{ criterio }}</div>
 </div>
-{{ table }}
+{{ table|safe }}
 
 <section><h2>Los mejores {{ h1|lower }}</h2>
 {% for b in bloques %}<h3>{{ b.titulo }}</h3><p>{{ b.texto }}</p>{% endfor %}
@@ -370,120 +245,116 @@ POST_TMPL = Template("""{{ head }}
 </article>
 {% if product_ld %}<script type="application/ld+json">{{ product_ld|safe }}</script>{% endif %}
 {% if faq_ld %}<script type="application/ld+json">{{ faq_ld|safe }}</script>{% endif %}
-{{ tail }}""")
+{{ tail|safe }}"""
+
+PAGE_TMPL = """{{ head|safe }}<article class="page"><h1>{{ h1 }}</h1>{{ body|safe }}</article>{{ tail|safe }}"""
+
+REDIRECT_TMPL = """<!doctype html><html lang="es"><head><meta charset="utf-8"><title>{{ title }}</title>
+<link rel="canonical" href="{{ canonical }}"><meta name="robots" content="noindex">
+<meta http-equiv="refresh" content="0; url={{ url }}"></head>
+<body><p><a href="{{ url }}">{{ title }}</a></p></body></html>"""
 
-PAGE_TMPL = Template("""{{ head }}<article class="page"><h1>{{ h1 }}</h1>{{ body|safe }}</article>{{ tail }}""")
+templates.register("autodiscover", {
+    "head.html": BASE_HEAD, "tail.html": TAIL, "index.html": INDEX_TMPL,
+    "category.html": CAT_TMPL, "post.html": POST_TMPL, "page.html": PAGE_TMPL, "redirect.html": REDIRECT_TMPL,
+})
 
 def head_meta(title, desc, canonical, root, site_title):
-    return Template(BASE_HEAD).render(title_tag=title, meta_description=desc, canonical=canonical,
-                                      root=root, site_title=site_title)
+    return templates.render("autodiscover/head.html", title_tag=title, meta_description=desc, canonical=canonical,
+                            root=root, site_title=site_title)
 
 def tail_meta(disclosure, site_title):
-    return Template(TAIL).render(disclosure=disclosure, year=datetime.datetime.utcnow().year, site_title=site_title)
-
-def list_slugs():
-    out=[]
-    for root,_,files in os.walk("public"):
-        if "index.html" in files:
-            slug=root.replace("public","").strip("/")
-            out.append(slug)
-    return sorted(out)
-
-def write_static_pages(cfg):
-    write("static/style.css", STYLE)
-    head=head_meta(cfg["about"]["title"], "Información del proyecto", BASE_URL+"sobre/" if BASE_URL else "", BASE_PATH, cfg["site_title"])
+    return templates.render("autodiscover/tail.html", disclosure=disclosure, year=clock.now().year, site_title=site_title)
+
+def write_static_pages(ctx):
+    cfg=ctx.cfg
+    emit(ctx, "static/style.css", STYLE, lambda: STYLE)
+    year=clock.now().year
+    base=[cfg["site_title"], cfg["legal"], ctx.base_url, ctx.base_path, year]
+    def page(path, title, desc, url, h1, body):
+        def render():
+            head=head_meta(title, desc, ctx.base_url+url if ctx.base_url else "", ctx.base_path, cfg["site_title"])
+            return "autodiscover/page.html", dict(head=head, h1=h1, body=body, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"]))
+        emit(ctx, path, base+[title, desc, h1, body], render, meta={"title":h1, "description":desc, "kind":"page"})
     body=f"<p>{cfg['about']['body']}</p><p><em>{cfg['legal']['disclosure']}</em></p>"
-    write("sobre/index.html", PAGE_TMPL.render(head=head, h1=cfg["about"]["title"], body=body, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"])))
-    head=head_meta("Contacto", "Cómo contactar", BASE_URL+"contacto/" if BASE_URL else "", BASE_PATH, cfg["site_title"])
+    page("sobre/index.html", cfg["about"]["title"], "Información del proyecto", "sobre/", cfg["about"]["title"], body)
     body=f"<p>Escríbenos a <a href='mailto:{cfg['contact']['email']}'>{cfg['contact']['email']}</a>.</p>"
-    write("contacto/index.html", PAGE_TMPL.render(head=head, h1="Contacto", body=body, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"])))
-    head=head_meta("Información legal", "Política y términos", BASE_URL+"legal/" if BASE_URL else "", BASE_PATH, cfg["site_title"])
+    page("contacto/index.html", "Contacto", "Cómo contactar", "contacto/", "Contacto", body)
     body=f"<h2>Aviso de afiliación</h2><p>{cfg['legal']['disclosure']}</p><h2>Privacidad</h2><p>{cfg['legal']['privacy']}</p><h2>Términos</h2><p>{cfg['legal']['terms']}</p>"
-    write("legal/index.html", PAGE_TMPL.render(head=head, h1="Información legal", body=body, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"])))
-
-def write_home(cfg, recent):
-    cats=[type("C",(),{"slug":c["slug"],"title":c["title"],"desc": (c["keywords"][0] if c.get("keywords") else "")}) for c in cfg["categories"]]
-    head=head_meta(cfg["site_title"], "Guías y comparativas camper", BASE_URL if BASE_URL else "", BASE_PATH, cfg["site_title"])
-    html=INDEX_TMPL.render(head=head, cats=cats, root=BASE_PATH, site_title=cfg["site_title"], recent=recent, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"]))
-    write("index.html", html)
-
-def write_sitemap_and_robots(base_url):
-    urls=[]; today=datetime.datetime.utcnow().strftime("%Y-%m-%d")
-    for slug in list_slugs():
-        urls.append((base_url.rstrip("/") + ("/" if not slug else f"/{slug}/")) if base_url else ("/" if not slug else f"/{slug}/"))
-    sm=["<?xml version='1.0' encoding='UTF-8'?>","<urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>"]
-    sm+= [f"<url><loc>{u}</loc><lastmod>{today}</lastmod><changefreq>weekly</changefreq><priority>0.6</priority></url>" for u in urls]
-    sm.append("</urlset>")
-    write("sitemap.xml","\n".join(sm))
-    write("robots.txt", f"User-agent: *\nAllow: /\nSitemap: {(base_url.rstrip('/')+'/sitemap.xml') if base_url else '/sitemap.xml'}")
+    page("legal/index.html", "Información legal", "Política y términos", "legal/", "Información legal", body)
+
+def write_sitemap_and_robots(ctx):
+    # lastmod real: fecha de la ultima vez que se reescribio cada pagina (indice de posts)
+    posts=ctx.posts or PostIndex(); base_url=ctx.base_url
+    sm=SitemapWriter(ctx.output, base_url)
+    for slug in posts.slugs():
+        if posts.get(slug).get("kind")=="redirect": continue
+        sm.add((base_url.rstrip("/") + ("/" if not slug else f"/{slug}/")) if base_url else ("/" if not slug else f"/{slug}/"),
+               lastmod=posts.get(slug).get("updated"))
+    sm.close()
+    robots=f"User-agent: *\nAllow: /\nSitemap: {(base_url.rstrip('/')+'/sitemap.xml') if base_url else '/sitemap.xml'}"
+    emit(ctx, "robots.txt", robots, lambda: robots)
 
 # --------- Construcción de categoría -------
-def build_category(cfg, cat):
-    tag=cfg["amazon_partner_tag"]; access=cfg["amazon_access_key"]; secret=cfg["amazon_secret_key"]
+def build_category(ctx, cat):
+    cfg=ctx.cfg; tag=ctx.partner_tag
     items=[]; rows=""
-    if access and secret:
+    if ctx.has_keys():
         for kw in cat.get("keywords",[])[:3]:
             try:
-                r=pa_search(tag, kw, access, secret, count=6)
-                items += r.get("ItemsResult",{}).get("Items",[])
-                time.sleep(0.4)
+                items += pa_search(ctx, kw, count=6)
             except Exception as e:
-                write("_logs/paapi_last_error.txt", f"{datetime.datetime.utcnow()}: {e}")
+                metrics.error("paapi", e, keyword=kw, category=cat["slug"])
     # dedup
     seen=set(); uniq=[]
-    for it in items:
-        a=it.get("ASIN")
-        if a and a not in seen: uniq.append(it); seen.add(a)
+    for p in items:
+        if p.asin not in seen: uniq.append(p); seen.add(p.asin)
     items=uniq[:12]
     if items:
         rows = product_table(items, tag=tag)
     else:
         # Fallback a primera keyword (tabla nunca vacía)
         seed = (cat.get("keywords") or ["producto camper"])[0]
-        rows = fallback_rows(seed, tag)
+        rows = tables.render_rows(fallback_rows(seed, tag), FALLBACK_LAYOUT, tag, FALLBACK_NOTE); metrics.incr("fallback_tables")
     h1=cat["title"]; intro="Selección automática con datos de Amazon (si API activa)."
-    head=head_meta(h1, f"Comparativa de {h1}", BASE_URL+cat["slug"]+"/" if BASE_URL else "", BASE_PATH, CFG["site_title"])
-    html=CAT_TMPL.render(head=head, h1=h1, intro=intro, rows=rows, tail=tail_meta(CFG["legal"]["disclosure"], CFG["site_title"]))
-    write(f"{cat['slug']}/index.html", html)
+    def render():
+        head=head_meta(h1, f"Comparativa de {h1}", ctx.base_url+cat["slug"]+"/" if ctx.base_url else "", ctx.base_path, cfg["site_title"])
+        return "autodiscover/category.html", dict(head=head, h1=h1, intro=intro, rows=rows, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"]))
+    emit(ctx, f"{cat['slug']}/index.html",
+         [cat, rows, cfg["site_title"], cfg["legal"]["disclosure"], ctx.base_url, ctx.base_path, clock.now().year], render,
+         meta={"title":h1, "description":intro, "category":cat["slug"], "kind":"category"})
 
 # --------- Redacción SEO programática -------
-def write_post_from_keyword(cfg, cat_slug, kw):
-    tag=cfg["amazon_partner_tag"]; access=cfg["amazon_access_key"]; secret=cfg["amazon_secret_key"]
+def write_post_from_keyword(ctx, cat_slug, kw):
+    cfg=ctx.cfg; tag=ctx.partner_tag
     slug=f"{cat_slug}/{slugify(kw)}"; h1=kw.title()
 
     # Imagen local (nunca rota)
-    image = post_image_for(kw, slug.replace("/","-"))
+    image = post_image_for(ctx, kw)
 
     # Tabla (real si hay PA-API; si no, fallback plausible)
-    product_json_ld = ""; table_html = ""
-    if access and secret:
+    product_json_ld = ""; table_html = ""; prices=None; error=False
+    if ctx.has_keys():
         try:
-            r=pa_search(tag, kw, access, secret, count=6)
-            items=r.get("ItemsResult",{}).get("Items",[])
+            items=pa_search(ctx, kw, count=6)
+            prices=[(p.asin, p.amount, p.availability) for p in items]
             if items:
-                table_html="<table class='table'><thead><tr><th>Producto</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>"+product_table(items, tag)+"</tbody></table>"
-                it=items[0]; link=f"https://www.amazon.es/dp/{it.get('ASIN','')}?tag={tag}"
-                price=it.get("Offers",{}).get("Listings",[{}])[0].get("Price",{}).get("DisplayAmount")
-                img=it.get("Images",{}).get("Primary",{}).get("Medium",{}).get("URL","")
-                product_json_ld = product_ld(h1, link, img, price)
+                table_html=tables.render_table(items, PRODUCT_LAYOUT, tag)
+                product_json_ld = product_ld(h1, tables.product_link(items[0].asin, tag), items[0])
         except Exception as e:
-            write("_logs/paapi_last_error.txt", f"{datetime.datetime.utcnow()}: {e}")
+            metrics.error("paapi", e, keyword=kw, category=cat_slug); error=True
 
     if not table_html:
-        table_html="<table class='table'><thead><tr><th>Producto</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>"+fallback_rows(kw, tag)+"</tbody></table>"
+        metrics.incr("fallback_tables")
+        table_html=tables.render_table(fallback_rows(kw, tag), FALLBACK_LAYOUT, tag, FALLBACK_NOTE)
 
     # Redacción SEO (≈900–1200 palabras)
     rango = price_range_for(kw)
     intro = (f"En esta guía reunimos los mejores {h1.lower()} para furgoneta camper. "
              f"La selección se actualiza a diario. Los precios mostrados son "
              f"orientativos ({rango}); pulsa en «Ver opciones» para ver el importe exacto y disponibilidad en Amazon.")
-    tipo = ("Compresor" if "nevera" in kw.lower() else
-            "LiFePO4" if "bateria" in kw.lower() else
-            "Onda pura" if "inversor" in kw.lower() else "Recomendación general")
-    perfil = ("Viajes de varios días y autonomía sin camping" if "nevera" in kw.lower()
-              else "Instalaciones de 12 V exigentes" if "bateria" in kw.lower()
-              else "Uso con electrónica sensible" if "inversor" in kw.lower()
-              else "Uso habitual en furgonetas camper")
+    preset = catalog.lookup(kw)
+    tipo, perfil = preset["tipo"], preset["perfil"]
     criterio = "Fiabilidad, consumo y reputación del fabricante"
 
     # Bloques “Los mejores…”
@@ -492,9 +363,9 @@ def write_post_from_keyword(cfg, cat_slug, kw):
     for v in variantes[:4]:
         t = (f"{v['name']} — por qué nos gusta")
         txt = (f"{v['name']} destaca por su relación entre prestaciones y consumo. "
-               f"Entre sus puntos fuertes: {', '.join([re.sub('<.*?>','',x) for x in v['features'][:3]])}. "
+               f"Entre sus puntos fuertes: {', '.join([tables.strip_tags(x) for x in v['features'][:3]])}. "
                f"Si buscas una opción equilibrada dentro del rango {rango}, es una apuesta segura.")
-        bloques.append(type("B",(),{"titulo":t,"texto":txt}))
+        bloques.append({"titulo":t,"texto":txt})
 
     buyer_intro = (f"A la hora de elegir {h1.lower()}, piensa en el uso real y en la energía disponible. "
                    f"Un modelo sobredimensionado encarece y gasta más; uno justo se quedará corto en verano o en rutas largas.")
@@ -518,80 +389,242 @@ def write_post_from_keyword(cfg, cat_slug, kw):
     ]
     faq_json_ld = faq_ld_from_list(faqs)
 
-    # Relacionados (simple)
-    related=[]
-    for c in cfg["categories"]:
-        for k in c.get("keywords",[])[:1]:
-            s=f"{c['slug']}/{slugify(k)}"
-            if s!=slug: related.append((s, k.title()))
-        if len(related)>=3: break
-
-    head=head_meta(h1, f"Guía y comparativa de {h1}", BASE_URL+slug+"/" if BASE_URL else "", BASE_PATH, CFG["site_title"])
-    html = POST_TMPL.render(
-    head=head, h1=h1, updated=datetime.datetime.utcnow().strftime("%Y-%m-%d"),
+    # Relacionados: vecinos por similitud (tabla precalculada); sin tabla, primera keyword de cada categoría
+    related=[(s, ctx.titles[s]) for s in ctx.related.related(slug, 3) if s in ctx.titles] if ctx.related is not None else []
+    if not related:
+        for c in cfg["categories"]:
+            for k in c.get("keywords",[])[:1]:
+                s=f"{c['slug']}/{slugify(k)}"
+                if s!=slug: related.append((s, k.title()))
+            if len(related)>=3: break
+
+    head=head_meta(h1, f"Guía y comparativa de {h1}", ctx.base_url+slug+"/" if ctx.base_url else "", ctx.base_path, cfg["site_title"])
+    html = lambda: ("autodiscover/post.html", dict(
+    head=head, h1=h1, updated=clock.today(),
     image=image, intro=intro, tipo=tipo, rango_precio=rango, perfil=perfil, criterio=criterio,
     table=table_html, bloques=bloques, buyer_intro=buyer_intro, tips=tips,
     pros=pros, contras=contras, faqs=faqs, related=related,
     product_ld=product_json_ld, faq_ld=faq_json_ld,
-    root=BASE_PATH, tail=tail_meta(CFG["legal"]["disclosure"], CFG["site_title"])
-)
-
-    write(f"{slug}/index.html", html)
+    root=ctx.base_path, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"])
+))
+
+    # sin la fecha en las entradas: "actualizado" solo cambia cuando cambia el contenido
+    emit(ctx, f"{slug}/index.html", [head, table_html, image, related, cfg["legal"]["disclosure"], clock.now().year], html,
+         meta={"title":h1, "description":describe(intro), "category":cat_slug, "kind":"post"})
+    if ctx.schedule is not None:
+        ctx.schedule.record(slug, page_weight(cfg, cat_slug, kw), prices, error)
     return slug, h1
 
 # --------- Construcción global ----------
 def product_table(items, tag):
-    rows=[]
-    for it in items:
-        asin=it.get("ASIN","")
-        title=(it.get("ItemInfo",{}).get("Title",{}).get("DisplayValue") or asin).strip()
-        feats=it.get("ItemInfo",{}).get("Features",{}).get("DisplayValues") or []
-        bullets="<ul class='muted'>"+"".join([f"<li>{re.sub('<.*?>','',b)}</li>" for b in feats[:4]])+"</ul>" if feats else ""
-        price=it.get("Offers",{}).get("Listings",[{}])[0].get("Price",{}).get("DisplayAmount","Consultar")
-        avail=it.get("Offers",{}).get("Listings",[{}])[0].get("Availability",{}).get("Message","")
-        img=it.get("Images",{}).get("Primary",{}).get("Medium",{}).get("URL","")
-        link=f"https://www.amazon.es/dp/{asin}?tag={tag}"
-        img_html=(f'<img src="{img}" alt="{title}" width="64" height="64" loading="lazy" style="border-radius:8px;border:1px solid #2a2a2a">' if img else "")
-        card="<div style='display:flex;gap:10px;align-items:flex-start'>"+img_html+f"<div><strong>{title}</strong>{bullets}</div></div>"
-        rows.append(f"<tr><td>{card}</td><td><span class='bb-price'>{price}</span></td><td>{avail}</td><td><a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{link}'>Comprar</a></td></tr>")
-    return "\n".join(rows) if rows else ""
-
-def write_home(cfg, recent):
-    cats=[type("C",(),{"slug":c["slug"],"title":c["title"],"desc": (c["keywords"][0] if c.get("keywords") else "")}) for c in cfg["categories"]]
-    head=head_meta(cfg["site_title"], "Guías y comparativas camper", BASE_URL if BASE_URL else "", BASE_PATH, cfg["site_title"])
-    html=INDEX_TMPL.render(head=head, cats=cats, root=BASE_PATH, site_title=cfg["site_title"], recent=recent, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"]))
-    write("index.html", html)
-
-def run_autodiscover(cfg):
-    # Home + categorías
-    recent=[]
-    for cat in cfg["categories"]:
-        build_category(cfg, cat)
-    # Posts diarios
-    n=int(cfg.get("auto_daily_new_posts",1))
-    random.seed(datetime.datetime.utcnow().strftime("%Y%m%d"))
-    pool=[(c["slug"],kw) for c in cfg["categories"] for kw in c.get("keywords",[])]
-    random.shuffle(pool)
-    created=0
+    return tables.render_rows(items, PRODUCT_LAYOUT, tag)
+
+def write_home(ctx, recent):
+    cfg=ctx.cfg
+    cats=[{"slug":c["slug"],"title":c["title"],"desc": (c["keywords"][0] if c.get("keywords") else "")} for c in cfg["categories"]]
+    head=head_meta(cfg["site_title"], "Guías y comparativas camper", ctx.base_url if ctx.base_url else "", ctx.base_path, cfg["site_title"])
+    render=lambda: ("autodiscover/index.html", dict(head=head, cats=cats, root=ctx.base_path, site_title=cfg["site_title"], recent=recent, tail=tail_meta(cfg["legal"]["disclosure"], cfg["site_title"])))
+    emit(ctx, "index.html", [head, cfg["categories"], recent, cfg["legal"]["disclosure"], clock.now().year], render,
+         meta={"title":cfg["site_title"], "description":"Guías y comparativas camper", "kind":"home"})
+
+def _pmap(fn, args, workers):
+    # map concurrente que conserva el orden de entrada (workers<=1: secuencial)
+    if workers<=1 or len(args)<=1: return [fn(*a) for a in args]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(lambda a: fn(*a), args))
+
+def _timed_category(ctx, cat):
+    with metrics.span("category", slug=cat["slug"]):
+        return build_category(ctx, cat)
+
+def _timed_post(ctx, cat_slug, kw):
+    with metrics.span("post", keyword=kw):
+        return write_post_from_keyword(ctx, cat_slug, kw)
+
+def dedupe_pool(ctx):
+    # Keywords casi duplicadas (orden, acentos, plurales): una canónica por grupo, el resto alias.
+    # Canónica: la que ya tiene post publicado; si no, la primera de la config.
+    pool=[(c["slug"],kw) for c in ctx.cfg["categories"] for kw in c.get("keywords",[])]
+    slugs=[f"{c}/{slugify(kw)}" for c,kw in pool]
+    published=lambda i: (ctx.posts.get(slugs[i]) or {}).get("kind")=="post"
+    with metrics.span("dedupe", keywords=len(pool)):
+        groups=cluster([kw for _,kw in pool], prefer=lambda i: (not published(i), i))
+    aliases={slugs[i]:slugs[g[0]] for g in groups for i in g[1:] if slugs[i]!=slugs[g[0]]}
+    metrics.incr("keywords.duplicates", len(pool)-len(groups))
+    return [pool[g[0]] for g in groups], aliases
+
+def write_redirects(ctx, aliases):
+    # Alias que ya tenían página: redirección a la canónica (canonical + meta refresh, noindex)
+    for src,dst in sorted(aliases.items()):
+        e=ctx.posts.get(src)
+        if not e: continue
+        url=f"{ctx.base_path}{dst}/"; canonical=f"{ctx.base_url.rstrip('/')}/{dst}/" if ctx.base_url else url
+        title=(ctx.posts.get(dst) or {}).get("title") or e["title"]
+        emit(ctx, f"{src}/index.html", [url, canonical, title],
+             lambda url=url, canonical=canonical, title=title: ("autodiscover/redirect.html", dict(url=url, canonical=canonical, title=title)),
+             meta={"title":e["title"], "description":"", "category":e.get("category",""), "kind":"redirect"})
+    ctx.write("_logs/aliases.json", json.dumps(aliases, ensure_ascii=False, sort_keys=True, indent=0))
+
+def sync_related(ctx, todo):
+    # Documentos = posts publicados + los de hoy (solo se enlaza a lo que existe)
+    cat_titles={c["slug"]:c["title"] for c in ctx.cfg["categories"]}
+    docs={}; titles=ctx.titles={}
+    for slug,title,_ in ctx.posts.posts("post"):
+        cat=ctx.posts.get(slug).get("category","")
+        docs[slug]=f"{title} {cat_titles.get(cat, cat)}"; titles[slug]=title
+    for _,cat_slug,kw in todo:
+        slug=f"{cat_slug}/{slugify(kw)}"
+        docs[slug]=f"{kw.title()} {cat_titles.get(cat_slug, cat_slug)}"; titles[slug]=kw.title()
+    ctx.related=ctx.related or RelatedIndex(ctx.setting("RELATED_CACHE_PATH", RELATED_PATH))
+    with metrics.span("related", docs=len(docs)):
+        st=ctx.related.sync(docs)
+    metrics.incr("related.added", st["added"])
+
+def _start(ctx, name, migrate=True):
+    ctx.start(name)
+    ensure_dirs(ctx)
+    ctx.manifest=BuildManifest(f"{GENERATOR_VERSION}+{source_hash(__file__, catalog.path())}")
+    ctx.posts=PostIndex(migrate=migrate)
+    ctx.images=ImageCache(ctx.setting("IMAGE_CACHE_DIR", IMAGE_CACHE_DIR))
+    ctx.related=RelatedIndex(ctx.setting("RELATED_CACHE_PATH", RELATED_PATH))
+    ctx.schedule=Scheduler(ctx.cfg.get("refresh"))
+    workers=int(ctx.cfg.get("render_workers") or ctx.setting("RENDER_WORKERS", RENDER_WORKERS))
+    ctx.render=RenderPool(ctx.output, "automation.generate_autodiscover", workers)
+
+def page_weight(cfg, cat_slug, kw):
+    # peso de refresco: refresh.weights por keyword, si no "weight" de la categoría (1 por defecto)
+    w=(cfg.get("refresh") or {}).get("weights") or {}
+    if kw in w: return float(w[kw])
+    return float(next((c.get("weight",1) for c in cfg["categories"] if c["slug"]==cat_slug), 1))
+
+def plan_posts(ctx, pool):
+    # Posts nuevos y publicados a refrescar, por prioridad y dentro del presupuesto del run
+    # (automation/scheduler.py). Sin PA-API un refresco no trae nada nuevo: solo entran los nuevos
+    cfg=ctx.cfg; rc=cfg.get("refresh") or {}
+    budget=int(rc.get("budget", cfg.get("auto_daily_new_posts",1)))
+    cands=[]; seen=set()
     for cat_slug, kw in pool:
         slug=f"{cat_slug}/{slugify(kw)}"
-        if not os.path.exists(os.path.join("public",slug,"index.html")):
-            s,h=write_post_from_keyword(cfg, cat_slug, kw)
-            recent.append((s,h,datetime.datetime.utcnow().strftime("%Y-%m-%d")))
-            created+=1
-            if created>=n: break
-    if not recent:
-        items=[]
-        for root,_,files in os.walk("public"):
-            if "index.html" in files and root!="public":
-                slug=root.replace("public","").strip("/")
-                if slug.count("/")>=1:
-                    items.append((slug, slug.split("/")[-1].replace("-"," ").title(), ""))
-        recent=sorted(items)[-10:]
-    write_static_pages(cfg)
-    write_home(cfg, recent)
-    write_sitemap_and_robots(BASE_URL)
+        e=ctx.posts.get(slug)
+        if slug in seen or (e and (e.get("kind")!="post" or not ctx.has_keys())): continue
+        seen.add(slug)
+        cands.append((slug, page_weight(cfg, cat_slug, kw), e["updated"] if e else None, cat_slug, kw))
+    with metrics.span("schedule", candidates=len(cands)):
+        picked=ctx.schedule.plan([c[:3] for c in cands], budget, rc.get("max_new"))
+    metrics.incr("schedule.new", sum(1 for i in picked if cands[i][2] is None))
+    metrics.incr("schedule.refresh", sum(1 for i in picked if cands[i][2] is not None))
+    return [(ctx, cands[i][3], cands[i][4]) for i in picked]
+
+def build_pages(ctx, shard=None):
+    # Categorías y posts del día; con shard (i, N) solo los que caen en esa parte.
+    # Devuelve (pool, aliases, recent) con recent=[(orden, slug, título, fecha)]
+    cfg=ctx.cfg
+    workers=int(cfg.get("build_workers",4))
+    _pmap(_timed_category, [(ctx, cat) for cat in cfg["categories"] if sharding.owns(shard, cat["slug"])], workers)
+    # Posts del run: se eligen antes de construir (y igual en todas las partes) para que el
+    # resultado no dependa del orden de los hilos ni del reparto
+    pool, aliases=dedupe_pool(ctx)
+    todo=plan_posts(ctx, pool)
+    new={f"{c}/{slugify(kw)}" for _,c,kw in todo if f"{c}/{slugify(kw)}" not in ctx.posts}
+    sync_related(ctx, todo)
+    order={f"{c}/{slugify(kw)}":i for i,(_,c,kw) in enumerate(todo)}
+    todo=[t for t in todo if sharding.owns(shard, f"{t[1]}/{slugify(t[2])}")]
+    with metrics.span("image.prefetch"):
+        ctx.images.prefetch([post_image_url(ctx, kw) for _,_,kw in todo], workers=max(workers,1))
+    today=clock.today()
+    recent=[(order[s],s,h,today) for s,h in _pmap(_timed_post, todo, workers) if s in new]
+    return pool, aliases, recent
+
+def write_globals(ctx, pool, aliases, recent):
+    # Lo que depende de todo el sitio: redirecciones, páginas fijas, home, poda y sitemap
+    recent=[r[1:] for r in sorted(recent)] or ctx.posts.recent(10)
+    # Posts de keywords que siguen en la config: se conservan aunque hoy no se regeneren
+    for cat_slug, kw in pool:
+        ctx.manifest.keep(f"{cat_slug}/{slugify(kw)}/index.html")
+    ctx.manifest.keep("robots.txt")  # se regenera tras podar
+    write_redirects(ctx, aliases)
+    write_static_pages(ctx)
+    write_home(ctx, recent)
+    with metrics.span("render.wait"):
+        ctx.render.close()  # todo escrito antes de podar y del sitemap
+    for path in ctx.manifest.prune():
+        if path.endswith("index.html"): ctx.posts.remove(path[:-len("index.html")])
+    ctx.schedule.retain(ctx.posts.slugs("post"))
+    with metrics.span("sitemap"):
+        write_sitemap_and_robots(ctx)
+    ctx.manifest.save(); ctx.posts.save(); ctx.schedule.save(); ctx.images.save(); ctx.related.save()
+
+def run_autodiscover(ctx=None, shard=None):
+    ctx=ctx or load_context()
+    _start(ctx, sharding.run_name("autodiscover", shard), migrate=shard is None)
+    if shard is not None: ctx.output.written=set()
+    pool, aliases, recent=build_pages(ctx, shard)
+    if shard is None:
+        write_globals(ctx, pool, aliases, recent)
+    else:
+        # Parte de un build repartido: sus páginas + manifest parcial; lo global lo hace merge_shards
+        with metrics.span("render.wait"):
+            ctx.render.close()
+        pages=ctx.manifest.part()
+        slugs=[p[:-len("index.html")].strip("/") for p in pages if p.endswith("index.html")]
+        sharding.save_partial(ctx.root, "autodiscover", shard, {
+            "version":ctx.manifest.version, "counts":ctx.manifest.counts, "pages":pages,
+            "posts":{s:ctx.posts.get(s) for s in slugs if s in ctx.posts}, "recent":recent, "schedule":ctx.schedule.part(),
+            "files":sorted(ctx.output.written | set(pages))})
+        ctx.images.save(); ctx.related.save()
+    print(ctx.manifest.summary())
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
+
+def merge_shards(ctx=None, sources=()):
+    # Junta las partes de --shard i/N (en public/ o en las raíces de sources) y escribe lo global
+    ctx=ctx or load_context()
+    _start(ctx, "autodiscover.merge", migrate=False)
+    pool, aliases=dedupe_pool(ctx)  # con el índice de antes del build, como cada parte
+    recent=[]
+    for part in sharding.merge(ctx.root, "autodiscover", sources, version=ctx.manifest.version):
+        ctx.manifest.merge(part["pages"], part["counts"])
+        ctx.posts.merge(part["posts"])
+        ctx.schedule.merge(part["schedule"])
+        recent+=[tuple(r) for r in part["recent"]]
+    write_globals(ctx, pool, aliases, recent)
+    sharding.cleanup(ctx.root, "autodiscover")
+    print(ctx.manifest.summary())
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
+
+def refresh_prices_only(ctx=None):
+    # Solo precios/disponibilidad de las paginas publicadas; no re-renderiza nada
+    from automation.prices import refresh_prices, PRICE_MAX_AGE
+    ctx=ctx or load_context()
+    ctx.start("autodiscover_prices")
+    ensure_dirs(ctx)
+    if not ctx.has_keys():
+        print("refresh-prices: sin claves PA-API, no se toca nada"); return
+    posts=PostIndex()
+    try:
+        stats=refresh_prices(ctx.client(), ctx.write, root=ctx.root, index=posts,
+                             max_age=ctx.setting("PRICE_MAX_AGE", PRICE_MAX_AGE))
+    except Exception as e:  # PA-API caida: las paginas se quedan como estaban
+        print(f"refresh-prices: PA-API no disponible ({e})"); return
+    schedule=Scheduler(ctx.cfg.get("refresh"))
+    for path in stats["paths"]:
+        if path.endswith("index.html"): schedule.price_changed(path[:-len("index.html")].strip("/"))
+    posts.save(); schedule.save()
+    print(f"refresh-prices: {stats['patched']} paginas actualizadas ({stats['offers']}/{stats['asins']} ASIN con oferta, {stats['pages']} paginas con precios)")
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
 
 if __name__=="__main__":
-    ensure_dirs()
-    run_autodiscover(CFG)
+    import argparse
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--refresh-prices", action="store_true", help="solo actualiza precios de las paginas ya publicadas")
+    ap.add_argument("--shard", metavar="i/N", help="construye solo la parte i de N (luego --merge)")
+    ap.add_argument("--merge", nargs="*", metavar="DIR", help="junta las partes (de public/ o de los DIR de cada parte)")
+    args=ap.parse_args()
+    try:
+        if args.refresh_prices: refresh_prices_only()
+        elif args.merge is not None: merge_shards(sources=tuple(args.merge))
+        else: run_autodiscover(shard=sharding.parse(args.shard) if args.shard else None)
+    except sharding.ShardError as e:
+        ap.exit(2, f"{e}\n")
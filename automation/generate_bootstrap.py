@@ -1,10 +1,13 @@
 # automation/generate_bootstrap.py — version rutas relativas OK en GitHub Pages
 
-import os, json, re, datetime, hashlib, hmac, requests
-from jinja2 import Template
+import os, time
+from automation.product import Product, iter_products
+from automation.postindex import PostIndex, describe
+from automation import templates
+from automation.context import BuildContext, load_json_config
+from automation import metrics, tables
 
-CONFIG_PATH = os.environ.get("BOOTSTRAP_JSON_PATH", "automation/bootstrap.json")
-os.makedirs("public/static", exist_ok=True)
+CONFIG_PATH = "automation/bootstrap.json"  # BOOTSTRAP_JSON_PATH la sustituye; se lee en load_context()
 
 BASE_HEAD = """<!doctype html><html lang="es"><head>
 <meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
@@ -14,24 +17,26 @@ BASE_HEAD = """<!doctype html><html lang="es"><head>
 </head><body><header><a href="{{ base }}">AutoNicho</a></header><main>"""
 TAIL = """</main><footer><p>(c) AutoNicho - Enlaces patrocinados (afiliado).</p></footer></body></html>"""
 
-POST_TMPL = Template("""{{ head }}
+POST_TMPL = """{{ head|safe }}
 <article>
 <h1>{{ h1 }}</h1>
 <p>{{ intro }}</p>
-{{ table }}
+{{ table|safe }}
 <section><h2>Cómo elegir</h2><ul>{% for t in tips %}<li>{{ t }}</li>{% endfor %}</ul></section>
 <section><h2>Preguntas frecuentes</h2>{% for q,a in faqs %}<h3>{{ q }}</h3><p>{{ a }}</p>{% endfor %}</section>
 <nav><p>También puede interesarte:
 {% for slug, title in related %}<a href="{{ base }}{{ slug }}/">{{ title }}</a>{% if not loop.last %} · {% endif %}{% endfor %}</p></nav>
-</article>{{ tail }}""")
+</article>{{ tail|safe }}"""
 
-INDEX_TMPL = Template("""{{ head }}
+INDEX_TMPL = """{{ head|safe }}
 <h1>{{ site_title }}</h1>
 <ul>
 {% for slug, title, desc in posts %}
 <li><a href="{{ base }}{{ slug }}/">{{ title }}</a><br><small>{{ desc }}</small></li>
 {% endfor %}
-</ul>{{ tail }}""")
+</ul>{{ tail|safe }}"""
+
+templates.register("bootstrap", {"head.html": BASE_HEAD, "post.html": POST_TMPL, "index.html": INDEX_TMPL})
 
 STYLE = """
 body{font-family:system-ui,Segoe UI,Roboto,Arial,sans-serif;margin:0;padding:0;line-height:1.6;color:#111;background:#fff}
@@ -44,22 +49,8 @@ th,td{border:1px solid #ddd;padding:8px;text-align:left}
 .bb-price{font-weight:600}
 """
 
-def write(path, content):
-    path = os.path.join("public", path.lstrip("/"))
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-def load_posts_list():
-    idx=[]
-    for root,_,files in os.walk("public"):
-        for f in files:
-            if f=="index.html" and root!="public":
-                slug=root.replace("public","").strip("/")
-                txt=open(os.path.join(root,f),"r",encoding="utf-8").read()
-                t=re.search(r"<h1>(.*?)</h1>",txt,re.S); d=re.search(r"<p>(.*?)</p>",txt,re.S)
-                idx.append((slug, t.group(1) if t else slug, (d.group(1)[:160]+"...") if d else ""))
-    return sorted(idx)[:200]
+def load_posts_list(index=None):
+    return (index or PostIndex()).posts()
 
 # ---------- Carga robusta de config ----------
 def _default_cfg():
@@ -77,128 +68,97 @@ def _default_cfg():
         ]
     }
 
-def _clean_json(raw: str) -> str:
-    s = raw.strip()
-    if s.startswith("```"):
-        s = s.lstrip("`"); nl = s.find("\n")
-        if nl != -1: s = s[nl+1:]
-        if s.endswith("```"): s = s[:-3]
-    s = s.replace("“","\"").replace("”","\"").replace("‘","\"").replace("’","\"")
-    if s.count('"') == 0 and "'" in s: s = s.replace("'", "\"")
-    return s
-
-try:
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        raw = f.read()
-    try:
-        cfg = json.loads(raw)
-    except Exception:
-        cfg = json.loads(_clean_json(raw))
-except Exception:
-    cfg = _default_cfg()
+def load_context(path=None, env=None):
+    env = os.environ if env is None else env
+    t = time.perf_counter()
+    # config entera o la de ejemplo (sin mezclar claves)
+    cfg = load_json_config(path or env.get("BOOTSTRAP_JSON_PATH", CONFIG_PATH), _default_cfg(), fill=False)
+    ctx = BuildContext(cfg, env=env)
+    ctx.config_s = time.perf_counter() - t  # etapa "config" del informe (ctx.start)
+    return ctx
 
 # ---------- PA-API helpers (solo si hay claves) ----------
-AWS_REGION="eu-west-1"; HOST="webservices.amazon.es"; SERVICE="ProductAdvertisingAPI"
-def _sign(key,msg): return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
-def _sig_key(key,dateStamp,regionName,serviceName):
-    kDate=_sign(("AWS4"+key).encode("utf-8"),dateStamp)
-    kRegion=_sign(kDate,regionName); kService=_sign(kRegion,serviceName)
-    return _sign(kService,"aws4_request")
-def _pa_call(path,payload,amz_target,access_key,secret_key):
-    now=datetime.datetime.utcnow(); amz_date=now.strftime("%Y%m%dT%H%M%SZ"); date_stamp=now.strftime("%Y%m%d")
-    endpoint=f"https://{HOST}{path}"; body=json.dumps(payload)
-    canonical_headers=( "content-encoding:amz-1.0\ncontent-type:application/json; charset=utf-8\n"
-                        f"host:{HOST}\n"+"x-amz-date:"+amz_date+"\n"+"x-amz-target:"+amz_target+"\n")
-    signed_headers="content-encoding;content-type;host;x-amz-date;x-amz-target"
-    payload_hash=hashlib.sha256(body.encode("utf-8")).hexdigest()
-    canonical_request="POST\n{}\n{}\n{}\n{}\n{}".format(path,"",canonical_headers,signed_headers,payload_hash)
-    algorithm="AWS4-HMAC-SHA256"; scope=f"{date_stamp}/{AWS_REGION}/{SERVICE}/aws4_request"
-    string_to_sign="{}\n{}\n{}\n{}".format(algorithm,amz_date,scope,hashlib.sha256(canonical_request.encode("utf-8")).hexdigest())
-    signing_key=_sig_key(secret_key,date_stamp,AWS_REGION,SERVICE)
-    signature=hmac.new(signing_key,string_to_sign.encode("utf-8"),hashlib.sha256).hexdigest()
-    headers={
-        "content-encoding":"amz-1.0","content-type":"application/json; charset=utf-8",
-        "x-amz-date":amz_date,"x-amz-target":amz_target,
-        "Authorization":f"{algorithm} Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}",
-        "Accept":"application/json",
-    }
-    r=requests.post(endpoint,data=body,headers=headers,timeout=30); r.raise_for_status(); return r.json()
-
-def paapi_search_items(tag, kw, access, secret, count=10):
-    payload={"Keywords":kw,"SearchIndex":"All","ItemCount":count,"PartnerTag":tag,"PartnerType":"Associates",
-             "Resources":["Images.Primary.Medium","ItemInfo.Title","ItemInfo.Features","Offers.Listings.Price","Offers.Listings.Availability"]}
-    target="com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems"
-    return _pa_call("/paapi5/searchitems", payload, target, access, secret)
+def paapi_search_items(ctx, kw, count=10):
+    return list(iter_products(ctx.client().search_items(kw, item_count=count)))
 
 # ---------- Tablas ----------
+TABLE_LAYOUT = tables.Layout([
+    tables.Column("Modelo", tables.product_cell(bullets=5, max_title=100)),
+    tables.Column("Precio", tables.price_cell),
+    tables.Column("Disponibilidad", tables.avail_cell),
+    tables.Column("", tables.button_cell("Ver precio")),
+], "")
+LINKS_LAYOUT = tables.Layout([
+    tables.Column("Búsqueda", tables.product_cell(bullets=0)),
+    tables.Column("Precio", tables.text_cell("price")),
+    tables.Column("Disponibilidad", tables.text_cell("availability")),
+    tables.Column("", tables.button_cell("Ver opciones")),
+], "")
+
 def table_from_items(items, tag):
-    rows=[]
-    for it in items.get("ItemsResult",{}).get("Items",[]):
-        asin=it.get("ASIN","")
-        title=(it.get("ItemInfo",{}).get("Title",{}).get("DisplayValue") or asin)[:100]
-        feats=it.get("ItemInfo",{}).get("Features",{}).get("DisplayValues") or []
-        bullets="<ul>"+"".join([f"<li>{b}</li>" for b in feats[:5]])+"</ul>" if feats else ""
-        price=it.get("Offers",{}).get("Listings",[{}])[0].get("Price",{}).get("DisplayAmount","Consultar")
-        avail=it.get("Offers",{}).get("Listings",[{}])[0].get("Availability",{}).get("Message","")
-        link=f"https://www.amazon.es/dp/{asin}?tag={tag}"
-        rows.append(f"<tr><td><strong>{title}</strong>{bullets}</td><td><span class='bb-price'>{price}</span></td><td>{avail}</td><td><a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{link}'>Ver precio</a></td></tr>")
-    if not rows:
+    html = tables.render_table(items, TABLE_LAYOUT, tag)
+    if not html:
+        metrics.incr("fallback_tables")
         return "<p>Sin datos de PA-API hoy. Usa el botón para ver precio actualizado en Amazon.</p>"
-    return "<table><thead><tr><th>Modelo</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>"+"".join(rows)+"</tbody></table>"
+    return html
 
 def table_links_only(tag, keywords):
-    rows=[]
-    for kw in (keywords[:6] if keywords else []):
-        link=f"https://www.amazon.es/s?k={requests.utils.quote(kw)}&tag={tag}"
-        rows.append(f"<tr><td><strong>{kw.title()}</strong></td><td>-</td><td>-</td><td><a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{link}'>Ver opciones</a></td></tr>")
-    if not rows:
-        return "<p>Añade palabras clave en la configuración para ver búsquedas útiles.</p>"
-    return "<table><thead><tr><th>Búsqueda</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead><tbody>"+"".join(rows)+"</tbody></table>"
-
-def write_page(slug, title, table, posts_meta, base):
-    intro="Comparativa generada automáticamente. Haz clic para ver precio actualizado en Amazon."
+    metrics.incr("fallback_tables")
+    rows=[Product("", kw.title(), price="-", availability="-") for kw in (keywords[:6] if keywords else [])]
+    return tables.render_table(rows, LINKS_LAYOUT, tag) or "<p>Añade palabras clave en la configuración para ver búsquedas útiles.</p>"
+
+INTRO="Comparativa generada automáticamente. Haz clic para ver precio actualizado en Amazon."
+
+def write_page(ctx, slug, title, table, posts_meta, base):
+    intro=INTRO
     tips=["Define presupuesto y tamaño.","Revisa garantía y repuestos.","Evita extras que no usarás."]
     faqs=[("¿Cambian los precios?","Sí, Amazon los actualiza."),
           ("¿Afecta el afiliado al precio?","No."),
           ("¿Cómo elegimos?","Disponibilidad, reputación y especificaciones.")]
-    head = Template(BASE_HEAD).render(title_tag=title, meta_description=f"Guía rápida: {title}.", base=base)
+    head = templates.render("bootstrap/head.html", title_tag=title, meta_description=f"Guía rápida: {title}.", base=base)
     related=[(s,t) for s,t,_ in posts_meta[:3]]
-    html = POST_TMPL.render(head=head, h1=title, intro=intro, table=table, tips=tips, faqs=faqs, related=related, tail=TAIL, base=base)
-    write(f"{slug}/index.html", html)
+    html = templates.render("bootstrap/post.html", head=head, h1=title, intro=intro, table=table, tips=tips, faqs=faqs, related=related, tail=TAIL, base=base)
+    ctx.write(f"{slug}/index.html", html)
 
 # ---------- Main ----------
-def main():
-    tag = (cfg.get("amazon_partner_tag") or "").strip()
-    access = (cfg.get("amazon_access_key") or "").strip()
-    secret = (cfg.get("amazon_secret_key") or "").strip()
+def main(ctx=None):
+    ctx = ctx or load_context()
+    cfg = ctx.cfg
+    tag = ctx.partner_tag
     site_title = cfg.get("site_title","AutoNicho")
     cats = cfg.get("categories",[])[:3]
+    ctx.start("bootstrap")
+    ctx.ensure_dirs("static")
 
     # estilo
-    write("static/style.css", STYLE)
+    ctx.write("static/style.css", STYLE)
 
+    index = PostIndex()
     posts_meta=[]
     for cat in cats:
         slug=cat["slug"]; title=cat["title"]; kws=cat.get("keywords",[])
-        if access and secret:
-            items={"ItemsResult":{"Items":[]}}
+        if ctx.has_keys():
+            items=[]
             try:
                 for kw in kws[:2]:
-                    res = paapi_search_items(tag, kw, access, secret, count=6)
-                    items["ItemsResult"]["Items"] += res.get("ItemsResult",{}).get("Items",[])
-            except Exception:
-                pass
+                    items += paapi_search_items(ctx, kw, count=6)
+            except Exception as e:
+                metrics.error("paapi", e, keyword=kw, category=slug)
             table = table_from_items(items, tag)
         else:
             table = table_links_only(tag, kws if kws else [title])
 
-        write_page(slug, title, table, posts_meta, base="../")  # CSS y enlaces relativos desde subpágina
+        write_page(ctx, slug, title, table, posts_meta, base="../")  # CSS y enlaces relativos desde subpágina
+        index.upsert(slug, title, describe(INTRO), category=slug)
         posts_meta.append((slug,title,"Selección automática y enlaces directos a Amazon."))
 
     # home (base = "./")
-    head = Template(BASE_HEAD).render(title_tag=site_title, meta_description="Listas y comparativas automatizadas, sin intervención.", base="./")
-    index = INDEX_TMPL.render(head=head, posts=posts_meta, site_title=site_title, tail=TAIL, base="./")
-    write("index.html", index)
+    head = templates.render("bootstrap/head.html", title_tag=site_title, meta_description="Listas y comparativas automatizadas, sin intervención.", base="./")
+    home = templates.render("bootstrap/index.html", head=head, posts=posts_meta, site_title=site_title, tail=TAIL, base="./")
+    ctx.write("index.html", home)
+    index.save()
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
 
 if __name__ == "__main__":
     main()
@@ -2,12 +2,18 @@
 # Generador SIN IA de pago: usa Amazon PA-API v5 para montar comparativas
 # a partir de ASINs (seeds.json). Publica HTML estatico en /public.
 
-import os, json, re, datetime
-from jinja2 import Template
-from automation.paapi import paapi_get_items  # requiere automation/__init__.py (vacío)
-
-PARTNER_TAG = os.environ.get("AMAZON_PARTNER_TAG", "")
-CFWA = os.environ.get("CLOUDFLARE_WEB_ANALYTICS_TOKEN", "")
+import json
+from automation.postindex import PostIndex, describe
+from automation import templates
+from automation.context import BuildContext
+from automation.sitemap import SitemapWriter
+from automation import metrics, tables, sharding
+from automation.related import RelatedIndex
+from automation.product import iter_products
+from automation.prices import write_price_shards, refresh_prices, refresh_shards, PRICE_MAX_AGE
+
+SEEDS_PATH = "seeds.json"
+DAILY_POSTS = 2  # categorias de seeds.json por run; FREE_DAILY_POSTS en el entorno del build (el benchmark: todas)
 
 HEAD = """<!doctype html><html lang="es"><head>
 <meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
@@ -19,11 +25,11 @@ HEAD = """<!doctype html><html lang="es"><head>
 </head><body><header><a href="/">AutoNicho</a></header><main>"""
 TAIL = """</main><footer><p>(c) AutoNicho Free - Enlaces patrocinados (afiliado).</p></footer></body></html>"""
 
-POST_TMPL = Template("""{{ head }}
+POST_TMPL = """{{ head|safe }}
 <article>
 <h1>{{ h1 }}</h1>
 <p>{{ intro }}</p>
-{{ table }}
+{{ table|safe }}
 <section><h2>Como elegir</h2>
 <ul>{% for tip in tips %}<li>{{ tip }}</li>{% endfor %}</ul></section>
 <section><h2>Preguntas frecuentes</h2>
@@ -31,114 +37,113 @@ POST_TMPL = Template("""{{ head }}
 </section>
 <nav><p>Tambien puede interesarte: {% for slug, title in related %}<a href="/{{ slug }}/">{{ title }}</a>{% if not loop.last %} · {% endif %}{% endfor %}</p></nav>
 </article>
-{{ tail }}""")
+{{ tail|safe }}"""
 
-INDEX_TMPL = Template("""{{ head }}
+INDEX_TMPL = """{{ head|safe }}
 <h1>Guias y comparativas</h1>
 <ul>
 {% for slug, title, desc in posts %}
 <li><a href="/{{ slug }}/">{{ title }}</a><br><small>{{ desc }}</small></li>
 {% endfor %}
 </ul>
-{{ tail }}""")
-
-def ensure_dirs():
-    os.makedirs("public", exist_ok=True)
-    os.makedirs("public/static", exist_ok=True)
-
-def write(path, content):
-    path = os.path.join("public", path.lstrip("/"))
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-def load_posts_list():
-    idx = []
-    for root, _, files in os.walk("public"):
-        for f in files:
-            if f == "index.html" and root != "public":
-                slug = root.replace("public", "").strip("/")
-                txt = open(os.path.join(root, f), "r", encoding="utf-8").read()
-                m = re.search(r"<h1>(.*?)</h1>", txt, re.S)
-                title = m.group(1) if m else slug
-                m2 = re.search(r"<p>(.*?)</p>", txt, re.S)
-                desc = (m2.group(1)[:160] + "...") if m2 else ""
-                idx.append((slug, title, desc))
-    return sorted(idx)[:200]
-
-def describe_item(it):
-    title = (it.get("ItemInfo", {}).get("Title", {}).get("DisplayValue") or "").strip()
-    feats = it.get("ItemInfo", {}).get("Features", {}).get("DisplayValues") or []
-    bullets = [f for f in feats if isinstance(f, str)][:5]
-    return title, bullets
-
-def build_table(api, tag):
-    rows = []
-    for it in api.get("ItemsResult", {}).get("Items", []):
-        asin = it.get("ASIN", "")
-        title, bullets = describe_item(it)
-        price = it.get("Offers", {}).get("Listings", [{}])[0].get("Price", {}).get("DisplayAmount", "Consultar")
-        avail = it.get("Offers", {}).get("Listings", [{}])[0].get("Availability", {}).get("Message", "")
-        link = f"https://www.amazon.es/dp/{asin}?tag={tag}"
-        bl = "<ul>" + "".join([f"<li>{b}</li>" for b in bullets]) + "</ul>" if bullets else ""
-        rows.append(
-            f"<tr><td><strong>{title or asin}</strong>{bl}</td>"
-            f"<td><span class='bb-price' id='price-{asin}'>{price}</span></td>"
-            f"<td>{avail}</td>"
-            f"<td><div class='buybox' data-asin='{asin}'><a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{link}'>Ver precio</a></div></td></tr>"
-        )
-    if not rows:
+{{ tail|safe }}"""
+
+templates.register("free", {"head.html": HEAD, "post.html": POST_TMPL, "index.html": INDEX_TMPL})
+
+def load_context(env=None):
+    # sin config propia: credenciales (AMAZON_*) y token de analitica salen del entorno
+    return BuildContext({}, env=env)
+
+def ensure_dirs(ctx):
+    ctx.ensure_dirs("static")
+
+def cfwa(ctx):
+    return ctx.env.get("CLOUDFLARE_WEB_ANALYTICS_TOKEN", "")
+
+def load_posts_list(index=None):
+    # Lee .cache/posts.json en vez de abrir cada index.html
+    return (index or PostIndex()).posts()
+
+TABLE_LAYOUT = tables.Layout([
+    tables.Column("Modelo", tables.product_cell(bullets=5)),
+    tables.Column("Precio", tables.price_cell),
+    tables.Column("Disponibilidad", tables.avail_cell),
+    tables.Column("", tables.button_cell("Ver precio", buybox=True)),
+], "")
+
+def build_table(products, tag):
+    html = tables.render_table(products, TABLE_LAYOUT, tag)
+    if not html:
+        metrics.incr("fallback_tables")
         return "<p>No se pudo cargar la tabla.</p>"
-    return (
-        "<table><thead><tr><th>Modelo</th><th>Precio</th><th>Disponibilidad</th><th></th></tr></thead>"
-        "<tbody>" + "".join(rows) + "</tbody></table>"
-    )
+    return html
 
-def write_index():
-    posts = load_posts_list()
-    head = Template(HEAD).render(
+def write_index(ctx, index):
+    posts = load_posts_list(index)[:200]
+    head = templates.render(
+        "free/head.html",
         title_tag="AutoNicho Free - guias y comparativas",
         meta_description="Listas y comparativas generadas automaticamente con datos de Amazon.",
-        cfwa=CFWA,
+        cfwa=cfwa(ctx),
     )
-    html = INDEX_TMPL.render(head=head, posts=posts, tail=TAIL)
-    write("index.html", html)
-
-def write_sitemap():
-    urls = ["/"]
-    for root, _, files in os.walk("public"):
-        for f in files:
-            if f == "index.html" and root != "public":
-                slug = root.replace("public", "").strip("/")
-                urls.append(f"/{slug}/")
-    sm = ["<?xml version='1.0' encoding='UTF-8'?>", "<urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>"]
-    now = datetime.datetime.utcnow().strftime("%Y-%m-%d")
-    for u in urls:
-        sm += [f"<url><loc>{u}</loc><lastmod>{now}</lastmod><changefreq>weekly</changefreq><priority>0.6</priority></url>"]
-    sm.append("</urlset>")
-    write("sitemap.xml", "\n".join(sm))
-    write("robots.txt", "User-agent: *\nAllow: /\n")
-
-def main():
-    ensure_dirs()
+    html = templates.render("free/index.html", head=head, posts=posts, tail=TAIL)
+    ctx.write("index.html", html)
+
+def write_sitemap(ctx, index):
+    with metrics.span("sitemap"):
+        _write_sitemap(ctx, index)
+
+def _write_sitemap(ctx, index):
+    sm = SitemapWriter(ctx.output)
+    slugs = [slug for slug in index.slugs() if slug]
+    home = max((index.get(slug)["updated"] for slug in slugs), default=None)
+    sm.add("/", lastmod=home)
+    for slug in slugs:
+        sm.add(f"/{slug}/", lastmod=index.get(slug)["updated"])
+    sm.close()
+    ctx.write("robots.txt", "User-agent: *\nAllow: /\n")
+
+def main(ctx=None, shard=None):
+    # shard (i, N): solo las categorias de esa parte; index, sitemap y precios los escribe merge_main
+    ctx = ctx or load_context()
+    ctx.start(sharding.run_name("free", shard))
+    ensure_dirs(ctx)
+    if shard is not None:
+        ctx.output.written = set()
     # Carga seeds.json (ASINs de ejemplo). Si PA-API falla, seguimos publicando el post con "Consultar".
-    seeds = json.load(open("seeds.json", "r", encoding="utf-8"))
-    cats = seeds.get("categories", [])[:2]  # 1-2 posts/dia
-    existing = set([p[0] for p in load_posts_list()])
+    with metrics.span("config"):
+        with open(SEEDS_PATH, "r", encoding="utf-8") as f:
+            seeds = json.load(f)
+    cats = seeds.get("categories", [])[:ctx.setting("FREE_DAILY_POSTS", DAILY_POSTS)]  # 1-2 posts/dia
+    index = PostIndex(migrate=shard is None)
+    existing = set(index.slugs())
+    offers, groups = {}, {}  # para los shards de precios (prices/*.json)
+    # relacionados: vecinos por similitud entre lo publicado y lo que se publica hoy
+    docs = {slug: f"{title} {index.get(slug).get('category', '')}" for slug, title, _ in index.posts()}
+    titles = {slug: title for slug, title, _ in index.posts()}
+    for cat in cats:
+        docs[cat["slug"]] = f"{cat.get('title', '')} {cat['slug']}"; titles[cat["slug"]] = cat.get("title", "Guia de compra")
+    related_index = RelatedIndex(".cache/related_free.json")
+    with metrics.span("related", docs=len(docs)):
+        related_index.sync(docs)
 
     for cat in cats:
         slug = cat["slug"]
-        if slug in existing:
+        if slug in existing or not sharding.owns(shard, slug):
             continue
         asins = cat.get("asins", [])[:5]
 
         # Llamada PA-API con tolerancia a fallo (para que el workflow no se caiga)
         try:
-            api = paapi_get_items(asins) if asins else {}
-        except Exception:
+            api = ctx.client().get_items(asins) if asins else {}
+        except Exception as e:
+            metrics.error("paapi", e, category=slug)
             api = {}
 
-        table = build_table(api, PARTNER_TAG)
+        products = list(iter_products(api))
+        table = build_table(products, ctx.partner_tag)
+        offers.update((p.asin, p.offer) for p in products)
+        groups[slug] = {p.asin for p in products}
         h1 = cat.get("title", "Guia de compra")
         intro = "Comparativa rapida con datos oficiales de Amazon (PA-API). Revisa el precio actualizado en el boton."
         tips = ["Define presupuesto y tamano.", "Mira garantia y repuestos.", "Evita pagar extras que no usaras."]
@@ -147,16 +152,94 @@ def main():
             ("Influye el afiliado en el precio?", "No, tu precio no cambia."),
             ("Como seleccionamos los modelos?", "Por disponibilidad, reputacion y especificaciones clave."),
         ]
-        head = Template(HEAD).render(title_tag=h1, meta_description=f"Guia rapida: {h1}.", cfwa=CFWA)
-        related = [(rslug, rtitle) for rslug, rtitle, _ in load_posts_list()[:3]]
+        head = templates.render("free/head.html", title_tag=h1, meta_description=f"Guia rapida: {h1}.", cfwa=cfwa(ctx))
+        related = [(s, titles[s]) for s in related_index.related(slug, 3)] or \
+                  [(rslug, rtitle) for rslug, rtitle, _ in load_posts_list(index)[:3] if rslug != slug]
 
-        html = POST_TMPL.render(
-            head=head, h1=h1, intro=intro, table=table, tips=tips, faqs=faqs, related=related, tail=TAIL
+        html = templates.render(
+            "free/post.html", head=head, h1=h1, intro=intro, table=table, tips=tips, faqs=faqs, related=related, tail=TAIL
         )
-        write(f"{slug}/index.html", html)
-
-    write_index()
-    write_sitemap()
+        ctx.write(f"{slug}/index.html", html)
+        index.upsert(slug, h1, describe(intro), category=slug)
+
+    related_index.save()
+    if shard is not None:
+        sharding.save_partial(ctx.root, "free", shard, {
+            "posts": {slug: index.get(slug) for slug in groups}, "offers": offers,
+            "groups": {slug: sorted(a) for slug, a in groups.items()}, "files": sorted(ctx.output.written)})
+    else:
+        write_globals(ctx, index, offers, groups)
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
+
+def write_globals(ctx, index, offers, groups):
+    write_index(ctx, index)
+    write_sitemap(ctx, index)
+    write_price_shards(ctx.write, offers, groups, root=ctx.root)
+    index.save()
+
+def merge_main(ctx=None, sources=()):
+    # Junta las partes de --shard i/N (en public/ o en las raices de sources)
+    ctx = ctx or load_context()
+    ctx.start("free.merge")
+    ensure_dirs(ctx)
+    index = PostIndex(migrate=False)
+    offers, groups = {}, {}
+    for part in sharding.merge(ctx.root, "free", sources):
+        index.merge(part["posts"])
+        offers.update((asin, tuple(o)) for asin, o in part["offers"].items())
+        groups.update((slug, set(a)) for slug, a in part["groups"].items())
+    write_globals(ctx, index, offers, groups)
+    sharding.cleanup(ctx.root, "free")
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
+
+def refresh_main(shards_only=False, ctx=None):
+    # Solo precios/disponibilidad de las paginas publicadas; no re-renderiza nada.
+    # shards_only: ni siquiera parchea el HTML, solo reescribe prices/*.json
+    ctx = ctx or load_context()
+    ctx.start("free_shards" if shards_only else "free_prices")
+    ensure_dirs(ctx)
+    if not ctx.has_keys():
+        print("refresh-prices: sin claves PA-API, no se toca nada")
+        return
+    if shards_only:
+        try:
+            stats = refresh_shards(ctx.client(), ctx.write, root=ctx.root, max_age=ctx.setting("PRICE_MAX_AGE", PRICE_MAX_AGE))
+        except Exception as e:
+            print(f"price-shards: PA-API no disponible ({e})")
+            return
+        print(f"price-shards: {stats['changed']}/{stats['shards']} shards nuevos ({stats['offers']}/{stats['asins']} ASIN con oferta)")
+        print(ctx.output.summary())
+        print(metrics.summary(metrics.finish()))
+        return
+    index = PostIndex()
+    try:
+        stats = refresh_prices(ctx.client(), ctx.write, root=ctx.root, index=index,
+                               max_age=ctx.setting("PRICE_MAX_AGE", PRICE_MAX_AGE))
+    except Exception as e:  # PA-API caida: las paginas se quedan como estaban
+        print(f"refresh-prices: PA-API no disponible ({e})")
+        return
+    write_sitemap(ctx, index)  # lastmod de las paginas tocadas
+    index.save()
+    print(f"refresh-prices: {stats['patched']} paginas actualizadas ({stats['offers']}/{stats['asins']} ASIN con oferta, {stats['pages']} paginas con precios)")
+    print(ctx.output.summary())
+    print(metrics.summary(metrics.finish()))
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--refresh-prices", action="store_true", help="solo actualiza precios de las paginas ya publicadas")
+    ap.add_argument("--price-shards", action="store_true", help="solo reescribe prices/*.json (sin tocar el HTML)")
+    ap.add_argument("--shard", metavar="i/N", help="construye solo la parte i de N (luego --merge)")
+    ap.add_argument("--merge", nargs="*", metavar="DIR", help="junta las partes (de public/ o de los DIR de cada parte)")
+    args = ap.parse_args()
+    try:
+        if args.refresh_prices or args.price_shards:
+            refresh_main(shards_only=args.price_shards and not args.refresh_prices)
+        elif args.merge is not None:
+            merge_main(sources=tuple(args.merge))
+        else:
+            main(shard=sharding.parse(args.shard) if args.shard else None)
+    except sharding.ShardError as e:
+        ap.exit(2, f"{e}\n")
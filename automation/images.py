@@ -0,0 +1,121 @@
+# automation/images.py
+# Descarga de imagenes con cache local direccionada por contenido.
+# - Indice url -> sha256/ETag/Last-Modified en .cache/images/index.json;
+#   los bytes se guardan una sola vez por hash (blobs/<sha>.<ext>).
+# - Revalida con If-None-Match / If-Modified-Since pasado max_age.
+# - prefetch() descarga en paralelo las imagenes de todos los posts del run.
+# - Sin red: placeholder SVG generado en local.
+
+import os, json, time, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+from automation import metrics
+
+IMAGE_CACHE_DIR = ".cache/images"  # IMAGE_CACHE_DIR en el entorno del build
+IMAGE_TIMEOUT = 20
+MAX_AGE = 7 * 86400
+
+EXT = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp", "image/gif": "gif", "image/svg+xml": "svg"}
+
+def placeholder_svg(text, w=1000, h=600, bg="#161616", fg="#FFFFFF"):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
+            f'<rect width="100%" height="100%" fill="{bg}"/>'
+            f'<text x="50%" y="50%" fill="{fg}" font-family="Inter,system-ui,sans-serif" font-size="44" '
+            f'text-anchor="middle" dominant-baseline="middle">{escape(text)}</text></svg>').encode("utf-8")
+
+class ImageCache:
+    def __init__(self, root=IMAGE_CACHE_DIR, max_age=MAX_AGE, timeout=IMAGE_TIMEOUT):
+        self.root = root
+        self.max_age = max_age
+        self.timeout = timeout
+        self.stats = {"hits": 0, "revalidated": 0, "downloaded": 0, "failed": 0}
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._index_path = os.path.join(root, "index.json")
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except Exception:
+            self.index = {}
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._checked = set()  # urls ya resueltas en este run: no se vuelven a pedir
+        import requests  # al crear la cache, no al importar el generador
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=8))
+
+    def blob_path(self, entry):
+        return os.path.join(self.root, "blobs", f"{entry['sha']}.{entry['ext']}")
+
+    def _store(self, data, ext):
+        sha = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.root, "blobs", f"{sha}.{ext}")
+        if not os.path.exists(path):  # bytes identicos: un solo fichero
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return sha
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def _stat(self, k):
+        self.stats[k] += 1
+        metrics.incr(f"images.{k}")
+
+    def fetch(self, url):
+        # Devuelve {"sha", "ext", ...} o None si no hay red ni copia previa
+        with self._url_lock(url), metrics.span("image.fetch", url=url):
+            entry = self.index.get(url)
+            usable = entry and os.path.exists(self.blob_path(entry))
+            if usable and (url in self._checked or time.time() - entry["fetched_at"] < self.max_age):
+                self._stat("hits")
+                return entry
+            headers = {}
+            if usable and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if usable and entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            try:
+                r = self.session.get(url, headers=headers, timeout=self.timeout)
+            except Exception:
+                r = None
+            self._checked.add(url)
+            if r is not None and r.status_code == 304 and usable:
+                self._stat("revalidated")
+                entry = dict(entry, fetched_at=time.time())
+            elif r is not None and r.status_code == 200 and r.content:
+                self._stat("downloaded")
+                ext = EXT.get(r.headers.get("Content-Type", "").split(";")[0].strip(), "jpg")
+                entry = {"sha": self._store(r.content, ext), "ext": ext, "fetched_at": time.time(),
+                         "etag": r.headers.get("ETag", ""), "last_modified": r.headers.get("Last-Modified", "")}
+            else:
+                self._stat("failed")
+                return entry if usable else None  # copia anterior mejor que nada
+            with self._lock:
+                self.index[url] = entry
+            return entry
+
+    def prefetch(self, urls, workers=8):
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as ex:
+            list(ex.map(self.fetch, urls))
+
+    def placeholder(self, text):
+        data = placeholder_svg(text)
+        return {"sha": self._store(data, "svg"), "ext": "svg"}
+
+    def read(self, entry):
+        with open(self.blob_path(entry), "rb") as f:
+            return f.read()
+
+    def save(self):
+        with self._lock:
+            tmp = self._index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, sort_keys=True, separators=(",", ":"))
+            os.replace(tmp, self._index_path)
@@ -0,0 +1,104 @@
+# automation/manifest.py
+# Manifest de build incremental: por cada fichero de salida guarda el hash
+# de sus entradas (trozo de config, datos de PA-API, plantillas, version del
+# generador). Si el hash no cambia y el fichero existe, no se re-renderiza.
+# Las paginas que dejan de generarse (categoria/keyword borrada) se eliminan.
+# Vive en .cache/ (como los informes de run): no se publica y la cache de CI lo
+# conserva entre runs. Una pagina cuenta como al dia solo si ademas existe en
+# public/, asi un manifest restaurado sin su public/ no se salta nada.
+
+import os, json, hashlib, threading
+from automation.output import remove_with_siblings
+
+MANIFEST_PATH = ".cache/manifest.json"
+LEGACY_PATH = "public/_logs/manifest.json"  # ubicacion antigua: se lee una vez y se borra al guardar
+
+def input_hash(*parts):
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def source_hash(*paths):
+    h = hashlib.sha256()
+    for p in paths:
+        with open(p, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+class BuildManifest:
+    def __init__(self, version, path=MANIFEST_PATH, root="public"):
+        self.version = version
+        self.path = path
+        self.root = root
+        self.pages = {}
+        self.seen = set()
+        self.counts = {"built": 0, "skipped": 0, "deleted": 0}
+        self._lock = threading.Lock()
+        try:
+            with open(path if os.path.exists(path) else LEGACY_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == version:  # otra version del generador: se reconstruye todo
+                self.pages = data.get("pages", {})
+        except Exception:
+            pass
+
+    def stale(self, path, inputs):
+        # hash de las entradas si hay que (re)generar path; None si esta al dia
+        h = input_hash(self.version, inputs)
+        path = path.lstrip("/")
+        with self._lock:
+            self.seen.add(path)
+            if self.pages.get(path) == h and os.path.exists(os.path.join(self.root, path)):
+                self.counts["skipped"] += 1
+                return None
+        return h
+
+    def done(self, path, h):
+        # para escrituras diferidas (RenderPool): se registra al encargar el render
+        with self._lock:
+            self.pages[path.lstrip("/")] = h
+            self.counts["built"] += 1
+
+    def keep(self, path):
+        with self._lock:
+            self.seen.add(path.lstrip("/"))
+
+    def part(self):
+        # paginas vistas en este run con su hash: el manifest parcial de una parte
+        with self._lock:
+            return {p: self.pages[p] for p in sorted(self.seen) if p in self.pages}
+
+    def merge(self, pages, counts=None):
+        # manifest parcial de otra parte: sus paginas cuentan como vistas (no se podan)
+        with self._lock:
+            self.pages.update(pages)
+            self.seen.update(pages)
+            for k, v in (counts or {}).items():
+                self.counts[k] = self.counts.get(k, 0) + v
+
+    def prune(self):
+        deleted = []
+        for path in sorted(set(self.pages) - self.seen):
+            full = os.path.join(self.root, path)
+            if os.path.exists(full):
+                remove_with_siblings(full)
+                d = os.path.dirname(full)
+                while d != self.root and os.path.isdir(d) and not os.listdir(d):
+                    os.rmdir(d); d = os.path.dirname(d)
+            del self.pages[path]
+            self.counts["deleted"] += 1
+            deleted.append(path)
+        return deleted
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "counts": self.counts, "pages": self.pages}, f,
+                      ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        if os.path.exists(LEGACY_PATH) and os.path.abspath(LEGACY_PATH) != os.path.abspath(self.path):
+            os.remove(LEGACY_PATH)
+
+    def summary(self):
+        c = self.counts
+        return f"manifest: {c['built']} generadas, {c['skipped']} sin cambios, {c['deleted']} eliminadas"
@@ -0,0 +1,135 @@
+# automation/metrics.py
+# Instrumentacion ligera comun a los generadores.
+# - span(nombre, **etiquetas): tiempo por etapa (n, total, max) y las N
+#   llamadas mas lentas con sus etiquetas (keyword, slug, url...).
+# - incr(nombre, n): contadores (llamadas, reintentos, cache, bytes, fallbacks).
+# - error(etapa, exc, **etiquetas): lista de errores del run (no solo el ultimo).
+# - finish(): escribe .cache/runs/run_<generador>.json. Fuera de public/: lleva
+#   horas y duraciones de cada run, y un build sin cambios no debe cambiar el sitio.
+# - start(): cada run empieza de cero (varios builds en el mismo proceso no
+#   suman etapas, contadores ni errores).
+# AUTONICHO_PROFILE=1 (entorno del build) activa cProfile y vuelca
+# .cache/profile/<generador>.prof (y las funciones mas costosas en el informe).
+
+import os, io, json, time, heapq, pstats, cProfile, datetime, threading, itertools
+from contextlib import contextmanager
+
+LOG_DIR = ".cache/runs"
+PROFILE_DIR = ".cache/profile"
+SLOWEST = 10       # spans mas lentos guardados por etapa
+MAX_ERRORS = 200
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self.reset()
+
+    def reset(self, name=""):
+        with self._lock:
+            self.name = name
+            self.started = time.time()
+            self._t0 = time.perf_counter()
+            self.stages = {}    # nombre -> {"n", "total", "max", "slowest": heap[(s, seq, etiquetas)]}
+            self.counters = {}
+            self.errors = []
+            self._profiler = None
+            self.profile_dir = PROFILE_DIR
+
+    @contextmanager
+    def span(self, name, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t, labels)
+
+    def observe(self, name, seconds, labels=None):
+        with self._lock:
+            st = self.stages.setdefault(name, {"n": 0, "total": 0.0, "max": 0.0, "slowest": []})
+            st["n"] += 1; st["total"] += seconds; st["max"] = max(st["max"], seconds)
+            item = (seconds, next(self._seq), labels or {})
+            if len(st["slowest"]) < SLOWEST:
+                heapq.heappush(st["slowest"], item)
+            elif seconds > st["slowest"][0][0]:
+                heapq.heapreplace(st["slowest"], item)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, stage, exc, **labels):
+        with self._lock:
+            self.counters["errors"] = self.counters.get("errors", 0) + 1
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append({"at": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                    "stage": stage, "error": str(exc)[:300], **labels})
+
+    # --------- Informe ----------
+    def report(self):
+        with self._lock:
+            stages = {
+                name: {"n": st["n"], "total_s": round(st["total"], 4), "max_s": round(st["max"], 4),
+                       "avg_s": round(st["total"] / st["n"], 4) if st["n"] else 0.0,
+                       "slowest": [dict(s=round(s, 4), **lab) for s, _, lab in sorted(st["slowest"], reverse=True)]}
+                for name, st in sorted(self.stages.items(), key=lambda kv: -kv[1]["total"])
+            }
+            return {
+                "generator": self.name,
+                "started": datetime.datetime.utcfromtimestamp(self.started).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "duration_s": round(time.perf_counter() - self._t0, 4),
+                "stages": stages, "counters": dict(sorted(self.counters.items())), "errors": list(self.errors),
+            }
+
+    def start_profile(self):
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profile(self, path, top=30):
+        p, self._profiler = self._profiler, None
+        p.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        p.dump_stats(path)
+        buf = io.StringIO()
+        pstats.Stats(p, stream=buf).sort_stats("cumulative").print_stats(top)
+        return buf.getvalue().splitlines()
+
+METRICS = Metrics()
+
+def span(name, **labels):
+    return METRICS.span(name, **labels)
+
+def observe(name, seconds, labels=None):
+    METRICS.observe(name, seconds, labels)
+
+def incr(name, n=1):
+    METRICS.incr(name, n)
+
+def error(stage, exc, **labels):
+    METRICS.error(stage, exc, **labels)
+
+def start(name, profile=False, profile_dir=PROFILE_DIR):
+    # al principio del run (BuildContext.start): todo lo anterior se descarta
+    if METRICS._profiler is not None:
+        METRICS._profiler.disable()
+    METRICS.reset(name)
+    METRICS.profile_dir = profile_dir
+    if profile:
+        METRICS.start_profile()
+
+def finish(log_dir=LOG_DIR):
+    rep = METRICS.report()
+    if METRICS._profiler is not None:
+        path = os.path.join(METRICS.profile_dir, f"{METRICS.name or 'run'}.prof")
+        rep["profile"] = {"path": path, "top": METRICS.stop_profile(path)}
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, f"run_{METRICS.name or 'run'}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(rep, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+    return rep
+
+def summary(rep, n=5):
+    # linea corta para el log del workflow: etapas mas costosas
+    top = ", ".join(f"{k} {v['total_s']:.2f}s/{v['n']}" for k, v in list(rep["stages"].items())[:n])
+    return f"tiempos: {rep['duration_s']:.2f}s total; {top}; {rep['counters'].get('errors', 0)} errores"
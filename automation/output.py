@@ -0,0 +1,264 @@
+# automation/output.py
+# Etapa de salida comun a los generadores: todo lo que se escribe en public/
+# pasa por aqui.
+# - Minifica HTML (sin tocar <script> -JSON-LD incluido-, <pre>, <textarea>)
+#   y CSS.
+# - Genera hermanos .gz y .br (si esta instalado brotli) de los ficheros de
+#   texto, solo cuando el contenido cambia.
+# - Escritura atomica (temporal + rename); si el contenido es identico al
+#   publicado no se toca el fichero (ni su mtime): git y Pages no ven cambios.
+# - open(): escritura en streaming para ficheros grandes (sitemaps): sha256 al
+#   vuelo y .gz/.br comprimiendo por bloques; nunca se carga el fichero entero.
+# - Cuenta bytes originales / minificados / comprimidos para el informe.
+
+import os, re, gzip, zlib, hashlib, threading
+from automation import metrics
+
+try:
+    import brotli  # opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+MINIFY = True        # OUTPUT_MINIFY=0 en el entorno del build (BuildContext) lo apaga
+PRECOMPRESS = True   # OUTPUT_PRECOMPRESS=0, igual
+TEXT_EXT = (".html", ".css", ".js", ".xml", ".txt", ".json", ".svg")
+SIBLINGS = (".gz", ".br")
+
+# --------- Minificado ----------
+_PROTECTED = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.S | re.I)
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_TAGS = re.compile(r"(<[^>]+>)")
+_TAG_NAME = re.compile(r"</?\s*([a-zA-Z0-9]+)")
+_WS = re.compile(r"\s+")
+BLOCK_TAGS = frozenset("""html head body header footer main section article nav aside div p ul ol li
+table thead tbody tfoot tr td th caption h1 h2 h3 h4 h5 h6 meta link title script style figure
+figcaption form br hr""".split())
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_PUNCT = re.compile(r"\s*([{};,>])\s*")
+
+def minify_css(css):
+    css = _CSS_COMMENT.sub("", css)
+    css = _WS.sub(" ", css)
+    css = _CSS_PUNCT.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def _is_block(tag):
+    m = _TAG_NAME.match(tag) if tag else None
+    return bool(m) and m.group(1).lower() in BLOCK_TAGS
+
+def _minify_fragment(html):
+    tokens = _TAGS.split(_COMMENT.sub("", html))
+    out = []
+    for i, tok in enumerate(tokens):
+        if i % 2:  # etiqueta
+            out.append(tok)
+            continue
+        if not tok:
+            continue
+        if tok.isspace():
+            prev = tokens[i - 1] if i > 0 else ""
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else ""
+            # el espacio entre elementos en linea es significativo; junto a bloques no
+            if not (_is_block(prev) or _is_block(nxt) or not prev or not nxt):
+                out.append(" ")
+            continue
+        out.append(_WS.sub(" ", tok))
+    return "".join(out)
+
+def minify_html(html):
+    parts = _PROTECTED.split(html)
+    out = []
+    # split con 2 grupos: [texto, bloque, nombre, texto, bloque, nombre, ...]
+    for i in range(0, len(parts), 3):
+        out.append(_minify_fragment(parts[i]))
+        if i + 1 < len(parts):
+            block, name = parts[i + 1], parts[i + 2].lower()
+            if name == "style":
+                m = re.match(r"(<style\b[^>]*>)(.*?)(</style\s*>)", block, re.S | re.I)
+                block = m.group(1) + minify_css(m.group(2)) + m.group(3)
+            out.append(block)
+    return "".join(out)
+
+# --------- Escritura ----------
+class Output:
+    def __init__(self, root="public", minify=MINIFY, precompress=PRECOMPRESS):
+        self.root = root
+        self.minify = minify
+        self.precompress = precompress
+        self.stats = {"files": 0, "unchanged": 0, "raw": 0, "out": 0, "gz": 0, "br": 0}
+        self.written = None  # set(): rutas escritas en este proceso (parte de un build repartido)
+        self._lock = threading.Lock()
+
+    def transform(self, path, content):
+        if not self.minify or not isinstance(content, str):
+            return content
+        if path.endswith(".html"):
+            return minify_html(content)
+        if path.endswith(".css"):
+            return minify_css(content)
+        return content
+
+    def _count(self, **kw):
+        with self._lock:
+            for k, v in kw.items():
+                self.stats[k] += v
+
+    def _track(self, path):
+        if self.written is not None:
+            with self._lock:
+                self.written.add(path.lstrip("/"))
+
+    def write(self, path, content, binary=False):
+        self._track(path)
+        with metrics.span("write"):
+            return self._write(path, content)
+
+    def _write(self, path, content):
+        full = os.path.join(self.root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        raw = len(content.encode("utf-8")) if isinstance(content, str) else len(content)
+        content = self.transform(full, content)
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        siblings_ok = not (self.precompress and full.endswith(TEXT_EXT)) or os.path.exists(full + ".gz")
+        if siblings_ok and os.path.exists(full) and os.path.getsize(full) == len(data):
+            with open(full, "rb") as f:
+                if f.read() == data:
+                    self._count(unchanged=1); metrics.incr("files_unchanged")
+                    return False
+        atomic_write(full, data)
+        self._count(files=1, raw=raw, out=len(data))
+        metrics.incr("files_written"); metrics.incr("bytes_written", len(data))
+        if self.precompress and full.endswith(TEXT_EXT):
+            self.compress(full, data)
+        return True
+
+    def open(self, path):
+        # Stream hacia path (sin minificar); el destino se puede cambiar en close()
+        return Stream(self, path)
+
+    def write_stream(self, path, chunks):
+        # chunks: iterable de str (Template.generate()). El minificado HTML/CSS necesita la
+        # pagina entera: se junta y va por write(). Sin minificar va a disco trozo a trozo
+        if self.minify and path.endswith((".html", ".css")):
+            return self.write(path, "".join(chunks))
+        with self.open(path) as f:
+            for chunk in chunks:
+                f.write(chunk)
+        return f.changed
+
+    def merge(self, stats):
+        # contadores de escrituras hechas en otro proceso (RenderPool)
+        self._count(**stats)
+        metrics.incr("files_written", stats.get("files", 0)); metrics.incr("files_unchanged", stats.get("unchanged", 0))
+        metrics.incr("bytes_written", stats.get("out", 0))
+
+    def compress(self, full, data=None):
+        if data is None:
+            return self._compress_file(full)
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        atomic_write(full + ".gz", gz)
+        self._count(gz=len(gz))
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            atomic_write(full + ".br", br)
+            self._count(br=len(br))
+
+    def _compress_file(self, full):
+        # como compress() pero leyendo por bloques: memoria constante con un sitemap de 50 MB.
+        # compressobj(9, DEFLATED, 31) da los mismos bytes que gzip.compress(..., 9, mtime=0)
+        codecs = [(".gz", "gz", zlib.compressobj(9, zlib.DEFLATED, 31))]
+        if brotli is not None:
+            codecs.append((".br", "br", brotli.Compressor(quality=11)))
+        for ext, key, c in codecs:
+            tmp, size = f"{full}{ext}.{os.getpid()}.{threading.get_ident()}.tmp", 0
+            step, end = (c.compress, c.flush) if key == "gz" else (c.process, c.finish)
+            with open(full, "rb") as src, open(tmp, "wb") as f:
+                for block in iter(lambda: src.read(1 << 16), b""):
+                    z = step(block); f.write(z); size += len(z)
+                z = end(); f.write(z); size += len(z)
+            os.replace(tmp, full + ext)
+            self._count(**{key: size})
+
+    def summary(self):
+        s = self.stats
+        kb = lambda n: f"{n / 1024:.1f} KB"
+        line = (f"salida: {s['files']} ficheros escritos, {s['unchanged']} sin cambios, "
+                f"{kb(s['raw'])} -> {kb(s['out'])} minificado ({kb(s['raw'] - s['out'])} ahorrados)")
+        if self.precompress:
+            line += f", gz {kb(s['gz'])}" + (f", br {kb(s['br'])}" if brotli is not None else "")
+        return line
+
+class Stream:
+    # Fichero escrito trozo a trozo en un temporal junto al destino, con su sha256 al vuelo.
+    # close() lo publica como write(): si es identico al publicado se descarta (ni mtime
+    # ni .gz/.br cambian); si no, rename y hermanos comprimidos por bloques
+    def __init__(self, output, path):
+        self.output = output
+        self.path = path
+        full = os.path.join(output.root, path.lstrip("/"))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        self.tmp = f"{full}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.size = 0
+        self.changed = None  # tras close(): True si se publico, False si era identico
+        self._h = hashlib.sha256()
+        self._f = open(self.tmp, "wb")
+
+    def write(self, text):
+        b = text.encode("utf-8")
+        self._h.update(b); self._f.write(b); self.size += len(b)
+
+    def close(self, path=None):
+        # path: otro destino (p.ej. sitemap-1.xml que resulta ser el unico, sitemap.xml)
+        out, self.path = self.output, path or self.path
+        self._f.close()
+        out._track(self.path)
+        full = os.path.join(out.root, self.path.lstrip("/"))
+        with metrics.span("write"):
+            siblings_ok = not (out.precompress and full.endswith(TEXT_EXT)) or os.path.exists(full + ".gz")
+            if siblings_ok and os.path.exists(full) and os.path.getsize(full) == self.size and file_hash(full) == self._h.digest():
+                os.remove(self.tmp)
+                out._count(unchanged=1); metrics.incr("files_unchanged")
+                self.changed = False
+                return False
+            os.replace(self.tmp, full)
+            out._count(files=1, raw=self.size, out=self.size)
+            metrics.incr("files_written"); metrics.incr("bytes_written", self.size)
+            if out.precompress and full.endswith(TEXT_EXT):
+                out.compress(full)
+            self.changed = True
+            return True
+
+    def abort(self):
+        self._f.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        # con error se descarta el temporal; si no, se publica (si no se cerro ya)
+        if exc_type is not None:
+            self.abort()
+        elif not self._f.closed:
+            self.close()
+
+def file_hash(full, bufsize=1 << 16):
+    h = hashlib.sha256()
+    with open(full, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.digest()
+
+def atomic_write(full, data):
+    # un lector (o un deploy a medias) nunca ve el fichero a medio escribir
+    tmp = f"{full}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, full)
+
+def remove_with_siblings(full):
+    for p in (full,) + tuple(full + ext for ext in SIBLINGS):
+        if os.path.exists(p):
+            os.remove(p)
@@ -1,15 +1,41 @@
 # automation/paapi.py
-import hashlib, hmac, datetime, json, requests, os
+# Cliente unico de PA-API v5 para los tres generadores: firma SigV4,
+# sesion HTTP keep-alive con pool de conexiones y cache en disco.
+import hashlib, hmac, datetime, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from automation.ratelimit import rate_limiter
+from automation import metrics
 
 AWS_REGION = "eu-west-1"
 HOST = "webservices.amazon.es"
 SERVICE = "ProductAdvertisingAPI"
 
-ACCESS_KEY = os.environ.get("AMAZON_ACCESS_KEY", "")
-SECRET_KEY = os.environ.get("AMAZON_SECRET_KEY", "")
-PARTNER_TAG = os.environ.get("AMAZON_PARTNER_TAG", "")
+GETITEMS_MAX_IDS = 10   # limite de PA-API por llamada GetItems
+GETITEMS_WORKERS = 4
+POOL_SIZE = 8
+MAX_RETRIES = 4
+RETRY_STATUS = (429, 503)
 
-def _sign(key, msg): 
+OFFER_RESOURCES = [
+    "Offers.Listings.Price",
+    "Offers.Listings.Availability",
+]
+DEFAULT_RESOURCES = [
+    "Images.Primary.Medium",
+    "ItemInfo.Title",
+    "ItemInfo.Features",
+    "Offers.Listings.Price",
+    "Offers.Listings.Availability",
+]
+TARGET_PREFIX = "com.amazon.paapi5.v1.ProductAdvertisingAPIv1."
+
+class PaapiError(RuntimeError):
+    def __init__(self, status, text):
+        super().__init__(f"PA-API {status}: {text[:180]}")
+        self.status = status
+
+def _sign(key, msg):
     return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
 
 def _sig_key(key, dateStamp, regionName, serviceName):
@@ -19,91 +45,173 @@ def _sig_key(key, dateStamp, regionName, serviceName):
     kSigning = _sign(kService, "aws4_request")
     return kSigning
 
-def _call(path, payload, amz_target):
-    now = datetime.datetime.utcnow()
-    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
-    date_stamp = now.strftime("%Y%m%d")
-    endpoint = f"https://{HOST}{path}"
-    body = json.dumps(payload)
-
-    # --- Canonical request (incluye x-amz-target) ---
-    canonical_uri = path
-    canonical_querystring = ""
-    canonical_headers = (
-        "content-encoding:amz-1.0\n"
-        "content-type:application/json; charset=utf-8\n"
-        f"host:{HOST}\n"
-        f"x-amz-date:{amz_date}\n"
-        f"x-amz-target:{amz_target}\n"
-    )
-    signed_headers = "content-encoding;content-type;host;x-amz-date;x-amz-target"
-    payload_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
-    canonical_request = (
-        "POST\n{}\n{}\n{}\n{}\n{}".format(
-            canonical_uri,
-            canonical_querystring,
-            canonical_headers,
-            signed_headers,
-            payload_hash,
+class PaapiClient:
+    def __init__(self, access_key: str, secret_key: str, partner_tag: str,
+                 host: str = HOST, region: str = AWS_REGION, timeout: float = 30, limiter=None, endpoint: str = "",
+                 cache=None):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.partner_tag = partner_tag
+        self.host = host
+        self.endpoint = endpoint or f"https://{host}"  # p.ej. http://127.0.0.1:8765 (bench/fakeapi.py)
+        self.region = region
+        self.timeout = timeout
+        self.limiter = limiter or rate_limiter()
+        self.cache = cache  # PaapiCache o None (sin cache en disco)
+        import requests  # al crear el primer cliente, no al importar
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._key = (None, None)  # (date_stamp, signing_key)
+        self._key_lock = threading.Lock()
+
+    def _signing_key(self, date_stamp):
+        # La clave derivada solo cambia con la fecha: 4 HMAC al dia en vez de por llamada
+        with self._key_lock:
+            if self._key[0] != date_stamp:
+                self._key = (date_stamp, _sig_key(self.secret_key, date_stamp, self.region, SERVICE))
+            return self._key[1]
+
+    def _headers(self, path, body, amz_target):
+        now = datetime.datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date_stamp = now.strftime("%Y%m%d")
+
+        # --- Canonical request (incluye x-amz-target) ---
+        canonical_headers = (
+            "content-encoding:amz-1.0\n"
+            "content-type:application/json; charset=utf-8\n"
+            f"host:{self.host}\n"
+            f"x-amz-date:{amz_date}\n"
+            f"x-amz-target:{amz_target}\n"
         )
-    )
-
-    # --- String to sign ---
-    algorithm = "AWS4-HMAC-SHA256"
-    credential_scope = f"{date_stamp}/{AWS_REGION}/{SERVICE}/aws4_request"
-    string_to_sign = "{}\n{}\n{}\n{}".format(
-        algorithm,
-        amz_date,
-        credential_scope,
-        hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
-    )
-
-    signing_key = _sig_key(SECRET_KEY, date_stamp, AWS_REGION, SERVICE)
-    signature = hmac.new(signing_key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
-
-    headers = {
-        "content-encoding": "amz-1.0",
-        "content-type": "application/json; charset=utf-8",
-        "x-amz-date": amz_date,
-        "x-amz-target": amz_target,
-        "Authorization": f"{algorithm} Credential={ACCESS_KEY}/{credential_scope}, SignedHeaders={signed_headers}, Signature={signature}",
-        "Accept": "application/json",
-    }
-
-    r = requests.post(endpoint, data=body, headers=headers, timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-def paapi_get_items(asins):
-    payload = {
-        "ItemIds": asins,
-        "PartnerTag": PARTNER_TAG,
-        "PartnerType": "Associates",
-        "Resources": [
-            "Images.Primary.Medium",
-            "ItemInfo.Title",
-            "ItemInfo.Features",
-            "Offers.Listings.Price",
-            "Offers.Listings.Availability",
-        ],
-    }
-    target = "com.amazon.paapi5.v1.ProductAdvertisingAPIv1.GetItems"
-    return _call("/paapi5/getitems", payload, target)
-
-def paapi_search_items(keywords, item_count=10):
-    payload = {
-        "Keywords": keywords,
-        "SearchIndex": "All",
-        "ItemCount": item_count,
-        "PartnerTag": PARTNER_TAG,
-        "PartnerType": "Associates",
-        "Resources": [
-            "Images.Primary.Medium",
-            "ItemInfo.Title",
-            "ItemInfo.Features",
-            "Offers.Listings.Price",
-            "Offers.Listings.Availability",
-        ],
-    }
-    target = "com.amazon.paapi5.v1.ProductAdvertisingAPIv1.SearchItems"
-    return _call("/paapi5/searchitems", payload, target)
+        signed_headers = "content-encoding;content-type;host;x-amz-date;x-amz-target"
+        payload_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        canonical_request = f"POST\n{path}\n\n{canonical_headers}\n{signed_headers}\n{payload_hash}"
+
+        # --- String to sign ---
+        algorithm = "AWS4-HMAC-SHA256"
+        credential_scope = f"{date_stamp}/{self.region}/{SERVICE}/aws4_request"
+        string_to_sign = "{}\n{}\n{}\n{}".format(
+            algorithm,
+            amz_date,
+            credential_scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        )
+        signature = hmac.new(self._signing_key(date_stamp), string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        return {
+            "content-encoding": "amz-1.0",
+            "content-type": "application/json; charset=utf-8",
+            "x-amz-date": amz_date,
+            "x-amz-target": amz_target,
+            "Authorization": f"{algorithm} Credential={self.access_key}/{credential_scope}, SignedHeaders={signed_headers}, Signature={signature}",
+            "Accept": "application/json",
+        }
+
+    def _request(self, path, payload, amz_target):
+        if not self.access_key or not self.secret_key:
+            raise PaapiError(0, "keys missing")
+        body = json.dumps(payload, separators=(",", ":"))
+        op = amz_target[len(TARGET_PREFIX):]
+        for attempt in range(MAX_RETRIES + 1):
+            waited = self.limiter.acquire()
+            if waited:
+                metrics.observe("ratelimit.wait", waited, {"op": op})
+            metrics.incr("paapi.requests")
+            with metrics.span("paapi.http", op=op):
+                r = self.session.post(f"{self.endpoint}{path}", data=body,
+                                      headers=self._headers(path, body, amz_target), timeout=self.timeout)
+            if r.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                metrics.incr("paapi.retries"); metrics.incr(f"paapi.status_{r.status_code}")
+                self.limiter.penalize(self.limiter.backoff(attempt, r.headers.get("Retry-After")))
+                continue
+            if r.status_code >= 400:
+                metrics.incr(f"paapi.status_{r.status_code}")
+                raise PaapiError(r.status_code, r.text)
+            return r.json()
+
+    def call(self, operation: str, payload: dict, max_age: Optional[float] = None) -> dict:
+        path = f"/paapi5/{operation.lower()}"
+        labels = {"keywords": payload["Keywords"]} if "Keywords" in payload else {"ids": len(payload.get("ItemIds", []))}
+        with metrics.span(f"paapi.{operation}", **labels):
+            fetch = lambda: self._request(path, payload, TARGET_PREFIX + operation)
+            if self.cache is None:
+                return fetch()
+            return self.cache.fetch(operation, payload, fetch, marketplace=self.host, max_age=max_age)
+
+    def _get_items_chunk(self, asins, resources, max_age=None):
+        payload = {
+            "ItemIds": asins,
+            "PartnerTag": self.partner_tag,
+            "PartnerType": "Associates",
+            "Resources": list(resources),
+        }
+        return self.call("GetItems", payload, max_age)
+
+    def get_items(self, asins: Sequence[str], resources: Optional[Sequence[str]] = None,
+                  max_workers: int = GETITEMS_WORKERS, max_age: Optional[float] = None) -> dict:
+        # Trocea en lotes de 10 ItemIds, los lanza en paralelo y fusiona
+        # ItemsResult.Items y Errors respetando el orden de entrada.
+        resources = resources or DEFAULT_RESOURCES
+        asins = list(dict.fromkeys(a for a in asins if a))
+        chunks = [asins[i:i + GETITEMS_MAX_IDS] for i in range(0, len(asins), GETITEMS_MAX_IDS)]
+        if not chunks:
+            return {}
+
+        def run(chunk):
+            try:
+                return chunk, self._get_items_chunk(chunk, resources, max_age), None
+            except Exception as e:
+                return chunk, None, e
+
+        workers = max(1, min(max_workers, len(chunks)))
+        if workers == 1:
+            results = [run(c) for c in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, chunks))
+
+        failed = [e for _, res, e in results if e is not None]
+        if len(failed) == len(results):
+            raise failed[0]  # mismo comportamiento que antes: el llamador decide el fallback
+
+        by_asin: Dict[str, dict] = {}
+        errors: List[dict] = []
+        for chunk, res, exc in results:
+            if exc is not None:
+                errors += [{"Code": "ChunkFailed", "Message": f"{a}: {exc}"} for a in chunk]
+                continue
+            for it in res.get("ItemsResult", {}).get("Items", []):
+                if it.get("ASIN"):
+                    by_asin[it["ASIN"]] = it
+            errors += res.get("Errors", [])
+        out = {"ItemsResult": {"Items": [by_asin[a] for a in asins if a in by_asin]}}
+        if errors:
+            out["Errors"] = errors
+        return out
+
+    def search_items(self, keywords: str, item_count: int = 10, search_index: str = "All",
+                     resources: Optional[Sequence[str]] = None) -> dict:
+        payload = {
+            "Keywords": keywords,
+            "SearchIndex": search_index,
+            "ItemCount": item_count,
+            "PartnerTag": self.partner_tag,
+            "PartnerType": "Associates",
+            "Resources": list(resources or DEFAULT_RESOURCES),
+        }
+        return self.call("SearchItems", payload)
+
+_clients: Dict[tuple, PaapiClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(access_key: str, secret_key: str, partner_tag: str, endpoint: str = "", cache=None) -> PaapiClient:
+    # Un cliente (y una sesion keep-alive) por juego de credenciales, endpoint, cache y proceso
+    key = (access_key, secret_key, partner_tag, endpoint, cache.path if cache is not None else None)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = PaapiClient(access_key, secret_key, partner_tag, endpoint=endpoint, cache=cache)
+        return _clients[key]
@@ -0,0 +1,116 @@
+# automation/postindex.py
+# Indice persistente de paginas publicadas (.cache/posts.json):
+# slug, titulo, descripcion, categoria, tipo y fechas de alta/actualizacion.
+# Se actualiza al escribir cada pagina; listar posts es leer un solo fichero
+# en vez de recorrer public/ y abrir cada index.html.
+# Fuera de public/: no se publica y la cache de CI lo conserva. Al cargar se
+# quitan las entradas cuyo index.html no esta en root (indice restaurado de
+# otro run o de otro workflow con otro public/).
+
+import os, re, json, datetime, threading
+from automation import clock
+
+INDEX_PATH = ".cache/posts.json"
+LEGACY_PATH = "public/_logs/posts.json"  # ubicacion antigua: se lee una vez y se borra al guardar
+
+_H1 = re.compile(r"<h1>(.*?)</h1>", re.S)
+_P = re.compile(r"<p>(.*?)</p>", re.S)
+
+def _today():
+    return clock.today()
+
+def describe(text, n=160):
+    return (text[:n] + "...") if text else ""
+
+class PostIndex:
+    def __init__(self, path=INDEX_PATH, root="public", migrate=True):
+        # migrate=False: sin indice se empieza vacio en vez de escanear public/. Lo usan las
+        # partes de un build repartido: en el mismo arbol, otra parte puede haber escrito ya paginas
+        self.path = path
+        self.root = root
+        self.entries = {}
+        self._lock = threading.Lock()
+        src = path if os.path.exists(path) else LEGACY_PATH
+        if os.path.exists(src):
+            try:
+                with open(src, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("posts", {})
+                self.entries = {s: e for s, e in self.entries.items()
+                                if os.path.exists(os.path.join(root, s, "index.html"))}
+            except Exception:
+                if migrate: self.rebuild()
+        elif migrate:
+            self.rebuild()
+
+    def rebuild(self):
+        # Migracion unica: indexa lo que ya hay publicado con el escaneo antiguo
+        self.entries = {}
+        for root, _, files in os.walk(self.root):
+            if "index.html" not in files:
+                continue
+            slug = os.path.relpath(root, self.root).replace(os.sep, "/")
+            slug = "" if slug == "." else slug
+            txt = open(os.path.join(root, "index.html"), "r", encoding="utf-8").read()
+            t = _H1.search(txt); d = _P.search(txt)
+            mtime = datetime.datetime.utcfromtimestamp(os.path.getmtime(os.path.join(root, "index.html"))).strftime("%Y-%m-%d")
+            self.entries[slug] = {
+                "title": t.group(1) if t else slug, "description": describe(d.group(1) if d else ""),
+                "category": slug.split("/")[0] if "/" in slug else "",
+                "kind": "home" if not slug else ("post" if "/" in slug else "page"),
+                "created": mtime, "updated": mtime,
+            }
+
+    def upsert(self, slug, title, description="", category="", kind="post", touched=True):
+        # touched=False: la pagina sigue publicada pero hoy no se reescribio
+        slug = slug.strip("/")
+        today = _today()
+        with self._lock:
+            e = self.entries.get(slug) or {"created": today, "updated": today}
+            e.update(title=title, description=description, category=category, kind=kind)
+            if touched:
+                e["updated"] = today
+            self.entries[slug] = e
+
+    def touch(self, slug):
+        # la pagina cambio sin re-renderizarse (p.ej. refresco de precios)
+        with self._lock:
+            e = self.entries.get(slug.strip("/"))
+            if e is not None:
+                e["updated"] = _today()
+
+    def merge(self, entries):
+        # entradas escritas por otra parte de un build repartido
+        with self._lock:
+            self.entries.update(entries)
+
+    def remove(self, slug):
+        with self._lock:
+            self.entries.pop(slug.strip("/"), None)
+
+    def __contains__(self, slug):
+        return slug.strip("/") in self.entries
+
+    def slugs(self, kind=None):
+        return sorted(s for s, e in self.entries.items() if kind is None or e.get("kind") == kind)
+
+    def posts(self, kind=None):
+        # [(slug, title, description)] ordenado por slug, como el antiguo load_posts_list
+        return [(s, self.entries[s]["title"], self.entries[s]["description"]) for s in self.slugs(kind) if s]
+
+    def recent(self, n=10, kind="post"):
+        rows = [(e["created"], s, e["title"]) for s, e in self.entries.items() if e.get("kind") == kind]
+        return [(s, t, d) for d, s, t in sorted(rows, reverse=True)[:n]]
+
+    def get(self, slug):
+        return self.entries.get(slug.strip("/"))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            data = {"posts": self.entries}
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        if os.path.exists(LEGACY_PATH) and os.path.abspath(LEGACY_PATH) != os.path.abspath(self.path):
+            os.remove(LEGACY_PATH)
@@ -0,0 +1,149 @@
+# automation/prices.py
+# Modo --refresh-prices: actualiza solo precio y disponibilidad de las paginas
+# ya publicadas, sin re-renderizarlas.
+# 1) Recorre el HTML publicado y recoge los ASIN de <span class='bb-price' id='price-ASIN'>.
+# 2) GetItems por lotes pidiendo solo los recursos Offers.*
+# 3) Sustituye en el sitio el contenido de los spans price-/avail- de cada ASIN.
+# Ademas publica prices/<categoria>.<hash>.json (ASIN -> [precio, disponibilidad, ts])
+# con prices/index.json como puntero: static/buybox.js parchea los precios en el
+# navegador y refrescarlos es reescribir unos KB de JSON, no el HTML.
+
+import os, re, json, hashlib
+from automation.paapi import OFFER_RESOURCES
+from automation.product import iter_products
+from automation.output import remove_with_siblings
+from automation import clock
+from automation.tables import escape
+
+PRICE_MAX_AGE = 3600  # s: respuestas de cache validas para el refresco (PRICE_MAX_AGE en el entorno del build)
+SHARD_DIR = "prices"
+SHARD_INDEX = f"{SHARD_DIR}/index.json"
+
+_PRICE = re.compile(r"(<span class='bb-price' id='price-([A-Z0-9]{10})'>)(.*?)(</span>)", re.S)
+_AVAIL = re.compile(r"(<span class='bb-avail' id='avail-([A-Z0-9]{10})'>)(.*?)(</span>)", re.S)
+
+def published_asins(root="public"):
+    # {ruta relativa: {ASIN}} de las paginas con precios (solo los ASIN, no el HTML)
+    out = {}
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            if not f.endswith(".html"):
+                continue
+            full = os.path.join(dirpath, f)
+            with open(full, "r", encoding="utf-8") as fh:
+                txt = fh.read()
+            asins = {m.group(2) for m in _PRICE.finditer(txt)}
+            if asins:
+                out[os.path.relpath(full, root).replace(os.sep, "/")] = asins
+    return out
+
+def category_of(path):
+    # "slug/index.html" -> "slug"; la home y sueltos van a "_home"
+    return path.split("/")[0] if "/" in path else "_home"
+
+def group_by_category(pages):
+    groups = {}
+    for path, asins in pages.items():
+        groups.setdefault(category_of(path), set()).update(asins)
+    return groups
+
+def fetch_offers(client, asins, max_age=PRICE_MAX_AGE):
+    res = client.get_items(sorted(asins), resources=OFFER_RESOURCES, max_age=max_age)
+    return {p.asin: p.offer for p in iter_products(res)}
+
+def patch_html(txt, offers):
+    def sub(idx):
+        def repl(m):
+            asin = m.group(2)
+            if asin not in offers:
+                return m.group(0)  # sin datos nuevos: se deja como estaba
+            return m.group(1) + escape(offers[asin][idx]) + m.group(4)  # mismo escape que tables.price_cell/avail_cell
+        return repl
+    return _AVAIL.sub(sub(1), _PRICE.sub(sub(0), txt))
+
+# --------- Shards JSON ----------
+def _load_json(full):
+    try:
+        with open(full, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_shards(root="public"):
+    # (puntero actual {categoria: fichero}, {categoria: {ASIN: [precio, disp, ts]}})
+    pointer = (_load_json(os.path.join(root, SHARD_INDEX)) or {}).get("shards", {})
+    shards = {}
+    for cat, fname in pointer.items():
+        data = _load_json(os.path.join(root, SHARD_DIR, fname))
+        if data:
+            shards[cat] = data.get("p", {})
+    return pointer, shards
+
+def write_price_shards(write, offers, groups=None, root="public", now=None):
+    # groups {categoria: {ASIN}} sustituye la lista de ASIN de esas categorias;
+    # las demas conservan la del shard anterior. ts solo cambia si cambia el
+    # precio o la disponibilidad, asi un shard sin cambios mantiene su hash.
+    now = int(now if now is not None else clock.timestamp())
+    old_pointer, old = load_shards(root)
+    members = {cat: set(p) for cat, p in old.items()}
+    members.update({cat: set(a) for cat, a in (groups or {}).items()})
+    pointer, changed = {}, 0
+    for cat in sorted(members):
+        prev = old.get(cat, {})
+        p = {}
+        for asin in sorted(members[cat]):
+            if asin in offers:
+                price, avail = offers[asin]
+                ts = prev[asin][2] if asin in prev and prev[asin][:2] == [price, avail] else now
+                p[asin] = [price, avail, ts]
+            elif asin in prev:
+                p[asin] = prev[asin]
+        if not p:
+            continue
+        body = json.dumps({"c": cat, "p": p}, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        fname = f"{cat}.{hashlib.sha1(body.encode('utf-8')).hexdigest()[:10]}.json"
+        pointer[cat] = fname
+        if fname != old_pointer.get(cat):
+            write(f"{SHARD_DIR}/{fname}", body)
+            changed += 1
+    write(SHARD_INDEX, json.dumps({"shards": pointer}, sort_keys=True, separators=(",", ":")))
+    # se conserva la generacion anterior para clientes con el index.json viejo en cache
+    keep = set(pointer.values()) | set(old_pointer.values()) | {"index.json"}
+    d = os.path.join(root, SHARD_DIR)
+    for f in os.listdir(d) if os.path.isdir(d) else []:
+        if f.endswith(".json") and f not in keep:
+            remove_with_siblings(os.path.join(d, f))
+    return {"shards": len(pointer), "changed": changed}
+
+def refresh_shards(client, write, root="public", max_age=PRICE_MAX_AGE):
+    # Solo JSON: ASIN de los shards publicados (o del HTML si aun no hay)
+    _, shards = load_shards(root)
+    groups = {cat: set(p) for cat, p in shards.items()} or group_by_category(published_asins(root))
+    asins = set().union(*groups.values()) if groups else set()
+    offers = fetch_offers(client, asins, max_age) if asins else {}
+    stats = write_price_shards(write, offers, groups, root)
+    stats.update(asins=len(asins), offers=len(offers))
+    return stats
+
+def refresh_prices(client, write, root="public", index=None, max_age=PRICE_MAX_AGE):
+    # write(path, contenido) es el write() del generador (minificado + .gz/.br)
+    pages = published_asins(root)
+    asins = set().union(*pages.values()) if pages else set()
+    if not asins:
+        return {"pages": 0, "asins": 0, "offers": 0, "patched": 0, "paths": []}
+    offers = fetch_offers(client, asins, max_age)
+    patched = []
+    for path, page_asins in pages.items():
+        if not page_asins & offers.keys():
+            continue
+        with open(os.path.join(root, path), "r", encoding="utf-8") as fh:
+            txt = fh.read()
+        new = patch_html(txt, offers)
+        if new != txt:
+            write(path, new)
+            patched.append(path)
+            if index is not None and path.endswith("index.html"):
+                index.touch(path[:-len("index.html")])
+    stats = write_price_shards(write, offers, group_by_category(pages), root)
+    stats.update(pages=len(pages), asins=len(asins), offers=len(offers), patched=len(patched), paths=sorted(patched))
+    return stats
@@ -0,0 +1,50 @@
+# automation/product.py
+# Producto normalizado de PA-API: lo unico que manejan tablas, JSON-LD y precios.
+# - parse(item) lee cada campo una vez (titulo, bullets, precio, disponibilidad, imagen).
+# - iter_products(respuesta) recorre GetItems (ItemsResult) y SearchItems (SearchResult)
+#   item a item: nadie guarda listas de respuestas crudas.
+# - slots + frozen: pocos bytes por producto y se puede usar como clave/compartir entre hilos.
+
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    asin: str
+    title: str = ""
+    features: Tuple[str, ...] = ()
+    amount: Optional[float] = None     # Price.Amount
+    currency: str = ""
+    price: str = "Consultar"           # Price.DisplayAmount (lo que se muestra)
+    availability: str = ""
+    image: str = ""
+
+    @property
+    def name(self):
+        return self.title or self.asin
+
+    @property
+    def offer(self):
+        return self.price, self.availability
+
+def parse(it) -> Product:
+    info = it.get("ItemInfo") or {}
+    listing = ((it.get("Offers") or {}).get("Listings") or [{}])[0]
+    price = listing.get("Price") or {}
+    amount = price.get("Amount")
+    return Product(
+        asin=it.get("ASIN", ""),
+        title=((info.get("Title") or {}).get("DisplayValue") or "").strip(),
+        features=tuple(f for f in ((info.get("Features") or {}).get("DisplayValues") or []) if isinstance(f, str)),
+        amount=float(amount) if isinstance(amount, (int, float)) else None,
+        currency=price.get("Currency", ""),
+        price=price.get("DisplayAmount", "Consultar"),
+        availability=(listing.get("Availability") or {}).get("Message", ""),
+        image=(((it.get("Images") or {}).get("Primary") or {}).get("Medium") or {}).get("URL", ""),
+    )
+
+def iter_products(response) -> Iterator[Product]:
+    for key in ("ItemsResult", "SearchResult"):
+        for it in ((response or {}).get(key) or {}).get("Items") or ():
+            if it.get("ASIN"):
+                yield parse(it)
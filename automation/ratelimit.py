@@ -0,0 +1,86 @@
+# automation/ratelimit.py
+# Limitador token-bucket compartido por todo el proceso para PA-API.
+# - tps/burst configurables (bootstrap.json: "paapi_tps", "paapi_burst"; si no,
+#   PAAPI_TPS / PAAPI_BURST del entorno del build).
+# - Ante 429/503 el cliente llama a penalize(): todos los hilos esperan
+#   Retry-After o un backoff exponencial con jitter.
+# - stats["waited"] acumula los segundos pasados esperando.
+
+import time, random, threading
+from email.utils import parsedate_to_datetime
+
+DEFAULT_TPS = 1.0    # cuota inicial de PA-API: 1 TPS
+DEFAULT_BURST = 1
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+class TokenBucket:
+    def __init__(self, tps=DEFAULT_TPS, burst=DEFAULT_BURST):
+        self._lock = threading.Lock()
+        self._rng = random.Random()  # no tocar el random global (los generadores lo siembran)
+        self.configure(tps, burst)
+        self.stats = {"acquired": 0, "waited": 0.0, "throttled": 0}
+
+    def configure(self, tps, burst=None):
+        with self._lock:
+            self.tps = max(float(tps), 0.01)
+            self.burst = max(int(burst or 1), 1)
+            self._tokens = float(self.burst)
+            self._stamp = time.monotonic()
+            self._blocked_until = 0.0
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                # durante un bloqueo (penalize) el cubo no se rellena
+                since = max(self._stamp, min(self._blocked_until, now))
+                self._tokens = min(self.burst, self._tokens + (now - since) * self.tps)
+                self._stamp = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats["acquired"] += 1
+                    self.stats["waited"] += waited
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.tps)
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, delay):
+        # Bloquea a todos los hilos y deja un solo token: al desbloquear sale una
+        # peticion y el resto al ritmo tps (tras un 429 no salimos en rafaga)
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._tokens = min(self._tokens, 1.0)
+
+    def backoff(self, attempt, retry_after=None):
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt))
+            delay = delay / 2 + self._rng.uniform(0, delay / 2)
+        return delay
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+_limiter = TokenBucket()
+
+def rate_limiter():
+    return _limiter
+
+def configure_rate_limit(cfg, env=None):
+    # la config manda; si no, el entorno del build (BuildContext.env); si no, la cuota inicial
+    env = env or {}
+    _limiter.configure(cfg.get("paapi_tps", env.get("PAAPI_TPS") or DEFAULT_TPS),
+                       cfg.get("paapi_burst", env.get("PAAPI_BURST") or DEFAULT_BURST))
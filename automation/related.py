@@ -0,0 +1,183 @@
+# automation/related.py
+# Posts relacionados por similitud de texto (TF-IDF de keyword/titulo + categoria).
+# - Tabla precalculada slug -> vecinos en .cache/related.json; las consultas son
+#   un dict lookup.
+# - sync(docs) la pone al dia de forma incremental: solo se comparan los posts
+#   nuevos contra todos; se recalcula entera si cambia mas de REBUILD_RATIO.
+# - Con numpy (opcional: pip install numpy) la similitud sale de una matriz
+#   dispersa (una columna por termino) con operaciones vectorizadas; sin numpy,
+#   indice invertido en Python. Los dos motores dan la misma tabla.
+#   numpy se importa en el primer calculo, no al importar el modulo.
+
+import os, re, json, math, hashlib, unicodedata, threading
+
+np = None       # numpy, tras optional_numpy()
+_np_checked = False
+
+RELATED_PATH = ".cache/related.json"  # RELATED_CACHE_PATH en el entorno del build
+TOP_K = 8
+REBUILD_RATIO = 0.1  # >10% de altas/bajas: el IDF ha cambiado bastante, se recalcula todo
+
+STOPWORDS = frozenset("""de la el los las un una unos unas y o para por con sin en del al a que
+se su sus mas mejor mejores como cual""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def optional_numpy():
+    # numpy o None si no esta instalado; se importa una sola vez
+    global np, _np_checked
+    if not _np_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+        _np_checked = True
+    return np
+
+def fold(text):
+    # minusculas y sin acentos: "Batería" -> "bateria" (la ñ tambien pasa a n)
+    nfkd = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in nfkd if not unicodedata.combining(c))
+
+def tokens(text):
+    return [w for w in _WORD.findall(fold(text)) if w not in STOPWORDS]
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+# --------- Vectores ----------
+def tfidf(docs):
+    # docs {slug: texto} -> {slug: {termino: peso}} normalizado L2
+    tf = {s: {} for s in docs}
+    df = {}
+    for s, text in docs.items():
+        for w in tokens(text):
+            tf[s][w] = tf[s].get(w, 0) + 1
+        for w in tf[s]:
+            df[w] = df.get(w, 0) + 1
+    n = len(docs)
+    vecs = {}
+    for s, counts in tf.items():
+        # los terminos de un solo documento no acercan a nadie: fuera
+        v = {w: (1 + math.log(c)) * (math.log((1 + n) / (1 + df[w])) + 1) for w, c in counts.items() if df[w] > 1}
+        norm = math.sqrt(sum(x * x for x in v.values())) or 1.0
+        vecs[s] = {w: x / norm for w, x in v.items()}
+    return vecs
+
+def _rank(scored, k):
+    # empates por slug: el resultado no depende del orden de entrada ni del motor
+    return sorted(((round(sc, 6), s) for sc, s in scored if sc > 0), key=lambda t: (-t[0], t[1]))[:k]
+
+def _topk_python(queries, cands, vecs, k):
+    index = {}
+    for s in cands:
+        for w, x in vecs[s].items():
+            index.setdefault(w, []).append((s, x))
+    out = {}
+    for q in queries:
+        acc = {}
+        for w, x in vecs[q].items():
+            for s, y in index.get(w, ()):
+                if s != q:
+                    acc[s] = acc.get(s, 0.0) + x * y
+        out[q] = _rank(((sc, s) for s, sc in acc.items()), k)
+    return out
+
+def _topk_numpy(queries, cands, vecs, k):
+    # Matriz dispersa por columnas (una por termino, sin plegar): termino -> (filas de cands, pesos).
+    # Cada consulta junta las columnas de sus terminos y bincount suma por candidato en el mismo
+    # orden que _topk_python (float64): mismos scores, misma tabla. Memoria ~ n de pesos, no n x terminos
+    post = {}
+    for j, s in enumerate(cands):
+        for w, x in vecs[s].items():
+            p = post.get(w)
+            if p is None:
+                p = post[w] = ([], [])
+            p[0].append(j); p[1].append(x)
+    post = {w: (np.array(ix, dtype=np.int64), np.array(v, dtype=np.float64)) for w, (ix, v) in post.items()}
+    pos = {s: j for j, s in enumerate(cands)}
+    out = {}
+    for q in queries:
+        cols = [(post[w], x) for w, x in vecs[q].items() if w in post]
+        if not cols:
+            out[q] = []
+            continue
+        rows, inv = np.unique(np.concatenate([c[0] for c, _ in cols]), return_inverse=True)
+        sims = np.bincount(inv, weights=np.concatenate([c[1] * x for c, x in cols]))
+        if q in pos:
+            sims[rows == pos[q]] = 0.0
+        keep = np.arange(len(rows))
+        if len(rows) > k:  # candidatos a top-k: >= k-esimo score (con margen para los empates de _rank)
+            keep = np.nonzero(sims >= np.partition(sims, -k)[-k] - 1e-6)[0]
+        out[q] = _rank(((float(sims[i]), cands[rows[i]]) for i in keep), k)
+    return out
+
+def topk(queries, cands, vecs, k=TOP_K):
+    queries, cands = list(queries), list(cands)
+    if not queries or not cands:
+        return {q: [] for q in queries}
+    return (_topk_numpy if optional_numpy() is not None else _topk_python)(queries, cands, vecs, k)
+
+# --------- Tabla persistente ----------
+class RelatedIndex:
+    def __init__(self, path=RELATED_PATH, k=TOP_K):
+        self.path = path
+        self.k = k
+        self.docs = {}    # slug -> hash del texto
+        self.table = {}   # slug -> [[score, slug], ...]
+        self.base = 0     # n de docs en el ultimo recalculo completo
+        self.stats = {"added": 0, "removed": 0, "full": False}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("k") == k:
+                self.docs, self.table, self.base = data["docs"], data["table"], data.get("base", 0)
+        except Exception:
+            pass
+
+    def sync(self, docs):
+        # docs {slug: texto}: deja la tabla al dia con ese conjunto de posts
+        new = {s: _digest(t) for s, t in docs.items()}
+        removed = {s for s in self.docs if new.get(s) != self.docs[s]}
+        added = [s for s in sorted(new) if self.docs.get(s) != new[s]]
+        self.stats = {"added": len(added), "removed": len(removed - set(added)), "full": False}
+        if not added and not removed:
+            return self.stats
+        vecs = tfidf(docs)
+        cands = sorted(docs)
+        churn = len(added) + len(removed)
+        with self._lock:
+            if not self.table or churn > REBUILD_RATIO * max(self.base, 1):
+                self.table = {s: [list(t) for t in r] for s, r in topk(cands, cands, vecs, self.k).items()}
+                self.base = len(cands)
+                self.stats["full"] = True
+            else:
+                # nuevos contra todos; y los que pierden un vecino, otra vez contra todos
+                redo = [s for s in cands if any(t[1] in removed for t in self.table.get(s, []))]
+                fresh = topk(sorted(set(added) | set(redo)), cands, vecs, self.k)
+                back = topk([s for s in cands if s not in fresh], added, vecs, self.k)
+                for s in cands:
+                    if s in fresh:
+                        self.table[s] = [list(t) for t in fresh[s]]
+                        continue
+                    keep = [t for t in self.table.get(s, []) if t[1] not in removed]
+                    merged = _rank([(sc, n) for sc, n in keep] + [(sc, n) for sc, n in back.get(s, [])], self.k)
+                    self.table[s] = [list(t) for t in merged]
+                for s in removed - set(cands):
+                    self.table.pop(s, None)
+            self.docs = new
+        return self.stats
+
+    def related(self, slug, n=3, exclude=()):
+        return [s for _, s in self.table.get(slug, []) if s not in exclude][:n]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"k": self.k, "base": self.base, "docs": self.docs, "table": self.table}, f,
+                          sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, self.path)
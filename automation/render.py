@@ -0,0 +1,96 @@
+# automation/render.py
+# Render de paginas en paralelo con procesos (el render Jinja es CPU y el GIL
+# lo deja en un solo nucleo con hilos).
+# - Cada pagina se describe como datos (plantilla + contexto de dicts/listas/str),
+#   asi viaja a los procesos por pickle.
+# - El worker hace Template.generate() y lo escribe con Output.write_stream()
+#   (temporal + rename, salta contenido identico, .gz/.br). Con OUTPUT_MINIFY=0
+#   la pagina va a disco trozo a trozo; con minificado (por defecto) se junta
+#   entera, porque el minificador la necesita completa. El proceso principal no
+#   guarda el HTML de ninguna pagina.
+# - workers <= 1: mismo camino, en el propio proceso.
+# - Los procesos (spawn: importan el generador, ~0.3 s cada uno) solo arrancan
+#   al llegar a POOL_MIN_PAGES encargos; un build mas pequeno se renderiza en el
+#   propio proceso al cerrar.
+
+import os, time, importlib, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from automation import metrics, templates
+from automation.output import Output
+
+RENDER_WORKERS = 0  # 0 = un proceso por nucleo; RENDER_WORKERS / render_workers los fijan por build
+POOL_MIN_PAGES = 64
+
+_worker_output = None
+
+def _init_worker(module, root, minify, precompress, jinja_dir):
+    # las plantillas se registran al importar el generador
+    global _worker_output
+    importlib.import_module(module)
+    templates.use_cache_dir(jinja_dir)
+    _worker_output = Output(root, minify, precompress)
+
+def _render_one(path, template, ctx):
+    out = _worker_output
+    before = dict(out.stats)
+    t = time.perf_counter()
+    built = out.write_stream(path, templates.get_template(template).generate(**ctx))
+    delta = {k: v - before[k] for k, v in out.stats.items()}
+    return path, built, time.perf_counter() - t, delta
+
+class RenderPool:
+    def __init__(self, output, module, workers=RENDER_WORKERS, min_pages=POOL_MIN_PAGES):
+        self.output = output
+        self.module = module   # p.ej. "automation.generate_autodiscover"
+        self.workers = workers or os.cpu_count() or 1
+        self.min_pages = min_pages
+        self._pool = None
+        self._pending = []     # encargos antes de arrancar procesos
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def _render_here(self, path, template, ctx):
+        with metrics.span("render", template=template):
+            return self.output.write_stream(path, templates.get_template(template).generate(**ctx))
+
+    def submit(self, path, template, ctx):
+        if self.workers <= 1:
+            return self._render_here(path, template, ctx)
+        with self._lock:
+            if self._pool is None:
+                self._pending.append((path, template, ctx))
+                if len(self._pending) < self.min_pages:
+                    return
+                # spawn: los generadores usan hilos y fork con hilos vivos no es seguro
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.module, self.output.root, self.output.minify, self.output.precompress,
+                              templates.cache_dir()))
+                jobs, self._pending = self._pending, []
+            else:
+                jobs = [(path, template, ctx)]
+            for job in jobs:
+                self._futures.append((job[1], self._pool.submit(_render_one, *job)))
+
+    def close(self):
+        # espera a todos los renders; el primer error se relanza. Sin llegar a min_pages
+        # los encargos se renderizan aqui, sin arrancar procesos
+        pending, self._pending = self._pending, []
+        for job in pending:
+            self._render_here(*job)
+        err = None
+        for template, fut in self._futures:
+            try:
+                path, built, seconds, delta = fut.result()
+            except Exception as e:
+                err = err or e
+                continue
+            metrics.observe("render", seconds, {"template": template, "path": path})
+            self.output.merge(delta)
+        self._futures = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if err is not None:
+            raise err
@@ -0,0 +1,127 @@
+# automation/scheduler.py
+# Planificador de refrescos: decide que posts se construyen en cada run.
+# Estado por pagina en .cache/schedule.json (fuera de public/: no se publica y
+# la cache de CI lo conserva entre runs): ultimo build, ultimo cambio de precio,
+# errores seguidos, peso y huella de los precios del ultimo build.
+# Cada keyword del pool se puntua y una cola de prioridad (heapq) saca las
+# mejores hasta agotar el presupuesto del run:
+#   nueva:     peso * new_age_days (cuenta como una pagina de esa edad)
+#   publicada: peso * dias desde el ultimo build * (1 + volatile_boost si el
+#              precio cambio en los ultimos volatile_days) / (1 + errores)
+# Las publicadas hace menos de min_age_days no entran. Los empates se
+# deshacen con un hash de (fecha, slug): cambia de un dia a otro pero el
+# plan es el mismo en cualquier maquina (y en todas las partes de un build
+# repartido).
+
+import os, json, heapq, hashlib, datetime, threading
+from automation import clock
+
+STATE_PATH = ".cache/schedule.json"
+LEGACY_PATH = "public/_logs/schedule.json"  # ubicacion antigua: se lee una vez y se borra al guardar
+DEFAULTS = {"min_age_days": 3, "new_age_days": 30, "volatile_days": 14, "volatile_boost": 1.0}
+
+def days_between(a, b):
+    return (datetime.date.fromisoformat(b) - datetime.date.fromisoformat(a)).days
+
+def price_key(prices):
+    # huella corta de [(ASIN, importe, disponibilidad)]: solo importa si cambia
+    return hashlib.sha1(json.dumps(prices, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+class Scheduler:
+    def __init__(self, settings=None, path=STATE_PATH):
+        self.settings = dict(DEFAULTS, **{k: v for k, v in (settings or {}).items() if k in DEFAULTS})
+        self.path = path
+        self.pages = {}
+        self.touched = set()
+        self._lock = threading.Lock()
+        try:
+            with open(path if os.path.exists(path) else LEGACY_PATH, "r", encoding="utf-8") as f:
+                self.pages = json.load(f).get("pages", {})
+        except Exception:
+            pass
+
+    def score(self, slug, weight, published, today):
+        # prioridad de slug hoy; None si no toca. published: fecha del ultimo build conocido (None = nueva)
+        s = self.settings
+        if published is None:
+            return weight * s["new_age_days"]
+        e = self.pages.get(slug) or {}
+        age = days_between(e.get("built") or published, today)
+        if age < s["min_age_days"]:
+            return None
+        changed = e.get("price_changed")
+        boost = 1 + s["volatile_boost"] if changed and days_between(changed, today) <= s["volatile_days"] else 1
+        return weight * age * boost / (1 + e.get("errors", 0))
+
+    def plan(self, candidates, budget, max_new=None, today=None):
+        # candidates [(slug, peso, published)] -> indices de los elegidos, en orden de prioridad
+        today = today or clock.today()
+        heap = []
+        for i, (slug, weight, published) in enumerate(candidates):
+            sc = self.score(slug, weight, published, today)
+            if sc is not None and sc > 0:
+                heap.append((-sc, hashlib.sha1(f"{today}/{slug}".encode("utf-8")).hexdigest(), i))
+        heapq.heapify(heap)
+        max_new = budget if max_new is None else max_new
+        picked, new = [], 0
+        while heap and len(picked) < budget:
+            i = heapq.heappop(heap)[2]
+            if candidates[i][2] is None:
+                if new >= max_new:
+                    continue
+                new += 1
+            picked.append(i)
+        return picked
+
+    def record(self, slug, weight=1, prices=None, error=False, today=None):
+        # resultado del build de slug. Con error (PA-API) la pagina no cuenta como fresca
+        today = today or clock.today()
+        with self._lock:
+            e = self.pages.setdefault(slug, {})
+            e["weight"] = weight
+            if error:
+                e["errors"] = e.get("errors", 0) + 1
+                e.setdefault("built", today)
+            else:
+                e["errors"] = 0
+                e["built"] = today
+            if prices is not None:
+                key = price_key(prices)
+                if e.get("prices") not in (None, key):
+                    e["price_changed"] = today
+                e["prices"] = key
+            self.touched.add(slug)
+
+    def price_changed(self, slug, today=None):
+        # precios parcheados sin rebuild (--refresh-prices)
+        with self._lock:
+            self.pages.setdefault(slug, {})["price_changed"] = today or clock.today()
+            self.touched.add(slug)
+
+    def part(self):
+        # entradas tocadas en este run: el estado parcial de una parte
+        with self._lock:
+            return {s: self.pages[s] for s in sorted(self.touched)}
+
+    def merge(self, pages):
+        with self._lock:
+            self.pages.update(pages)
+            self.touched.update(pages)
+
+    def retain(self, slugs):
+        # fuera el estado de los posts que ya no se publican
+        keep = set(slugs)
+        with self._lock:
+            for s in [s for s in self.pages if s not in keep]:
+                del self.pages[s]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"pages": self.pages}, f,
+                          ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        if os.path.exists(LEGACY_PATH) and os.path.abspath(LEGACY_PATH) != os.path.abspath(self.path):
+            os.remove(LEGACY_PATH)
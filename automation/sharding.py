@@ -0,0 +1,110 @@
+# automation/sharding.py
+# Builds repartidos: `--shard i/N` construye solo la parte i de N y `--merge`
+# junta las partes. Cada categoria y cada post cae en la parte que marca un
+# hash estable de su slug (sha1: igual en cualquier maquina o proceso, sin
+# depender de PYTHONHASHSEED), asi una pagina va siempre a la misma parte.
+# Cada parte escribe sus paginas y deja en public/_logs/shards/ su manifest
+# parcial: paginas vistas con su hash, entradas del indice de posts, ficheros
+# escritos y lo que el generador necesite para la fusion.
+# La fusion exige las N partes de la misma version, falla si dos partes
+# reclaman el mismo slug y copia los ficheros de cada parte cuando se
+# construyo en otro directorio (artefacto de un job de CI).
+
+import os, json, glob, shutil, hashlib
+from automation.output import SIBLINGS, atomic_write
+
+PARTIAL_DIR = "_logs/shards"
+
+class ShardError(ValueError):
+    pass
+
+def parse(spec):
+    # "2/4" -> (2, 4); las partes se numeran desde 1
+    try:
+        i, n = (int(x) for x in str(spec).split("/"))
+    except ValueError:
+        raise ShardError(f"--shard espera i/N (p.ej. 1/4), no {spec!r}")
+    if not 1 <= i <= n:
+        raise ShardError(f"--shard {spec}: i tiene que estar entre 1 y N")
+    return i, n
+
+def shard_of(key, n):
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big") % n + 1
+
+def owns(shard, key):
+    # sin shard (build completo) todo es de este run
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+def run_name(generator, shard):
+    # nombre del informe de metricas: cada parte deja el suyo
+    return generator if shard is None else f"{generator}.shard-{shard[0]}-of-{shard[1]}"
+
+def partial_path(root, generator, shard):
+    return os.path.join(root, PARTIAL_DIR, f"{generator}.{shard[0]}-of-{shard[1]}.json")
+
+def save_partial(root, generator, shard, data):
+    path = partial_path(root, generator, shard)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    body = dict(data, generator=generator, shard=list(shard))
+    atomic_write(path, json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return path
+
+def load_partials(root, generator, sources=()):
+    # [(raiz, parcial)] ordenado por parte; sources: raices de las partes si no estan en root
+    found = []
+    for src in sources or (root,):
+        for path in sorted(glob.glob(os.path.join(src, PARTIAL_DIR, f"{generator}.*-of-*.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                found.append((src, json.load(f)))
+    if not found:
+        raise ShardError(f"merge: no hay partes de {generator} en {', '.join(sources or (root,))}")
+    n = found[0][1]["shard"][1]
+    got = sorted(p["shard"][0] for _, p in found)
+    if any(p["shard"][1] != n for _, p in found) or got != list(range(1, n + 1)):
+        raise ShardError(f"merge: se esperaban las partes 1..{n} de {generator} y hay {[p['shard'] for _, p in found]}")
+    if len({p.get("version") for _, p in found}) > 1:
+        raise ShardError(f"merge: las partes de {generator} vienen de versiones distintas del generador")
+    return sorted(found, key=lambda sp: sp[1]["shard"][0])
+
+def collisions(partials):
+    # {slug: [partes]} de los slugs que publica mas de una parte
+    owner = {}
+    for _, p in partials:
+        for slug in p.get("posts", ()):
+            owner.setdefault(slug, []).append(p["shard"][0])
+    return {slug: parts for slug, parts in owner.items() if len(parts) > 1}
+
+def copy_files(partials, root):
+    # ficheros de cada parte (con sus .gz/.br) a root; nada si la parte se construyo en root
+    copied = 0
+    for src, p in partials:
+        if os.path.abspath(src) == os.path.abspath(root):
+            continue
+        for path in p.get("files", ()):
+            for ext in ("",) + SIBLINGS:
+                s = os.path.join(src, path + ext)
+                if not os.path.exists(s):
+                    continue
+                d = os.path.join(root, path + ext)
+                os.makedirs(os.path.dirname(d), exist_ok=True)
+                tmp = d + ".merge.tmp"
+                shutil.copyfile(s, tmp); os.replace(tmp, d)
+                copied += 1
+    return copied
+
+def merge(root, generator, sources=(), version=None):
+    # parciales listos para fusionar; los ficheros de otras raices ya copiados a root
+    partials = load_partials(root, generator, sources)
+    if version is not None and partials[0][1].get("version") != version:
+        raise ShardError(f"merge: las partes de {generator} son de otra version del generador; vuelve a construirlas")
+    clash = collisions(partials)
+    if clash:
+        listed = ", ".join(f"{s} (partes {'/'.join(map(str, parts))})" for s, parts in sorted(clash.items())[:20])
+        raise ShardError(f"merge: {len(clash)} slugs en mas de una parte: {listed}")
+    copy_files(partials, root)
+    return [p for _, p in partials]
+
+def cleanup(root, generator):
+    # tras fusionar, los parciales no se publican ni se vuelven a usar
+    for path in glob.glob(os.path.join(root, PARTIAL_DIR, f"{generator}.*-of-*.json")):
+        os.remove(path)
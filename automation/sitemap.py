@@ -0,0 +1,91 @@
+# automation/sitemap.py
+# Sitemap en streaming: cada <url> se escribe al vuelo (no se guarda la
+# lista completa en memoria) y se parte en sitemap-1.xml, sitemap-2.xml...
+# al llegar a 50.000 URLs o 50 MB, con sitemap.xml como indice.
+# Si cabe en un solo fichero, sitemap.xml es directamente el <urlset>.
+# Cada shard va directo a su fichero con Output.open(): temporal junto al
+# destino con sha256 al vuelo; si no cambia no se toca, y lleva sus .gz/.br
+# como el resto del sitio. Ningun shard se vuelve a leer entero en memoria.
+
+import os, glob
+from xml.sax.saxutils import escape
+from automation.output import remove_with_siblings
+
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+HEADER = "<?xml version='1.0' encoding='UTF-8'?>\n<urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>\n"
+FOOTER = "</urlset>"
+
+class SitemapWriter:
+    def __init__(self, output, base_url="", name="sitemap", max_urls=MAX_URLS, max_bytes=MAX_BYTES):
+        # output: el Output del build (sin cambios no se toca, hermanos .gz/.br)
+        self.output = output
+        self.base_url = base_url
+        self.root = output.root
+        self.name = name
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.lastmods = []  # lastmod mas reciente de cada shard terminado
+        self.count = 0
+        self._f = None      # Stream del shard abierto
+        self._first = None  # shard 1 terminado: sitemap.xml si es el unico, si no sitemap-1.xml
+
+    def _open(self):
+        self._f = self.output.open(f"{self.name}-{len(self.lastmods) + 1}.xml")
+        self._f.write(HEADER)
+        self._urls, self._bytes, self._lastmod = 0, len(HEADER.encode("utf-8")) + len(FOOTER), ""
+
+    def _close_shard(self):
+        self._f.write(FOOTER)
+        self.lastmods.append(self._lastmod)
+        if len(self.lastmods) == 1:
+            self._first = self._f
+        else:
+            if self._first is not None:
+                self._first.close(); self._first = None
+            self._f.close()
+        self._f = None
+
+    def add(self, loc, lastmod=None, changefreq="weekly", priority="0.6"):
+        entry = f"<url><loc>{escape(loc)}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{lastmod}</lastmod>"
+        entry += f"<changefreq>{changefreq}</changefreq><priority>{priority}</priority></url>\n"
+        size = len(entry.encode("utf-8"))
+        if self._f is not None and (self._urls >= self.max_urls or self._bytes + size > self.max_bytes):
+            self._close_shard()
+        if self._f is None:
+            self._open()
+        self._f.write(entry)
+        self._urls += 1; self._bytes += size; self.count += 1
+        if lastmod and lastmod > self._lastmod:
+            self._lastmod = lastmod
+
+    def _url(self, filename):
+        return (self.base_url.rstrip("/") + "/" + filename) if self.base_url else "/" + filename
+
+    def close(self):
+        if self._f is None and not self.lastmods:
+            self._open()  # sitemap vacio pero valido
+        if self._f is not None:
+            self._close_shard()
+        main = f"{self.name}.xml"
+        written = []
+        if len(self.lastmods) == 1:
+            self._first.close(main); self._first = None
+        else:
+            index = ["<?xml version='1.0' encoding='UTF-8'?>\n<sitemapindex xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>\n"]
+            for i, lastmod in enumerate(self.lastmods, 1):
+                fname = f"{self.name}-{i}.xml"
+                written.append(fname)
+                index.append(f"<sitemap><loc>{escape(self._url(fname))}</loc>" +
+                             (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</sitemap>\n")
+            index.append("</sitemapindex>")
+            self.output.write(main, "".join(index))
+        written.append(main)
+        # shards sobrantes de un run anterior con mas URLs
+        for old in glob.glob(os.path.join(self.root, f"{self.name}-*.xml")):
+            if os.path.basename(old) not in written:
+                remove_with_siblings(old)
+        return written
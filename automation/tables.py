@@ -0,0 +1,90 @@
+# automation/tables.py
+# Tabla de productos comun a los tres generadores.
+# - Filas = Product (automation/product.py); una sola pasada, todo a un unico buffer.
+# - Todo texto externo se escapa; a los bullets se les quitan antes las etiquetas.
+# - Columnas enchufables: cada generador declara su Layout con las celdas que quiere;
+#   cada celda recibe (producto, enlace). Con ASIN el enlace es la ficha; sin ASIN
+#   (tablas de respaldo) una busqueda por el titulo.
+# Los spans bb-price/bb-avail con id price-ASIN / avail-ASIN los parchean
+# prices.py y static/buybox.js: no cambiar su formato.
+
+import re
+from html import escape
+from collections import namedtuple
+from urllib.parse import quote
+
+_TAGS = re.compile(r"<[^>]*>")
+
+Column = namedtuple("Column", "header cell")          # cell(producto, enlace) -> html de la celda
+Layout = namedtuple("Layout", "columns table_class")
+
+def strip_tags(text):
+    return _TAGS.sub("", text)
+
+def product_link(asin, tag):
+    return f"https://www.amazon.es/dp/{quote(asin)}?tag={quote(tag)}"
+
+def search_link(query, tag):
+    return f"https://www.amazon.es/s?k={quote(query)}&tag={quote(tag)}"
+
+def link_for(p, tag):
+    return product_link(p.asin, tag) if p.asin else search_link(p.title, tag)
+
+# --------- Celdas ----------
+def bullets_html(features, n, ul_class=""):
+    if not features:
+        return ""
+    cls = f" class='{ul_class}'" if ul_class else ""
+    return f"<ul{cls}>" + "".join(f"<li>{escape(strip_tags(f))}</li>" for f in features[:n]) + "</ul>"
+
+def product_cell(bullets=4, ul_class="", image=False, max_title=None):
+    def cell(p, link):
+        title = escape(p.name[:max_title] if max_title else p.name)
+        body = f"<strong>{title}</strong>{bullets_html(p.features, bullets, ul_class)}"
+        if not image:
+            return body
+        img = (f'<img src="{escape(p.image)}" alt="{title}" width="64" height="64" loading="lazy" '
+               f'style="border-radius:8px;border:1px solid #2a2a2a">' if p.image else "")
+        return f"<div style='display:flex;gap:10px;align-items:flex-start'>{img}<div>{body}</div></div>"
+    return cell
+
+def price_cell(p, link):
+    # sin ASIN (tablas de respaldo) no hay id: no se parchea
+    ident = f" id='price-{escape(p.asin)}'" if p.asin else ""
+    return f"<span class='bb-price'{ident}>{escape(p.price)}</span>"
+
+def avail_cell(p, link):
+    if not p.asin:
+        return escape(p.availability)
+    return f"<span class='bb-avail' id='avail-{escape(p.asin)}'>{escape(p.availability)}</span>"
+
+def text_cell(attr):
+    return lambda p, link: escape(str(getattr(p, attr)))
+
+def button_cell(label, buybox=False):
+    def cell(p, link):
+        a = f"<a class='bb-btn' rel='sponsored nofollow' target='_blank' href='{escape(link)}'>{escape(label)}</a>"
+        return f"<div class='buybox' data-asin='{escape(p.asin)}'>{a}</div>" if buybox else a
+    return cell
+
+# --------- Tabla ----------
+def render_rows(products, layout, tag, note=""):
+    buf = []
+    for p in products:
+        link = link_for(p, tag)
+        buf.append("<tr>")
+        for col in layout.columns:
+            buf.append("<td>"); buf.append(col.cell(p, link)); buf.append("</td>")
+        buf.append("</tr>\n")
+    if buf and note:
+        buf.append(f"<tr><td colspan='{len(layout.columns)}' class='muted'>{escape(note)}</td></tr>\n")
+    return "".join(buf)
+
+def render_table(products, layout, tag, note=""):
+    # "" si no hay filas: cada generador decide su mensaje de respaldo
+    body = render_rows(products, layout, tag, note)
+    if not body:
+        return ""
+    cls = f" class='{layout.table_class}'" if layout.table_class else ""
+    head = "".join(f"<th>{escape(c.header)}</th>" for c in layout.columns)
+    return f"<table{cls}><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
@@ -0,0 +1,57 @@
+# automation/templates.py
+# Entorno Jinja unico para los tres generadores.
+# - Cada generador registra sus plantillas con un prefijo ("free/post.html").
+# - Se compilan una vez por proceso y el bytecode se guarda en disco
+#   (.cache/jinja; JINJA_CACHE_DIR en el entorno del build), asi los runs
+#   siguientes no recompilan.
+# - Autoescape activado en las plantillas .html: los fragmentos ya
+#   renderizados (head, tail, tablas, JSON-LD) se marcan con |safe.
+
+import os, threading
+from automation import metrics
+
+JINJA_CACHE_DIR = ".cache/jinja"
+
+_sources = {}
+_env = None
+_cache_dir = JINJA_CACHE_DIR
+_lock = threading.Lock()
+
+def register(namespace, templates):
+    for name, source in templates.items():
+        _sources[f"{namespace}/{name}"] = source
+
+def use_cache_dir(path):
+    # directorio de bytecode del build (BuildContext.start y los workers de render)
+    global _cache_dir
+    with _lock:
+        _cache_dir = path
+        if _env is not None:
+            from jinja2 import FileSystemBytecodeCache
+            os.makedirs(path, exist_ok=True)
+            _env.bytecode_cache = FileSystemBytecodeCache(path)
+
+def cache_dir():
+    return _cache_dir
+
+def get_env():
+    global _env
+    with _lock:
+        if _env is None:
+            # jinja2 y el directorio de bytecode, solo al primer render (no al importar)
+            from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, select_autoescape
+            os.makedirs(_cache_dir, exist_ok=True)
+            _env = Environment(
+                loader=DictLoader(_sources),  # misma dict: lo registrado despues tambien se ve
+                bytecode_cache=FileSystemBytecodeCache(_cache_dir),
+                autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+                auto_reload=False,
+            )
+    return _env
+
+def get_template(name):
+    return get_env().get_template(name)
+
+def render(name, **ctx):
+    with metrics.span("render", template=name):
+        return get_template(name).render(**ctx)
@@ -0,0 +1,33 @@
+# bench/child.py
+# Ejecuta un generador en un proceso aparte (cwd = directorio de trabajo del
+# benchmark) e imprime en la ultima linea un JSON con tiempo, RSS maximo y
+# contadores de salida. Lo lanza bench/run.py.
+
+import sys, json, time, resource, importlib
+
+TARGETS = {
+    "autodiscover": ("automation.generate_autodiscover", lambda m, ctx: m.run_autodiscover(ctx)),
+    "free": ("automation.generate_free", lambda m, ctx: m.main(ctx)),
+    "bootstrap": ("automation.generate_bootstrap", lambda m, ctx: m.main(ctx)),
+}
+
+def main(target):
+    modname, run = TARGETS[target]
+    t0 = time.perf_counter()
+    mod = importlib.import_module(modname)
+    t1 = time.perf_counter()
+    ctx = mod.load_context()
+    run(mod, ctx)
+    t2 = time.perf_counter()
+    out = ctx.output
+    print(json.dumps({
+        "import_s": round(t1 - t0, 4),
+        "run_s": round(t2 - t1, 4),
+        "maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        # el mayor de los hijos ya terminados: procesos del pool de render
+        "maxrss_children_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "output": dict(out.stats),
+    }))
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,141 @@
+# bench/fakeapi.py
+# Sustituto local de webservices.amazon.es y de los hosts de imagenes para el
+# benchmark (sin red). Responde SearchItems/GetItems con productos sinteticos
+# deterministas y sirve imagenes pequenas.
+# - latency: segundos de espera por peticion
+# - error_rate / throttle_rate: fraccion de 500 / 429 (con Retry-After)
+# - GET /__stats: contadores por operacion y estado
+#
+# Uso suelto: python bench/fakeapi.py --port 8765 --latency 0.05 --throttle-rate 0.1
+
+import json, time, zlib, random, struct, hashlib, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def _png(seed):
+    # PNG 1x1 valido con un color por seed: bytes distintos por URL
+    r, g, b = hashlib.sha256(seed.encode("utf-8")).digest()[:3]
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+    raw = zlib.compress(bytes([0, r, g, b]))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", raw) + chunk(b"IEND", b""))
+
+def fake_asin(seed, i):
+    return "B0" + hashlib.sha1(f"{seed}:{i}".encode("utf-8")).hexdigest()[:8].upper()
+
+def fake_item(asin, base):
+    n = int(asin[2:], 16)
+    return {
+        "ASIN": asin,
+        "ItemInfo": {
+            "Title": {"DisplayValue": f"Producto {asin} modelo {n % 97}"},
+            "Features": {"DisplayValues": [f"Caracteristica {k} de {asin}" for k in range(4)]},
+        },
+        "Images": {"Primary": {"Medium": {"URL": f"{base}/img/{asin}.png"}}},
+        "Offers": {"Listings": [{
+            "Price": {"Amount": 19 + n % 480 + n % 100 / 100, "Currency": "EUR",
+                      "DisplayAmount": f"{19 + n % 480},{n % 100:02d} €"},
+            "Availability": {"Message": "En stock" if n % 5 else "Disponible en 1-2 semanas"},
+        }]},
+    }
+
+class FakeApi:
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, throttle_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a):
+                pass
+
+            def _send(self, status, body, ctype="application/json", headers=()):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers:
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fault(self, op):
+                # devuelve True si ya respondio con 429/500
+                time.sleep(api.latency)
+                with api._lock:
+                    x = api._rng.random()
+                status = 429 if x < api.throttle_rate else 500 if x < api.throttle_rate + api.error_rate else 200
+                api.count(op, status)
+                if status == 429:
+                    self._send(429, b'{"Errors":[{"Code":"TooManyRequests"}]}', headers=[("Retry-After", "0")])
+                elif status == 500:
+                    self._send(500, b'{"Errors":[{"Code":"InternalFailure"}]}')
+                return status != 200
+
+            def do_GET(self):
+                if self.path == "/__stats":
+                    with api._lock:
+                        body = json.dumps(api.stats).encode("utf-8")
+                    return self._send(200, body)
+                if self._fault("image"):
+                    return
+                self._send(200, _png(self.path), "image/png", [("ETag", '"%s"' % hashlib.md5(self.path.encode()).hexdigest())])
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                op = self.path.rsplit("/", 1)[-1]
+                if self._fault(op):
+                    return
+                base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+                if op == "searchitems":
+                    kw = payload.get("Keywords", "")
+                    items = [fake_item(fake_asin(kw, i), base) for i in range(int(payload.get("ItemCount", 10)))]
+                    body = {"SearchResult": {"Items": items}}
+                elif op == "getitems":
+                    body = {"ItemsResult": {"Items": [fake_item(a, base) for a in payload.get("ItemIds", [])]}}
+                else:
+                    return self._send(404, b"{}")
+                self._send(200, json.dumps(body).encode("utf-8"))
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._thread = None
+
+    def count(self, op, status):
+        with self._lock:
+            s = self.stats.setdefault(op, {})
+            s[str(status)] = s.get(str(status), 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.stats))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--throttle-rate", type=float, default=0.0)
+    a = ap.parse_args()
+    api = FakeApi(a.port, a.latency, a.error_rate, a.throttle_rate)
+    print(f"fake PA-API en {api.url} (Ctrl+C para salir)")
+    try:
+        api.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
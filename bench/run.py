@@ -0,0 +1,180 @@
+# bench/run.py
+# Benchmark offline de los tres generadores.
+# - Genera bootstrap.json y seeds.json sinteticos con N keywords / ASINs.
+# - Levanta bench/fakeapi.py (PA-API + imagenes) con latencia, 500 y 429 configurables.
+# - Ejecuta run_autodiscover, generate_free.main y generate_bootstrap.main en procesos
+#   aparte (run en frio y run incremental) y mide tiempo, RSS maximo (del proceso y del
+#   mayor de sus hijos: el pool de render), llamadas a la API y ficheros escritos.
+# - free publica todas las categorias de seeds.json (FREE_DAILY_POSTS=n), no las 2 de un
+#   run diario, asi escala con n. bootstrap publica siempre 3 categorias x 2 keywords:
+#   su tiempo no depende de n.
+# - Guarda el resultado en bench/results/<commit>.json; --compare otro.json muestra la diferencia.
+#
+#   PYTHONPATH=. python bench/run.py --sizes 10,1000 --latency 0.02 --throttle-rate 0.05
+#   PYTHONPATH=. python bench/run.py --sizes 1000 --compare bench/results/abc1234.json
+
+import os, sys, json, time, shutil, argparse, platform, tempfile, subprocess
+from fakeapi import FakeApi, fake_asin
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+KW_PER_CAT = 25
+ASINS_PER_CAT = 5
+GENERATORS = ("autodiscover", "free", "bootstrap")
+
+# --------- Catalogo sintetico ----------
+def synthetic_bootstrap(n):
+    cats = []
+    for c in range(max(1, -(-n // KW_PER_CAT))):
+        kws = [f"producto {c} variante {k} camper" for k in range(c * KW_PER_CAT, min(n, (c + 1) * KW_PER_CAT))]
+        cats.append({"slug": f"categoria-{c}", "title": f"Categoria de prueba {c}", "keywords": kws})
+    return {
+        "site_title": "Bench", "base_url": "https://bench.example/",
+        "amazon_partner_tag": "bench-21", "amazon_access_key": "bench-access", "amazon_secret_key": "bench-secret",
+        "auto_daily_new_posts": n, "paapi_tps": 1000, "paapi_burst": 1000,
+        "categories": cats,
+    }
+
+def synthetic_seeds(n):
+    cats = []
+    for c in range(max(1, -(-n // ASINS_PER_CAT))):
+        cats.append({"slug": f"seed-{c}", "title": f"Seed de prueba {c}",
+                     "asins": [fake_asin(f"seed-{c}", i) for i in range(min(ASINS_PER_CAT, n - c * ASINS_PER_CAT))]})
+    return {"categories": cats}
+
+def prepare(workdir, n):
+    with open(os.path.join(workdir, "bootstrap.json"), "w", encoding="utf-8") as f:
+        json.dump(synthetic_bootstrap(n), f, ensure_ascii=False)
+    with open(os.path.join(workdir, "seeds.json"), "w", encoding="utf-8") as f:
+        json.dump(synthetic_seeds(n), f, ensure_ascii=False)
+
+# --------- Ejecucion ----------
+def _env(workdir, api, n):
+    env = {k: v for k, v in os.environ.items() if k != "GITHUB_REPOSITORY"}
+    env.update({
+        "PYTHONPATH": REPO, "BOOTSTRAP_JSON_PATH": os.path.join(workdir, "bootstrap.json"),
+        "PAAPI_ENDPOINT": api.url, "IMAGE_SOURCE_URL": f"{api.url}/img-src",
+        "AMAZON_ACCESS_KEY": "bench-access", "AMAZON_SECRET_KEY": "bench-secret", "AMAZON_PARTNER_TAG": "bench-21",
+        "PAAPI_TPS": "1000", "PAAPI_BURST": "1000",
+        "FREE_DAILY_POSTS": str(n),  # todas las categorias de seeds.json: free crece con n
+    })
+    return env
+
+def _api_delta(before, after):
+    out = {}
+    for op, counts in after.items():
+        for status, n in counts.items():
+            d = n - before.get(op, {}).get(status, 0)
+            if d:
+                out.setdefault(op, {})[status] = d
+    return out
+
+def _count_files(root):
+    return sum(len(files) for _, _, files in os.walk(root))
+
+def run_one(generator, workdir, api, timeout, n):
+    before = api.snapshot()
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, os.path.join(HERE, "child.py"), generator], cwd=workdir,
+                       env=_env(workdir, api, n), capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - t0
+    calls = _api_delta(before, api.snapshot())
+    res = {"wall_s": round(wall, 4), "returncode": p.returncode,
+           "api_calls": calls, "api_total": sum(sum(c.values()) for c in calls.values()),
+           "public_files": _count_files(os.path.join(workdir, "public"))}
+    try:
+        child = json.loads(p.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        res["error"] = (p.stderr or p.stdout)[-2000:]
+        return res
+    res.update(import_s=child["import_s"], run_s=child["run_s"], maxrss_kb=child["maxrss_kb"],
+               maxrss_children_kb=child.get("maxrss_children_kb", 0),
+               files_written=child["output"].get("files", 0), files_unchanged=child["output"].get("unchanged", 0),
+               bytes_out=child["output"].get("out", 0))
+    return res
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=REPO, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+# --------- Comparacion ----------
+def compare(current, path, threshold):
+    with open(path, "r", encoding="utf-8") as f:
+        old = {(r["generator"], r["size"], r["run"]): r for r in json.load(f)["results"]}
+    print(f"\ncomparado con {path} ({threshold:.0%} = regresion):")
+    worse = 0
+    for r in current["results"]:
+        o = old.get((r["generator"], r["size"], r["run"]))
+        if not o:
+            continue
+        line = []
+        for k in ("wall_s", "maxrss_kb", "maxrss_children_kb", "api_total", "files_written"):
+            a, b = o.get(k), r.get(k)
+            if a is None or b is None:
+                continue
+            flag = ""
+            if k in ("wall_s", "maxrss_kb", "maxrss_children_kb") and a and (b - a) / a > threshold:
+                flag = " !"; worse += 1
+            line.append(f"{k} {a} -> {b}{flag}")
+        print(f"  {r['generator']:<12} n={r['size']:<6} {r['run']:<5} " + ", ".join(line))
+    return worse
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark offline de los generadores")
+    ap.add_argument("--sizes", default="10,100,1000", help="numero de keywords/ASINs, separado por comas")
+    ap.add_argument("--generators", default=",".join(GENERATORS))
+    ap.add_argument("--latency", type=float, default=0.0, help="segundos por peticion en la API falsa")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraccion de respuestas 500")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="fraccion de respuestas 429")
+    ap.add_argument("--runs", type=int, default=2, help="1 = solo en frio; 2 = frio + incremental")
+    ap.add_argument("--timeout", type=float, default=3600)
+    ap.add_argument("--out", default="", help="por defecto bench/results/<commit>.json")
+    ap.add_argument("--compare", default="", help="JSON de un run anterior")
+    ap.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--keep", action="store_true", help="no borrar los directorios de trabajo")
+    a = ap.parse_args()
+
+    api = FakeApi(latency=a.latency, error_rate=a.error_rate, throttle_rate=a.throttle_rate).start()
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    report = {
+        "commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(), "platform": platform.platform(),
+        "params": {k: getattr(a, k) for k in ("sizes", "latency", "error_rate", "throttle_rate", "runs")},
+        "results": [],
+    }
+    try:
+        for n in [int(x) for x in a.sizes.split(",") if x.strip()]:
+            for gen in [g.strip() for g in a.generators.split(",") if g.strip()]:
+                workdir = tempfile.mkdtemp(prefix=f"bench-{gen}-{n}-")
+                prepare(workdir, n)
+                for i in range(a.runs):
+                    run = "cold" if i == 0 else "warm" if i == 1 else f"warm{i}"
+                    r = run_one(gen, workdir, api, a.timeout, n)
+                    r.update(generator=gen, size=n, run=run)
+                    report["results"].append(r)
+                    print(f"{gen:<12} n={n:<6} {run:<5} {r['wall_s']:>8.2f}s  rss {r.get('maxrss_kb', 0) / 1024:>7.1f} MB "
+                          f"(hijos {r.get('maxrss_children_kb', 0) / 1024:>6.1f} MB)  "
+                          f"api {r['api_total']:>6}  escritos {r.get('files_written', '-')}" + ("  ERROR" if "error" in r else ""))
+                    if "error" in r:
+                        print(r["error"], file=sys.stderr)
+                        break
+                if a.keep:
+                    print(f"  workdir: {workdir}")
+                else:
+                    shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        api.stop()
+
+    out = a.out or os.path.join(HERE, "results", f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"resultados: {out}")
+    if a.compare:
+        sys.exit(1 if compare(report, a.compare, a.threshold) else 0)
+
+if __name__ == "__main__":
+    main()
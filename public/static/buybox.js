@@ -1 +1,11 @@
-document.addEventListener('DOMContentLoaded',()=>{document.querySelectorAll('.buybox[data-asin]').forEach(async el=>{const asin=el.getAttribute('data-asin');try{const r=await fetch(`/api/price?asin=${encodeURIComponent(asin)}`);if(!r.ok)return;const j=await r.json();const node=el.closest('tr')?.querySelector(`#price-${asin}`)||el.querySelector(`#price-${asin}`);if(node)node.textContent=(j.price||'Consultar')+(j.availability?` - ${j.availability}`:'');}catch(e){}});});
\ No newline at end of file
+// Precios en vivo: lee prices/index.json (puntero) y el shard JSON de la categoria
+// de la pagina, y actualiza los spans price-ASIN / avail-ASIN. Si algo falla se
+// queda el precio que venia en el HTML.
+(()=>{const s=document.currentScript;if(!s)return;const base=new URL('../',s.src);
+const rel=location.pathname.startsWith(base.pathname)?location.pathname.slice(base.pathname.length):location.pathname.replace(/^\//,'');
+const cat=rel.includes('/')?rel.split('/')[0]:'_home';
+const run=async()=>{const spans=document.querySelectorAll(".bb-price[id^='price-']");if(!spans.length)return;
+try{const idx=await (await fetch(new URL('prices/index.json',base),{cache:'no-cache'})).json();const f=(idx.shards||{})[cat];if(!f)return;
+const r=await fetch(new URL('prices/'+f,base));if(!r.ok)return;const p=(await r.json()).p||{};
+spans.forEach(el=>{const asin=el.id.slice(6),o=p[asin];if(!o)return;el.textContent=o[0];const a=document.getElementById('avail-'+asin);if(a)a.textContent=o[1];});}catch(e){}};
+document.readyState==='loading'?document.addEventListener('DOMContentLoaded',run):run();})();
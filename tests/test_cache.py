@@ -0,0 +1,112 @@
+# tests/test_cache.py
+# Cache SQLite de PA-API con un reloj falso: TTL por operacion, max_age,
+# stale-while-error hasta max_stale, clave normalizada y eviccion LRU.
+
+import os, shutil, tempfile, unittest
+from unittest import mock
+from automation import cache
+
+class FakeTime:
+    def __init__(self, now=1_790_000_000.0):
+        self.now = now
+    def time(self):
+        return self.now
+
+class Calls:
+    # call() para fetch: devuelve respuestas numeradas o falla si error
+    def __init__(self):
+        self.n, self.error = 0, False
+    def __call__(self):
+        if self.error:
+            raise RuntimeError("429")
+        self.n += 1
+        return {"n": self.n}
+
+class PaapiCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.clock = FakeTime()
+        patcher = mock.patch.object(cache, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = cache.PaapiCache(os.path.join(self.tmp, "c", "paapi.sqlite"), ttl={"GetItems": 100}, max_stale=1000)
+        self.addCleanup(self.cache.close)
+        self.call = Calls()
+
+    def get(self, **kw):
+        return self.cache.fetch("GetItems", {"ItemIds": ["B1"]}, self.call, **kw)
+
+    def test_ttl_hit_and_miss(self):
+        self.assertEqual(self.get(), {"n": 1})
+        self.clock.now += 99
+        self.assertEqual(self.get(), {"n": 1})
+        self.clock.now += 1
+        self.assertEqual(self.get(), {"n": 2})
+        self.assertEqual((self.cache.stats["hits"], self.cache.stats["misses"]), (1, 2))
+
+    def test_ttl_per_operation(self):
+        self.cache.fetch("SearchItems", {"Keywords": "x"}, self.call)
+        self.clock.now += 86400
+        self.assertEqual(self.cache.fetch("SearchItems", {"Keywords": "x"}, self.call), {"n": 1})
+        self.cache.fetch("Other", {}, self.call)
+        self.clock.now += cache.FALLBACK_TTL
+        self.assertEqual(self.cache.fetch("Other", {}, self.call), {"n": 3})
+
+    def test_max_age_overrides_ttl(self):
+        self.get()
+        self.clock.now += 10
+        self.assertEqual(self.get(max_age=0), {"n": 2})
+        self.assertEqual(self.get(max_age=3600), {"n": 2})
+
+    def test_stale_while_error(self):
+        self.get()
+        self.call.error = True
+        self.clock.now += 999
+        self.assertEqual(self.get(), {"n": 1})
+        self.assertEqual(self.cache.stats["stale"], 1)
+        self.clock.now += 1
+        with self.assertRaises(RuntimeError):
+            self.get()
+
+    def test_error_without_entry_raises(self):
+        self.call.error = True
+        with self.assertRaises(RuntimeError):
+            self.get()
+        self.assertEqual(self.cache.stats["stores"], 0)
+
+    def test_persists_across_connections(self):
+        self.get()
+        other = cache.PaapiCache(self.cache.path, ttl={"GetItems": 100})
+        self.addCleanup(other.close)
+        self.assertEqual(other.fetch("GetItems", {"ItemIds": ["B1"]}, self.call), {"n": 1})
+
+    def test_evicts_least_recently_used(self):
+        small = cache.PaapiCache(os.path.join(self.tmp, "small.sqlite"), max_bytes=20)  # 7 bytes por respuesta: caben dos
+        self.addCleanup(small.close)
+        for asin in ("A", "B"):
+            small.fetch("GetItems", {"ItemIds": [asin]}, self.call); self.clock.now += 1
+        small.fetch("GetItems", {"ItemIds": ["A"]}, self.call); self.clock.now += 1   # A usado despues que B
+        small.fetch("GetItems", {"ItemIds": ["C"]}, self.call)
+        self.assertEqual(small.stats["evicted"], 1)
+        self.assertEqual(small.fetch("GetItems", {"ItemIds": ["A"]}, self.call), {"n": 1})
+        self.assertEqual(small.fetch("GetItems", {"ItemIds": ["B"]}, self.call), {"n": 4})
+
+class CacheKeyTest(unittest.TestCase):
+    def test_normalized(self):
+        a = cache.cache_key("SearchItems", {"Keywords": "  Nevera   12V ", "PartnerTag": "a-21",
+                                            "Resources": ["Offers", "ItemInfo", "Offers"]}, "www.amazon.es")
+        b = cache.cache_key("SearchItems", {"Keywords": "nevera 12v", "PartnerTag": "b-21",
+                                            "PartnerType": "Associates", "Resources": ["ItemInfo", "Offers"]}, "www.amazon.es")
+        self.assertEqual(a, b)
+        self.assertEqual(cache.cache_key("GetItems", {"ItemIds": ["B2", "B1", "B1"]}),
+                         cache.cache_key("GetItems", {"ItemIds": ["B1", "B2"]}))
+
+    def test_distinct(self):
+        base = cache.cache_key("GetItems", {"ItemIds": ["B1"]}, "www.amazon.es")
+        self.assertNotEqual(base, cache.cache_key("GetItems", {"ItemIds": ["B1"]}, "www.amazon.de"))
+        self.assertNotEqual(base, cache.cache_key("SearchItems", {"ItemIds": ["B1"]}, "www.amazon.es"))
+        self.assertNotEqual(base, cache.cache_key("GetItems", {"ItemIds": ["B1", "B2"]}, "www.amazon.es"))
+
+if __name__ == "__main__":
+    unittest.main()
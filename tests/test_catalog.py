@@ -0,0 +1,74 @@
+# tests/test_catalog.py
+# Catalogo de respaldo: Aho-Corasick encuentra todos los patrones (solapados
+# incluidos) y cada campo lo decide el primer preset del fichero que lo define.
+
+import os, json, shutil, tempfile, unittest
+from automation import catalog
+
+DATA = {
+    "default": {"price": [1, 2], "tipo": "T", "perfil": "P",
+                "variants": {"name": "{Kw} {v}", "values": [1, 2, 3, 4, 5, 6, 7], "features": ["f{v}"]}},
+    "presets": [
+        {"match": ["bateria litio"], "price": [250, 900]},
+        {"match": ["bateria"], "price": [90, 250], "tipo": "LiFePO4"},
+        {"match": ["litio"], "tipo": "Litio", "perfil": "Exigente"},
+        {"match": ["Nevera", "frigorifico"], "variants": {"name": "N{v}", "values": ["a"], "features": []}},
+    ],
+}
+
+class MatcherTest(unittest.TestCase):
+    def test_overlapping_patterns(self):
+        m = catalog.Matcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+        self.assertEqual(m.find("ushers"), {1, 2, 4})
+        self.assertEqual(m.find("ahishe"), {1, 2, 3})
+        self.assertEqual(m.find("xyz"), set())
+
+    def test_same_pattern_several_ids(self):
+        m = catalog.Matcher([("ab", 1), ("ab", 2), ("b", 3)])
+        self.assertEqual(m.find("cab"), {1, 2, 3})
+
+class ResolveTest(unittest.TestCase):
+    def setUp(self):
+        self.cat = catalog.Catalog(DATA)
+
+    def test_first_preset_wins_per_field(self):
+        r = self.cat.resolve("bateria litio 100ah")
+        self.assertEqual(r["price"], (250, 900))     # preset 0
+        self.assertEqual(r["tipo"], "LiFePO4")       # preset 1 antes que preset 2
+        self.assertEqual(r["perfil"], "Exigente")    # solo preset 2 lo define
+        self.assertEqual(r["variants"][0], {"name": "Bateria Litio 100Ah 1", "features": ["f1"]})
+
+    def test_default_and_max_variants(self):
+        r = self.cat.resolve("toldo")
+        self.assertEqual((r["price"], r["tipo"], r["perfil"]), ((1, 2), "T", "P"))
+        self.assertEqual(len(r["variants"]), catalog.MAX_VARIANTS)
+
+    def test_case_insensitive_match(self):
+        self.assertEqual(self.cat.resolve("NEVERA camping")["variants"], [{"name": "Na", "features": []}])
+
+class LookupTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.addCleanup(catalog.use, catalog.CATALOG_PATH)
+
+    def test_use_switches_file_and_clears_cache(self):
+        default = catalog.lookup("nevera 12v")
+        self.assertEqual(default["price"], (120, 600))
+        path = os.path.join(self.tmp, "catalog.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(DATA, f)
+        catalog.use(path)
+        self.assertEqual(catalog.path(), path)
+        self.assertEqual(catalog.lookup("nevera 12v")["price"], (1, 2))
+        catalog.use(catalog.CATALOG_PATH)
+        self.assertEqual(catalog.lookup("nevera 12v"), default)
+
+    def test_shipped_catalog_precedence(self):
+        # precio del preset especifico ("bateria litio"), tipo del generico ("bateria")
+        r = catalog.lookup("bateria litio 200ah")
+        self.assertEqual(r["price"], (250, 900))
+        self.assertEqual(r["tipo"], "LiFePO4")
+
+if __name__ == "__main__":
+    unittest.main()
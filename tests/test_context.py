@@ -0,0 +1,47 @@
+# tests/test_context.py
+# Ajustes por entorno desde BuildContext(env=...) (no de os.environ al importar)
+# y metricas de cero en cada run: dos builds en el mismo proceso no se suman.
+
+import os, json, shutil, tempfile, unittest
+from automation import generate_free, templates
+from automation.context import BuildContext
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class BuildContextTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.addCleanup(os.chdir, os.getcwd())
+
+    def site(self, name):
+        # arbol vacio con seeds.json como directorio de trabajo
+        d = os.path.join(self.tmp, name)
+        os.makedirs(d)
+        shutil.copy(os.path.join(ROOT, "seeds.json"), d)
+        os.chdir(d)
+
+    def test_settings_come_from_env(self):
+        ctx = BuildContext({}, env={"OUTPUT_MINIFY": "0", "RENDER_WORKERS": "3", "PAAPI_TPS": " "})
+        self.assertFalse(ctx.output.minify)
+        self.assertTrue(ctx.output.precompress)
+        self.assertEqual(ctx.setting("RENDER_WORKERS", 0), 3)
+        self.assertEqual(ctx.setting("PAAPI_TPS", 1.0), 1.0)  # vacio: valor por defecto
+        self.assertTrue(BuildContext({}, env={}).output.minify)
+
+    def test_repeated_builds_start_from_zero(self):
+        env = {"JINJA_CACHE_DIR": os.path.join(self.tmp, "jinja"), "AMAZON_ACCESS_KEY": "", "AMAZON_SECRET_KEY": ""}
+        reports = []
+        for name in ("a", "b"):  # mismo trabajo en los dos: el segundo informe debe ser igual
+            self.site(name)
+            generate_free.main(generate_free.load_context(env=env))
+            with open(os.path.join(".cache", "runs", "run_free.json"), encoding="utf-8") as f:
+                reports.append(json.load(f))
+        a, b = reports
+        self.assertEqual({k: v["n"] for k, v in a["stages"].items()}, {k: v["n"] for k, v in b["stages"].items()})
+        self.assertEqual(len(a["errors"]), len(b["errors"]))
+        self.assertEqual(templates.cache_dir(), env["JINJA_CACHE_DIR"])
+        self.assertTrue(os.listdir(env["JINJA_CACHE_DIR"]))
+
+if __name__ == "__main__":
+    unittest.main()
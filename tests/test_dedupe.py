@@ -0,0 +1,48 @@
+# tests/test_dedupe.py
+# Agrupado de keywords casi duplicadas: alias por normalizacion y por MinHash,
+# cifras distintas nunca se juntan y la canonica la elige prefer.
+
+import unittest
+from unittest import mock
+from automation import dedupe
+
+KWS = ["batería de litio 100ah camper", "bateria litio camper 100ah",
+       "placa solar 100w", "placa solar 200w",
+       "inversores 12v", "inversor 12v",
+       "de la", "el",
+       "nevera compresor portatil", "nevera compresor portátil barata"]
+
+class ClusterTest(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(dedupe.normalize("Baterías de Litio"), "bateria litio")
+        self.assertEqual(dedupe.normalize("inversores"), "inversor")
+        self.assertEqual(dedupe.normalize("litio batería"), dedupe.normalize("batería litio"))
+
+    def test_groups(self):
+        self.assertEqual(dedupe.cluster(KWS), [[0, 1], [2], [3], [4, 5], [6], [7], [8, 9]])
+
+    def test_numbers_must_match(self):
+        self.assertEqual(dedupe.cluster(["placa solar 100w", "placa solar 200w"]), [[0], [1]])
+
+    def test_stopwords_only_stay_alone(self):
+        self.assertEqual(dedupe.cluster(["de la", "el", "de la"]), [[0], [1], [2]])
+
+    def test_prefer_picks_canonical(self):
+        groups = dedupe.cluster(KWS, prefer=lambda i: -i)
+        self.assertEqual(groups[0], [9, 8])
+        self.assertEqual(sorted(map(sorted, groups)), sorted(map(sorted, dedupe.cluster(KWS))))
+
+    def test_threshold(self):
+        # con umbral 1 solo quedan los alias por normalizacion
+        self.assertEqual(dedupe.cluster(KWS, threshold=1.0)[-1], [9])
+
+    def test_signatures_without_numpy(self):
+        sets = [dedupe.shingles(dedupe.normalize(k)) for k in KWS if dedupe.normalize(k)]
+        with mock.patch.object(dedupe, "optional_numpy", lambda: None):
+            plain = dedupe.signatures(sets)
+            groups = dedupe.cluster(KWS)
+        self.assertEqual(dedupe.signatures(sets), plain)
+        self.assertEqual(dedupe.cluster(KWS), groups)
+
+if __name__ == "__main__":
+    unittest.main()
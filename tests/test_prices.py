@@ -0,0 +1,45 @@
+# tests/test_prices.py
+# patch_html (--refresh-prices): sustituye precio y disponibilidad de los ASIN
+# con datos nuevos, con el mismo escape que las celdas de tables.py, y deja
+# intacto el resto.
+
+import os, shutil, tempfile, unittest
+from automation import prices, tables
+from automation.product import Product
+
+A, B = "B000000001", "B000000002"
+
+def page(*products):
+    return "<p>intro</p>" + "".join(f"<tr><td>{tables.price_cell(p, '')}</td><td>{tables.avail_cell(p, '')}</td></tr>"
+                                    for p in products)
+
+class PatchHtmlTest(unittest.TestCase):
+    def test_patch_matches_fresh_render(self):
+        old = page(Product(asin=A, price="10 €", availability="En stock"), Product(asin=B, price="20 €"))
+        offers = {A: ("<9 €> & IVA", "Quedan 'pocas'")}
+        new = Product(asin=A, price=offers[A][0], availability=offers[A][1])
+        expect = page(new, Product(asin=B, price="20 €"))
+        self.assertEqual(prices.patch_html(old, offers), expect)
+        self.assertIn("&lt;9 €&gt; &amp; IVA", expect)
+
+    def test_unknown_asin_unchanged(self):
+        old = page(Product(asin=A, price="10 €", availability="En stock"))
+        self.assertEqual(prices.patch_html(old, {B: ("1 €", "x")}), old)
+        self.assertEqual(prices.patch_html(old, {}), old)
+
+    def test_without_asin_not_patched(self):
+        old = page(Product(asin="", price="Consultar", availability="Ver"))
+        self.assertEqual(prices.patch_html(old, {"": ("1 €", "x")}), old)
+
+    def test_published_asins(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, True)
+        os.makedirs(os.path.join(root, "neveras"))
+        for rel, html in (("neveras/index.html", page(Product(asin=A), Product(asin=B), Product(asin=""))),
+                          ("index.html", page(Product(asin=""))), ("neveras/x.css", page(Product(asin=A)))):
+            with open(os.path.join(root, rel), "w", encoding="utf-8") as f:
+                f.write(html)
+        self.assertEqual(prices.published_asins(root), {"neveras/index.html": {A, B}})
+
+if __name__ == "__main__":
+    unittest.main()
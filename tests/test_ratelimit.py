@@ -0,0 +1,90 @@
+# tests/test_ratelimit.py
+# Token-bucket de PA-API con un reloj falso (sin esperas reales): rafaga, ritmo
+# sostenido, penalize tras 429/503 y Retry-After en segundos o como fecha HTTP.
+
+import unittest
+from unittest import mock
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from automation import ratelimit
+
+class FakeTime:
+    def __init__(self, now=1000.0):
+        self.now = now
+    def monotonic(self):
+        return self.now
+    def time(self):
+        return self.now
+    def sleep(self, s):
+        self.now += s
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeTime()
+        patcher = mock.patch.object(ratelimit, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_rate(self):
+        b = ratelimit.TokenBucket(tps=2, burst=3)
+        self.assertEqual([b.acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(b.acquire(), 0.5)
+        self.assertAlmostEqual(b.acquire(), 0.5)
+        self.assertEqual(b.stats["acquired"], 5)
+        self.assertAlmostEqual(b.stats["waited"], 1.0)
+
+    def test_idle_refill_capped_at_burst(self):
+        b = ratelimit.TokenBucket(tps=1, burst=2)
+        self.clock.sleep(60)
+        self.assertEqual([b.acquire() for _ in range(2)], [0.0, 0.0])
+        self.assertAlmostEqual(b.acquire(), 1.0)
+
+    def test_penalize_blocks_and_empties(self):
+        b = ratelimit.TokenBucket(tps=10, burst=5)
+        b.penalize(4)
+        self.assertAlmostEqual(b.acquire(), 4.0)
+        self.assertAlmostEqual(b.acquire(), 0.1)   # sin rafaga tras el bloqueo: el resto al ritmo tps
+        self.assertEqual(b.stats["throttled"], 1)
+
+    def test_configure_bounds(self):
+        b = ratelimit.TokenBucket()
+        b.configure(0, 0)
+        self.assertEqual((b.tps, b.burst), (0.01, 1))
+        b.configure("3", None)
+        self.assertEqual((b.tps, b.burst), (3.0, 1))
+
+    def test_configure_rate_limit_precedence(self):
+        lim = ratelimit.rate_limiter()
+        self.addCleanup(ratelimit.configure_rate_limit, {})
+        ratelimit.configure_rate_limit({"paapi_tps": 5}, {"PAAPI_TPS": "2", "PAAPI_BURST": "4"})
+        self.assertEqual((lim.tps, lim.burst), (5.0, 4))
+        ratelimit.configure_rate_limit({}, {"PAAPI_TPS": "", "PAAPI_BURST": ""})
+        self.assertEqual((lim.tps, lim.burst), (ratelimit.DEFAULT_TPS, ratelimit.DEFAULT_BURST))
+
+    def test_backoff(self):
+        b = ratelimit.TokenBucket()
+        self.assertEqual(b.backoff(3, "7"), 7.0)
+        for attempt in range(8):
+            cap = min(ratelimit.BACKOFF_CAP, ratelimit.BACKOFF_BASE * 2 ** attempt)
+            self.assertTrue(cap / 2 <= b.backoff(attempt) <= cap)
+
+class RetryAfterTest(unittest.TestCase):
+    def test_seconds(self):
+        self.assertEqual(ratelimit.parse_retry_after("120"), 120.0)
+        self.assertEqual(ratelimit.parse_retry_after("1.5"), 1.5)
+        self.assertEqual(ratelimit.parse_retry_after("-3"), 0.0)
+
+    def test_http_date(self):
+        clock = FakeTime(1_790_000_000.0)
+        when = format_datetime(datetime.fromtimestamp(clock.now + 30, timezone.utc), usegmt=True)
+        past = format_datetime(datetime.fromtimestamp(clock.now - 30, timezone.utc), usegmt=True)
+        with mock.patch.object(ratelimit, "time", clock):
+            self.assertEqual(ratelimit.parse_retry_after(when), 30.0)
+            self.assertEqual(ratelimit.parse_retry_after(past), 0.0)
+
+    def test_invalid(self):
+        for value in (None, "", "pronto", "Mon, 99 Foo 2020"):
+            self.assertIsNone(ratelimit.parse_retry_after(value))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+# tests/test_related.py
+# Motor numpy (matriz dispersa) frente al indice invertido en Python: mismo top-k,
+# tambien con mas terminos que columnas tenia la antigua matriz densa.
+
+import random, unittest
+from automation import related
+
+def corpus(n, vocab, seed=7):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    return {f"c{i % 12}/p{i}": " ".join(rng.choice(words) for _ in range(rng.randint(3, 8))) + f" cat{i % 12}"
+            for i in range(n)}
+
+@unittest.skipIf(related.optional_numpy() is None, "numpy no instalado")
+class TopkEnginesTest(unittest.TestCase):
+    def check(self, docs, k=related.TOP_K):
+        vecs = related.tfidf(docs)
+        slugs = sorted(docs)
+        expect = related._topk_python(slugs, slugs, vecs, k)
+        got = related._topk_numpy(slugs, slugs, vecs, k)
+        self.assertEqual([q for q in slugs if expect[q] != got[q]], [])
+        return expect
+
+    def test_large_vocabulary(self):
+        table = self.check(corpus(1500, 9000))
+        self.assertTrue(any(table.values()))
+
+    def test_ties_and_small_k(self):
+        # muchos empates exactos: el desempate por slug tiene que coincidir
+        docs = {f"a/p{i}": "robot aspirador barato" for i in range(30)}
+        docs.update({f"b/p{i}": "robot cocina" for i in range(5)})
+        self.check(docs, k=3)
+
+    def test_query_subset(self):
+        docs = corpus(400, 600, seed=3)
+        vecs = related.tfidf(docs)
+        slugs = sorted(docs)
+        new = slugs[::7]
+        self.assertEqual(related._topk_python(new, slugs, vecs, 5), related._topk_numpy(new, slugs, vecs, 5))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_sharding.py
+# Build repartido (--shard i/N + --merge) frente a build completo: mismo public/.
+# Primer build (sin public/_logs) y todas las partes en el mismo arbol, una tras
+# otra: cada parte ve en public/ las paginas de las anteriores.
+# Ejecutar desde la raiz: python -m pytest -q tests
+
+import os, sys, shutil, subprocess, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV = {"SOURCE_DATE_EPOCH": "1790000000", "GITHUB_REPOSITORY": "o/r", "RENDER_WORKERS": "1",
+       "IMAGE_SOURCE_URL": "http://127.0.0.1:9/img", "AMAZON_ACCESS_KEY": "", "AMAZON_SECRET_KEY": ""}
+
+def tree(base, name):
+    # copia limpia: codigo, seeds.json y public/static; sin bootstrap.json (config por defecto)
+    d = os.path.join(base, name)
+    shutil.copytree(os.path.join(ROOT, "automation"), os.path.join(d, "automation"),
+                    ignore=shutil.ignore_patterns("__pycache__", "bootstrap.json"))
+    shutil.copytree(os.path.join(ROOT, "public", "static"), os.path.join(d, "public", "static"))
+    shutil.copy(os.path.join(ROOT, "seeds.json"), d)
+    return d
+
+def run(cwd, script, *args):
+    env = dict(os.environ, PYTHONPATH=cwd, PAAPI_CACHE_PATH=os.path.join(cwd, ".cache", "paapi.sqlite"), **ENV)
+    subprocess.run([sys.executable, f"automation/{script}", *args], cwd=cwd, env=env, check=True,
+                   stdout=subprocess.DEVNULL, timeout=300)
+
+def files(root):
+    out = {}
+    for dirpath, _, names in os.walk(root):
+        for n in names:
+            rel = os.path.relpath(os.path.join(dirpath, n), root).replace(os.sep, "/")
+            with open(os.path.join(dirpath, n), "rb") as f:
+                out[rel] = f.read()
+    return out
+
+class ShardedBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def assertSameTree(self, a, b):
+        fa, fb = files(os.path.join(a, "public")), files(os.path.join(b, "public"))
+        self.assertEqual(sorted(fa), sorted(fb))
+        self.assertEqual([p for p in fa if fa[p] != fb[p]], [])
+
+    def test_autodiscover_first_build_same_tree(self):
+        single, sharded = tree(self.tmp, "single"), tree(self.tmp, "sharded")
+        run(single, "generate_autodiscover.py")
+        for i in (1, 2, 3):
+            run(sharded, "generate_autodiscover.py", "--shard", f"{i}/3")
+        run(sharded, "generate_autodiscover.py", "--merge")
+        self.assertSameTree(single, sharded)
+        self.assertFalse(os.listdir(os.path.join(sharded, "public", "_logs", "shards")))
+
+    def test_free_first_build_same_tree(self):
+        single, sharded = tree(self.tmp, "single"), tree(self.tmp, "sharded")
+        run(single, "generate_free.py")
+        for i in (1, 2):
+            run(sharded, "generate_free.py", "--shard", f"{i}/2")
+        run(sharded, "generate_free.py", "--merge")
+        self.assertSameTree(single, sharded)
+
+    def test_merge_fails_without_every_shard(self):
+        sharded = tree(self.tmp, "sharded")
+        run(sharded, "generate_autodiscover.py", "--shard", "1/2")
+        with self.assertRaises(subprocess.CalledProcessError):
+            run(sharded, "generate_autodiscover.py", "--merge")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+# tests/test_tables.py
+# Tabla de productos: todo texto externo escapado, columnas en el orden del
+# Layout y spans bb-price/bb-avail con el formato que parchea prices.py.
+
+import unittest
+from automation import tables
+from automation.product import Product
+
+P = Product(asin="B000000001", title="Nevera <b>12V</b> & 'compresor'", features=("<i>Silenciosa</i> & eficiente", "2", "3"),
+            price="99,90 €", availability="En stock <script>", image="https://img/x.jpg?a=1&b=\"2\"")
+NO_ASIN = Product(asin="", title="Placa solar 100W", price="Consultar", availability="Ver en Amazon")
+
+LAYOUT = tables.Layout([tables.Column("Producto", tables.product_cell(bullets=1)),
+                        tables.Column("Precio", tables.price_cell),
+                        tables.Column("Stock", tables.avail_cell),
+                        tables.Column("<Ver>", tables.button_cell("Ver & comprar"))], "t")
+
+class CellsTest(unittest.TestCase):
+    def test_product_cell_escapes_and_strips_bullets(self):
+        html = tables.product_cell(bullets=1)(P, "")
+        self.assertEqual(html, "<strong>Nevera &lt;b&gt;12V&lt;/b&gt; &amp; &#x27;compresor&#x27;</strong>"
+                               "<ul><li>Silenciosa &amp; eficiente</li></ul>")
+
+    def test_product_cell_image(self):
+        html = tables.product_cell(bullets=0, image=True, max_title=6)(P, "")
+        self.assertIn('src="https://img/x.jpg?a=1&amp;b=&quot;2&quot;"', html)
+        self.assertIn('alt="Nevera"', html)
+
+    def test_price_and_avail_spans(self):
+        self.assertEqual(tables.price_cell(P, ""), "<span class='bb-price' id='price-B000000001'>99,90 €</span>")
+        self.assertEqual(tables.avail_cell(P, ""),
+                         "<span class='bb-avail' id='avail-B000000001'>En stock &lt;script&gt;</span>")
+
+    def test_without_asin_no_patch_ids(self):
+        self.assertEqual(tables.price_cell(NO_ASIN, ""), "<span class='bb-price'>Consultar</span>")
+        self.assertEqual(tables.avail_cell(NO_ASIN, ""), "Ver en Amazon")
+
+    def test_links(self):
+        self.assertEqual(tables.link_for(P, "t-21"), "https://www.amazon.es/dp/B000000001?tag=t-21")
+        self.assertEqual(tables.link_for(NO_ASIN, "t-21"), "https://www.amazon.es/s?k=Placa%20solar%20100W&tag=t-21")
+
+class TableTest(unittest.TestCase):
+    def test_column_layout(self):
+        html = tables.render_table([P, NO_ASIN], LAYOUT, "t-21", note="Precios <aprox>")
+        self.assertTrue(html.startswith("<table class='t'><thead><tr><th>Producto</th><th>Precio</th>"
+                                        "<th>Stock</th><th>&lt;Ver&gt;</th></tr></thead><tbody>"))
+        rows = html.split("<tbody>")[1].split("</tbody>")[0].splitlines()
+        self.assertEqual(len(rows), 3)
+        self.assertTrue(all(r.count("<td") == 4 for r in rows[:2]))
+        self.assertEqual(rows[2], "<tr><td colspan='4' class='muted'>Precios &lt;aprox&gt;</td></tr>")
+        self.assertIn("href='https://www.amazon.es/dp/B000000001?tag=t-21'>Ver &amp; comprar</a>", rows[0])
+
+    def test_empty_table(self):
+        self.assertEqual(tables.render_table([], LAYOUT, "t-21", note="x"), "")
+
+    def test_no_table_class(self):
+        html = tables.render_table([P], tables.Layout([tables.Column("ASIN", tables.text_cell("asin"))], ""), "t")
+        self.assertEqual(html, "<table><thead><tr><th>ASIN</th></tr></thead><tbody>"
+                               "<tr><td>B000000001</td></tr>\n</tbody></table>")
+
+if __name__ == "__main__":
+    unittest.main()